@@ -0,0 +1,115 @@
+# store the completed weeks of past (or current) seasons of leagues in the history warehouse used by the all-time
+# leaderboards of the report, from the saved data of the leagues (-d) or from the yahoo api
+
+import getopt
+import sys
+import time
+from configparser import ConfigParser
+
+from calculate.bad_boy_stats import BadBoyStats
+from report.fantasy_football_report_builder import FantasyFootballReport
+from utils.yql_query import YqlQuery
+
+# local config vars
+config = ConfigParser()
+config.read("config.ini")
+
+usage = ("\nYahoo Fantasy Football history backfill usage:\n"
+         "     python backfill_history.py -l <league_id,league_id,...> -q -d -s\n\n"
+         "past seasons are selected with their full league keys (<game_key>.l.<league_id>), the leagues of the current "
+         "season with their league ids\n")
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "hl:qds")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+
+    options_dict = {"league_ids": []}
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt in ("-l", "--league-ids"):
+            options_dict["league_ids"].extend([league_id.strip() for league_id in arg.split(",") if league_id.strip()])
+        elif opt in ("-q", "--disqualify-ce"):
+            options_dict["dq_ce_bool"] = True
+        elif opt in ("-d", "--dev"):
+            options_dict["dev_bool"] = True
+        elif opt in ("-s", "--save"):
+            options_dict["save_bool"] = True
+
+    if not options_dict["league_ids"]:
+        print("\nPlease select at least one league with -l.")
+        print(usage)
+        sys.exit(2)
+
+    return options_dict
+
+
+def get_last_completed_week(league_id, dev_bool, save_bool):
+    """ Get the last completed week of the regular season of a league (every week of a finished season).
+    """
+    yql_query = YqlQuery(config, league_id, save_bool, dev_bool, "test/league_id-" + league_id)
+    yql_query.get_league_key()
+    league_standings_data = yql_query.get_league_standings_data()
+    yql_query.get_roster_data()
+
+    current_week = int(league_standings_data.loc[0, "current_week"])
+    if "is_finished" in league_standings_data.columns and str(league_standings_data.loc[0, "is_finished"]) == "1":
+        return yql_query.num_regular_season_weeks
+    return min(current_week - 1, yql_query.num_regular_season_weeks)
+
+
+def backfill_league(league_id, options):
+
+    dev_bool = options.get("dev_bool", False)
+    save_bool = options.get("save_bool", False)
+
+    week = get_last_completed_week(league_id, dev_bool, save_bool)
+    if week < 1:
+        print("League {} has no completed weeks.".format(league_id))
+        return
+
+    fantasy_football_report = FantasyFootballReport(user_input_league_id=league_id,
+                                                    user_input_chosen_week=str(week),
+                                                    dq_ce_bool=options.get("dq_ce_bool", False),
+                                                    dev_bool=dev_bool,
+                                                    save_bool=save_bool,
+                                                    week_complete_bool=True)
+    report_info_dict, line_chart_data_list = fantasy_football_report.create_report_data()
+    fantasy_football_report.headshot_cache.shutdown()
+
+    if report_info_dict.get("all_time_leaderboards") is None:
+        raise RuntimeError("the history of league {} was not stored".format(league_id))
+    print("Stored weeks 1 to {} of the {} season of league {}, with {} season(s) of league history.".format(
+        week, fantasy_football_report.season, league_id, len(report_info_dict["all_time_leaderboards"]["seasons"])))
+
+
+# RUN FANTASY FOOTBALL HISTORY BACKFILL
+if __name__ == '__main__':
+
+    options = main(sys.argv[1:])
+
+    if not config.get("Fantasy_Football_Report_Settings", "history_database", fallback=""):
+        print("\nPlease set the history_database of config.ini to store the league history.")
+        sys.exit(2)
+
+    if not options.get("dev_bool", False):
+        YqlQuery(config, "", False, False, "").share_session()
+        BadBoyStats.shared_bad_boy_data = BadBoyStats(config, False, False, "").bad_boy_data
+
+    num_failed = 0
+    for league_id in options["league_ids"]:
+        begin = time.time()
+        try:
+            backfill_league(league_id, options)
+        except Exception as e:
+            num_failed += 1
+            print("Backfill of league {} FAILED ({}: {}).".format(league_id, type(e).__name__, e))
+        else:
+            print("...league {} backfilled in {:.1f} s.\n".format(league_id, time.time() - begin))
+
+    sys.exit(1 if num_failed else 0)
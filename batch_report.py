@@ -0,0 +1,198 @@
+# run the reports of many leagues at once in a process pool
+
+import contextlib
+import getopt
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from configparser import ConfigParser
+
+from calculate.bad_boy_stats import BadBoyStats
+from report.fantasy_football_report_builder import FantasyFootballReport
+from utils.yql_query import YqlQuery
+
+# local config vars
+config = ConfigParser()
+config.read("config.ini")
+
+usage = ("\nYahoo Fantasy Football batch report application usage:\n"
+         "     python batch_report.py [-l <league_id,league_id,...>] [-f <leagues_file>] [-w <chosen_week>] "
+         "[-p <num_processes>] -q -b -t -d -s -o <pdf|html>\n\n"
+         "each line of the leagues file holds a league id, optionally followed by a comma and the week of its report "
+         "(lines starting with # are ignored)\n")
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "hl:f:w:p:qbtdso:")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+
+    options_dict = {"leagues": []}
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt in ("-l", "--league-ids"):
+            options_dict["leagues"].extend([[league_id.strip(), None] for league_id in arg.split(",")
+                                            if league_id.strip()])
+        elif opt in ("-f", "--leagues-file"):
+            options_dict["leagues"].extend(read_leagues_file(arg))
+        elif opt in ("-w", "--week"):
+            if int(arg) < 1 or int(arg) > 17:
+                print("\nPlease select a valid week number between 1 and 17.")
+                sys.exit(2)
+            options_dict["week"] = arg
+        elif opt in ("-p", "--processes"):
+            options_dict["num_processes"] = int(arg)
+        elif opt in ("-q", "--disqualify-ce"):
+            options_dict["dq_ce_bool"] = True
+        elif opt in ("-b", "--break-ties"):
+            options_dict["break_ties_bool"] = True
+        elif opt in ("-t", "--test"):
+            options_dict["test_bool"] = True
+        elif opt in ("-d", "--dev"):
+            options_dict["dev_bool"] = True
+        elif opt in ("-s", "--save"):
+            options_dict["save_bool"] = True
+        elif opt in ("-o", "--output-format"):
+            if arg not in ["pdf", "html"]:
+                print("\nPlease select an output format of either 'pdf' or 'html'.")
+                sys.exit(2)
+            options_dict["output_format"] = arg
+
+    if not options_dict["leagues"]:
+        print("\nPlease select at least one league with -l or -f.")
+        print(usage)
+        sys.exit(2)
+
+    return options_dict
+
+
+def read_leagues_file(leagues_file):
+    leagues = []
+    with open(leagues_file, "r") as leagues_in:
+        for line in leagues_in:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                league = [value.strip() for value in line.split(",")]
+                leagues.append([league[0], league[1] if len(league) > 1 and league[1] else None])
+    return leagues
+
+
+def share_league_independent_data(dev_bool):
+    """ Load the data used by the reports of every league (yahoo oauth session, game data, and bad boy data) once, in
+    this process, so that the report processes forked from it do not load it again.
+    """
+    if not dev_bool:
+        YqlQuery(config, "", False, False, "").share_session()
+        BadBoyStats.shared_bad_boy_data = BadBoyStats(config, False, False, "").bad_boy_data
+
+
+def run_league_report(league_report):
+    """ Generate the report of one league (run in the batch process pool), with its output written to a log file.
+
+    :return: dict of the league id, week, status, run time, report file and log file of the report
+    """
+    league_id, week, options = league_report
+
+    begin = time.time()
+    status = "OK"
+    generated_report = ""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            fantasy_football_report = FantasyFootballReport(user_input_league_id=league_id,
+                                                            user_input_chosen_week=week,
+                                                            dq_ce_bool=options.get("dq_ce_bool", False),
+                                                            break_ties_bool=options.get("break_ties_bool", False),
+                                                            test_bool=options.get("test_bool", False),
+                                                            dev_bool=options.get("dev_bool", False),
+                                                            save_bool=options.get("save_bool", False),
+                                                            unique_test_report_bool=True)
+            week = fantasy_football_report.chosen_week
+            if options.get("output_format", "pdf") == "html":
+                generated_report = fantasy_football_report.create_html_report()
+            else:
+                generated_report = fantasy_football_report.create_pdf_report()
+        except SystemExit as e:
+            status = "FAILED: exited with status {}".format(e.code)
+            print(status)
+        except Exception as e:
+            # reports cannot prompt for input in the batch, so they fail instead (e.g. for an incomplete week)
+            status = "FAILED: {}: {}".format(type(e).__name__, e)
+            print(status)
+
+    log_dir = os.path.join(config.get("Fantasy_Football_Report_Settings", "report_directory_base_path"), "batch_logs")
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, "league_id-{}_week-{}.log".format(league_id, week or "default"))
+    with open(log_file, "w") as log_out:
+        log_out.write(log.getvalue())
+
+    return {"league_id": league_id, "week": week or "default", "status": status, "seconds": time.time() - begin,
+            "report": generated_report, "log": log_file}
+
+
+def run_batch(leagues, options):
+    """ Generate the reports of all leagues, in a pool of forked processes where available.
+
+    :return: list of the results of each league report, in the order of the leagues
+    """
+    league_reports = [(league_id, week or options.get("week"), options) for league_id, week in leagues]
+    num_processes = options.get("num_processes") or config.getint(
+        "Fantasy_Football_Report_Settings", "num_batch_report_processes", fallback=os.cpu_count() or 1)
+
+    share_league_independent_data(options.get("dev_bool", False))
+
+    executor = None
+    if num_processes > 1 and len(league_reports) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        # forked report processes start with the shared data already loaded
+        executor = ProcessPoolExecutor(max_workers=min(num_processes, len(league_reports)),
+                                       mp_context=multiprocessing.get_context("fork"))
+        league_results = executor.map(run_league_report, league_reports)
+    else:
+        league_results = map(run_league_report, league_reports)
+
+    results = []
+    try:
+        for result in league_results:
+            print("...{} league {} week {} in {:.1f} s".format(
+                "finished" if result["status"] == "OK" else "FAILED", result["league_id"], result["week"],
+                result["seconds"]))
+            results.append(result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
+
+
+def print_summary(results, total_seconds):
+    print("\n~~~~~ BATCH REPORT SUMMARY ~~~~~")
+    print("{:<20}{:>8}{:>10}  {}".format("league", "week", "seconds", "status"))
+    for result in results:
+        print("{:<20}{:>8}{:>10.1f}  {}".format(result["league_id"], result["week"], result["seconds"],
+                                                result["status"]))
+        print("{:<38}  {}".format("", result["report"] if result["status"] == "OK" else "log: " + result["log"]))
+    num_failed = len([result for result in results if result["status"] != "OK"])
+    print("\n{} of {} reports generated in {:.1f} s{}.\n".format(
+        len(results) - num_failed, len(results), total_seconds,
+        " ({} FAILED)".format(num_failed) if num_failed else ""))
+
+
+# RUN FANTASY FOOTBALL BATCH REPORT PROGRAM
+if __name__ == '__main__':
+
+    options = main(sys.argv[1:])
+
+    print("\nGenerating fantasy football reports for {} league(s)...".format(len(options["leagues"])))
+    batch_begin = time.time()
+    batch_results = run_batch(options["leagues"], options)
+    print_summary(batch_results, time.time() - batch_begin)
+
+    if any(result["status"] != "OK" for result in batch_results):
+        sys.exit(1)
@@ -0,0 +1,122 @@
+# benchmark of the streaming bad boy arrests table parser against the previous BeautifulSoup parser
+#
+# usage (from the project root directory):
+#     python -m benchmarks.bad_boy_parser_benchmark [path/to/saved/usatoday/arrests.html]
+#
+# without a saved copy of https://www.usatoday.com/sports/nfl/arrests/ a synthetic page of the same layout is used
+
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+from configparser import ConfigParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from calculate.bad_boy_stats import BadBoyStats  # noqa: E402
+
+NUM_SYNTHETIC_ROWS = 5000
+NFL_TEAMS = ["ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB", "HOU", "IND", "JAC",
+             "KC", "LAC", "LAR", "MIA", "MIN", "NE", "NO", "NYG", "NYJ", "OAK", "PHI", "PIT", "SEA", "SF", "TB", "TEN",
+             "WAS"]
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "CB", "LB", "DE", "DT", "S", "OT", "G", "C"]
+
+
+def build_synthetic_page(rankings):
+    rng = random.Random(0)
+    categories = [category.capitalize() for category in rankings]
+    rows = []
+    for row_index in range(NUM_SYNTHETIC_ROWS):
+        rows.append(
+            "<tr class=\"arrest\"><td>2017-{0:02d}-{1:02d}</td><td>{2}</td><td><a href=\"#\">Player {3}</a></td>"
+            "<td>{4}</td><td>Charged with {5}</td><td>{6}</td>"
+            "<td><span class=\"description\">Description of the arrest &amp; its outcome.</span></td></tr>".format(
+                rng.randint(1, 12), rng.randint(1, 28), rng.choice(NFL_TEAMS), rng.randint(0, 2000),
+                rng.choice(POSITIONS), rng.choice(categories).lower(),
+                ", ".join(rng.sample(categories, rng.randint(1, 2)))))
+    return ("<html><head><title>NFL Arrests</title></head><body><table><thead><tr><th>Date</th><th>Team</th>"
+            "<th>Name</th><th>Pos</th><th>Case</th><th>Category</th><th>Description</th></tr></thead><tbody>" +
+            "\n".join(rows) + "</tbody></table></body></html>")
+
+
+def scrape_with_beautiful_soup(bad_boy_stats, data):
+    # previous BeautifulSoup scraper, kept here as the baseline (without the DEF roll-up, which is now done when
+    # the bad boy index is built)
+    soup = BeautifulSoup(data, "html.parser")
+    bad_boy_data = {}
+
+    for row in soup.find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) > 0:
+            name = cells[2].text
+            team = cells[1].text
+            date = cells[0].text
+            pos = cells[3].text
+            case = cells[4].text.upper()
+            temp_category = cells[5].text.upper()
+
+            for item in temp_category.strip().split(","):
+                category = item.strip()
+                if category in bad_boy_stats.rankings:
+                    score = bad_boy_stats.rankings.get(category)
+                else:
+                    score = 0
+
+                if name not in bad_boy_data:
+                    bad_boy_data[name] = {"team": team, "date": date, "pos": pos, "case": case,
+                                          "category": category, "points": score}
+                else:
+                    bad_boy_data[name]["points"] = bad_boy_data[name].get("points") + score
+    return bad_boy_data
+
+
+def scrape_with_streaming_parser(bad_boy_stats, data):
+    bad_boy_stats.category_scores = {}
+    page = io.StringIO(data)
+    return bad_boy_stats.scrape_bad_boy_data(iter(lambda: page.read(65536), ""))
+
+
+def measure(scrape_function, bad_boy_stats, data):
+    tracemalloc.start()
+    begin = time.perf_counter()
+    bad_boy_data = scrape_function(bad_boy_stats, data)
+    elapsed = time.perf_counter() - begin
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return bad_boy_data, elapsed, peak_memory
+
+
+def main(argv):
+    # load only the crime category rankings (dev mode bad boy data is not needed)
+    bad_boy_stats = BadBoyStats.__new__(BadBoyStats)
+    bad_boy_stats.config = ConfigParser()
+    bad_boy_stats.category_scores = {}
+    bad_boy_stats.rankings = BadBoyStats.load_rankings()
+
+    if argv:
+        with open(argv[0], "r", encoding="utf-8") as page_file:
+            data = page_file.read()
+        print("Fixture page: {}".format(argv[0]))
+    else:
+        data = build_synthetic_page(bad_boy_stats.rankings)
+        print("Fixture page: synthetic page with {:,} arrest rows".format(NUM_SYNTHETIC_ROWS))
+    print("Page size: {:,} characters\n".format(len(data)))
+
+    results = {}
+    for parser_name, scrape_function in [("BeautifulSoup (html.parser)", scrape_with_beautiful_soup),
+                                         ("streaming table parser", scrape_with_streaming_parser)]:
+        results[parser_name] = measure(scrape_function, bad_boy_stats, data)
+        print("{:>28}: {:8.1f} ms, peak memory {:8.1f} KiB".format(
+            parser_name, results[parser_name][1] * 1000, results[parser_name][2] / 1024))
+
+    records = [result[0] for result in results.values()]
+    print("\nBoth parsers found the same {:,} bad boy records: {}".format(len(records[0]), records[0] == records[1]))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
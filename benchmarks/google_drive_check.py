@@ -0,0 +1,108 @@
+# check of the google drive uploader against the local google drive stand-in: the same report is uploaded several times
+# into the same folder path, and the folders of the report must be found (from the folder id cache, or with scoped
+# queries without it) instead of created again
+#
+# usage (from the project root directory):
+#     python -m benchmarks.google_drive_check
+#
+# exits with status 1 when any check fails
+
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.local_google_drive import LocalGoogleDrive  # noqa: E402
+from utils.upload_to_google_drive import FOLDER_MIME_TYPE, GoogleDriveUploader  # noqa: E402
+
+# the apostrophe checks the escaping of the scoped queries
+LEAGUE_DIR = "Drive-Check's-League(check)"
+REPORT_FILE = "Drive-Check's-League(check)_week-1_report.pdf"
+
+
+def upload(drive, folder_id_cache_file, report_file):
+    """ Upload the report with a new uploader, as a new report run would.
+
+    :return: number of requests made to the drive
+    """
+    num_requests = drive.num_requests
+    uploader = GoogleDriveUploader(report_file, drive=drive)
+    uploader.folder_id_cache_file = folder_id_cache_file
+    uploader.folder_ids = uploader.load_folder_ids()
+    uploader.upload_file()
+    return drive.num_requests - num_requests
+
+
+def get_drive_files(drive):
+    files = drive.load_files().values()
+    return ([metadata for metadata in files if metadata["mimeType"] == FOLDER_MIME_TYPE],
+            [metadata for metadata in files if metadata["mimeType"] != FOLDER_MIME_TYPE])
+
+
+def main():
+
+    drive_dir = tempfile.mkdtemp(prefix="google_drive_check_")
+    report_dir = os.path.join("reports", LEAGUE_DIR)
+    report_dir_existed_bool = os.path.exists(report_dir)
+    os.makedirs(report_dir, exist_ok=True)
+    report_file = "./" + report_dir + "/" + REPORT_FILE
+    folder_id_cache_file = os.path.join(drive_dir, "folder_ids.json")
+
+    failures = []
+
+    def check(description, passed_bool):
+        print("{} {}".format("ok    " if passed_bool else "FAILED", description))
+        if not passed_bool:
+            failures.append(description)
+
+    try:
+        with open(report_file, "wb") as report_out:
+            report_out.write(b"%PDF-1.4\n% google drive check\n")
+        drive = LocalGoogleDrive(os.path.join(drive_dir, "drive"))
+
+        upload(drive, folder_id_cache_file, report_file)
+        folders, reports = get_drive_files(drive)
+        check("first upload creates the root and league folders", len(folders) == 2)
+        check("first upload creates the report", len(reports) == 1 and reports[0]["mimeType"] == "application/pdf")
+        report_id = reports[0]["id"] if reports else None
+
+        num_requests = upload(drive, folder_id_cache_file, report_file)
+        folders, reports = get_drive_files(drive)
+        check("second upload finds the folders instead of creating them", len(folders) == 2)
+        check("second upload replaces the report", [report["id"] for report in reports] == [report_id])
+        # one query for the report and one upload of its content
+        check("second upload takes its folders from the folder id cache ({} requests)".format(num_requests),
+              num_requests == 2)
+
+        os.remove(folder_id_cache_file)
+        num_requests = upload(drive, folder_id_cache_file, report_file)
+        folders, reports = get_drive_files(drive)
+        check("upload without the folder id cache finds the folders with scoped queries", len(folders) == 2)
+        check("upload without the folder id cache replaces the report", [report["id"] for report in reports] ==
+              [report_id])
+        check("upload without the folder id cache queries each folder once ({} requests)".format(num_requests),
+              num_requests == 4)
+
+        league_folder = [folder for folder in folders if folder["parent_ids"] != ["root"]]
+        drive.CreateFile(league_folder[0]).Delete()
+        upload(drive, folder_id_cache_file, report_file)
+        folders, reports = get_drive_files(drive)
+        check("upload after the league folder was deleted creates it again", len(folders) == 2 and len(reports) == 1)
+    finally:
+        shutil.rmtree(drive_dir, ignore_errors=True)
+        if report_dir_existed_bool:
+            os.remove(report_file)
+        else:
+            shutil.rmtree(report_dir, ignore_errors=True)
+
+    if failures:
+        print("\n{} google drive check(s) failed.".format(len(failures)))
+        sys.exit(1)
+    print("\nAll google drive checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# memory usage of dev mode reports of synthetic leagues of different sizes, checked against a peak memory budget
+#
+# usage (from the project root directory):
+#     python -m benchmarks.memory_benchmark [-t <team counts, e.g. 8,12,16,32>] [-w <week counts, e.g. 1,6,13,17>]
+#                                           [-r <standard|wr_flex|idp|idp_no_d>] [-n <num_playoff_simulations>]
+#                                           [-b <peak_rss_budget_mb>] [-a]
+#
+# each report is generated in a new process so that its peak resident set size is its own, and the benchmark exits
+# with status 1 when any report exceeds the peak_rss_budget_mb config setting (or -b). use -a to also trace python
+# allocations (slower, and traced reports use more memory) and list the top allocation sites of each report
+
+import contextlib
+import getopt
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.report_benchmark import run_report  # noqa: E402
+from benchmarks.synthetic_league import SyntheticLeague  # noqa: E402
+from benchmarks.week_kernel_benchmark import build_config  # noqa: E402
+from utils.memory_tracker import memory_tracker  # noqa: E402
+
+
+def measure_report(league_id, num_weeks, report_dir, num_playoff_simulations, trace_allocations_bool):
+    """ Generate the report of a synthetic league with memory tracking (run in a new process).
+
+    :return: tuple of (peak rss in MiB, memory report text)
+    """
+    memory_tracker.enable(trace_allocations_bool)
+    run_report(league_id, num_weeks, report_dir, num_playoff_simulations)
+    memory_report = io.StringIO()
+    with contextlib.redirect_stdout(memory_report):
+        memory_tracker.print_report()
+    return memory_tracker.get_peak_rss_mb(), memory_report.getvalue()
+
+
+def main(argv):
+    usage = ("\nMemory benchmark usage:\n"
+             "     python -m benchmarks.memory_benchmark [-t <team counts>] [-w <week counts>] "
+             "[-r <standard|wr_flex|idp|idp_no_d>] [-n <num_playoff_simulations>] [-b <peak_rss_budget_mb>] [-a]\n")
+    try:
+        opts, args = getopt.getopt(argv, "ht:w:r:n:b:a")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+
+    team_counts = [8, 12, 16, 32]
+    week_counts = [1, 6, 13, 17]
+    roster_settings = "standard"
+    num_playoff_simulations = None
+    peak_rss_budget_mb = build_config().getint("Fantasy_Football_Report_Settings", "peak_rss_budget_mb", fallback=0)
+    trace_allocations_bool = False
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt == "-t":
+            team_counts = [int(num_teams) for num_teams in arg.split(",")]
+        elif opt == "-w":
+            week_counts = [int(num_weeks) for num_weeks in arg.split(",")]
+        elif opt == "-r":
+            roster_settings = arg
+        elif opt == "-n":
+            num_playoff_simulations = int(arg)
+        elif opt == "-b":
+            peak_rss_budget_mb = int(arg)
+        elif opt == "-a":
+            trace_allocations_bool = True
+
+    over_budget = []
+    # spawned processes start without the memory of this one (or of any previous report)
+    context = multiprocessing.get_context("spawn")
+    for num_teams in team_counts:
+        for num_weeks in week_counts:
+            league_id = "synthetic-{}t-{}w".format(num_teams, num_weeks)
+            SyntheticLeague(league_id, num_teams=num_teams, num_weeks=num_weeks,
+                            roster_settings=roster_settings).write("test/league_id-" + league_id)
+
+            report_dir = tempfile.mkdtemp(prefix="memory_benchmark_")
+            try:
+                with context.Pool(1) as pool:
+                    peak_rss_mb, memory_report = pool.apply(
+                        measure_report, (league_id, num_weeks, report_dir, num_playoff_simulations,
+                                         trace_allocations_bool))
+            finally:
+                shutil.rmtree(report_dir, ignore_errors=True)
+
+            over_budget_bool = bool(peak_rss_budget_mb) and peak_rss_mb > peak_rss_budget_mb
+            print("{:>3} teams, {:>2} weeks: peak rss {:7.1f} MiB{}".format(
+                num_teams, num_weeks, peak_rss_mb, " OVER BUDGET" if over_budget_bool else ""))
+            if trace_allocations_bool:
+                print(memory_report)
+            sys.stdout.flush()
+            if over_budget_bool:
+                over_budget.append(league_id)
+
+    if over_budget:
+        print("\n{} report(s) exceeded the peak memory budget of {} MiB: {}".format(
+            len(over_budget), peak_rss_budget_mb, ", ".join(over_budget)))
+        sys.exit(1)
+    elif peak_rss_budget_mb:
+        print("\nAll reports stayed within the peak memory budget of {} MiB.".format(peak_rss_budget_mb))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
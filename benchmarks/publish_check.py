@@ -0,0 +1,275 @@
+# check of the report publishing against local stub servers: resumable google drive uploads (resumed after a failure in
+# the middle of an upload, and continued from their saved session by the next upload) and slack uploads (one upload
+# shared to several channels)
+#
+# usage (from the project root directory):
+#     python -m benchmarks.publish_check
+#
+# exits with status 1 when any check fails
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from configparser import ConfigParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.resumable_upload import ResumableUpload  # noqa: E402
+from utils.slack_messenger import SlackMessenger  # noqa: E402
+
+CHUNK_SIZE_KB = 256
+REPORT_SIZE = 4 * CHUNK_SIZE_KB * 1024 + 1000
+SLACK_CHANNELS = {"reports": "C000000A1", "league": "C000000B2", "friends": "C000000C3"}
+
+
+class PublishStubState(object):
+    """ What the stub servers received, and the failures they are set to respond with.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # google drive upload sessions, by session id
+        self.sessions = {}
+        self.num_sessions_started = 0
+        # first byte of every chunk received
+        self.chunk_offsets = []
+        # chunks starting at or after this byte are answered with 503 (this many times)
+        self.fail_from_byte = 0
+        self.num_failures_left = 0
+        # slack
+        self.slack_uploads = []
+        self.slack_completed_uploads = []
+        self.slack_html_error_bool = False
+
+
+class PublishStubHandler(BaseHTTPRequestHandler):
+
+    # set to the PublishStubState of the server
+    state = None
+
+    def log_message(self, format_string, *args):
+        pass
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def respond(self, status, body=b"", headers=None, content_type="application/json; charset=utf-8"):
+        if isinstance(body, dict):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_url(self, path):
+        return "http://{}:{}{}".format(self.server.server_address[0], self.server.server_address[1], path)
+
+    def respond_upload_progress(self, session):
+        if len(session["received"]) == session["size"]:
+            self.respond(200, {"id": "drive-file", "title": session["metadata"].get("title"),
+                               "alternateLink": self.get_url("/drive-file")})
+        elif session["received"]:
+            self.respond(308, headers={"Range": "bytes=0-{}".format(len(session["received"]) - 1)})
+        else:
+            self.respond(308)
+
+    def do_POST(self):
+        body = self.read_body()
+        path = urlparse(self.path).path
+        if path.startswith("/upload/drive/v2/files"):
+            self.start_upload_session(body)
+        elif path.startswith("/slack-upload/"):
+            with self.state.lock:
+                self.state.slack_uploads.append(body)
+            self.respond(200, b"OK - " + str(len(body)).encode("utf-8"), content_type="text/plain")
+        elif path.startswith("/api/"):
+            self.call_slack_api(path[len("/api/"):], {key: values[0] for key, values in
+                                                      parse_qs(body.decode("utf-8")).items()})
+        else:
+            self.respond(404, {"error": "not found"})
+
+    def do_PUT(self):
+        body = self.read_body()
+        path = urlparse(self.path).path
+        if path.startswith("/upload/drive/v2/files"):
+            self.start_upload_session(body)
+        elif path.startswith("/upload/session/"):
+            self.upload_chunk(path.split("/")[-1], body)
+        else:
+            self.respond(404, {"error": "not found"})
+
+    def start_upload_session(self, body):
+        with self.state.lock:
+            self.state.num_sessions_started += 1
+            session_id = str(self.state.num_sessions_started)
+            self.state.sessions[session_id] = {"received": bytearray(),
+                                               "size": int(self.headers["X-Upload-Content-Length"]),
+                                               "metadata": json.loads(body.decode("utf-8") or "{}")}
+        self.respond(200, headers={"Location": self.get_url("/upload/session/" + session_id)})
+
+    def upload_chunk(self, session_id, body):
+        with self.state.lock:
+            session = self.state.sessions.get(session_id)
+            if session is None:
+                self.respond(404, {"error": "session not found"})
+                return
+
+            content_range = self.headers.get("Content-Range", "")
+            if content_range.startswith("bytes */"):
+                # status query of how much of the file was received
+                self.respond_upload_progress(session)
+                return
+
+            first_byte = int(content_range.split(" ")[1].split("-")[0])
+            self.state.chunk_offsets.append(first_byte)
+            if first_byte >= self.state.fail_from_byte and self.state.num_failures_left > 0:
+                self.state.num_failures_left -= 1
+                self.respond(503, {"error": "backend error"})
+                return
+            if first_byte == len(session["received"]):
+                session["received"].extend(body)
+            self.respond_upload_progress(session)
+
+    def call_slack_api(self, method, params):
+        if self.headers.get("Authorization") != "Bearer stub-token":
+            self.respond(200, {"ok": False, "error": "invalid_auth"})
+        elif method == "conversations.list":
+            self.respond(200, {"ok": True, "channels": [{"name": name, "id": channel_id} for name, channel_id in
+                                                        SLACK_CHANNELS.items()]})
+        elif method == "files.getUploadURLExternal":
+            if self.state.slack_html_error_bool:
+                self.respond(403, b"<html><body>Forbidden</body></html>", content_type="text/html")
+            else:
+                self.respond(200, {"ok": True, "upload_url": self.get_url("/slack-upload/slack-file"),
+                                   "file_id": "slack-file"})
+        elif method == "files.completeUploadExternal":
+            with self.state.lock:
+                self.state.slack_completed_uploads.append(params)
+            self.respond(200, {"ok": True, "files": json.loads(params["files"])})
+        else:
+            self.respond(200, {"ok": False, "error": "unknown_method"})
+
+
+def main():
+
+    state = PublishStubState()
+    PublishStubHandler.state = state
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PublishStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server_url = "http://127.0.0.1:{}".format(server.server_address[1])
+
+    config = ConfigParser()
+    config.read_dict({
+        "Google_Drive_Settings": {"google_drive_upload_url": server_url + "/upload/drive/v2/files",
+                                  "google_drive_upload_chunk_size_kb": str(CHUNK_SIZE_KB)},
+        "Slack_Settings": {"slack_api_url": server_url + "/api/", "slack_channel": "reports",
+                           "slack_channels": "reports, #league, " + SLACK_CHANNELS["friends"]}
+    })
+
+    report_dir = tempfile.mkdtemp(prefix="publish_check_")
+    session_file = os.path.join(report_dir, "upload_sessions.json")
+
+    failures = []
+
+    def check(description, passed_bool):
+        print("{} {}".format("ok    " if passed_bool else "FAILED", description))
+        if not passed_bool:
+            failures.append(description)
+
+    def write_report(file_name):
+        report_file = os.path.join(report_dir, file_name)
+        with open(report_file, "wb") as report_out:
+            report_out.write(os.urandom(REPORT_SIZE))
+        with open(report_file, "rb") as report_in:
+            return report_file, report_in.read()
+
+    def create_upload(report_file, max_retries=5):
+        return ResumableUpload(config.get("Google_Drive_Settings", "google_drive_upload_url"), "stub-token",
+                               report_file, {"title": os.path.basename(report_file), "mimeType": "application/pdf"},
+                               chunk_size_kb=config.getint("Google_Drive_Settings",
+                                                           "google_drive_upload_chunk_size_kb"),
+                               session_file=session_file, max_retries=max_retries)
+
+    def get_saved_sessions():
+        if not os.path.isfile(session_file):
+            return {}
+        with open(session_file, "r") as sessions_in:
+            return json.load(sessions_in)
+
+    try:
+        # google drive: a chunk in the middle of the upload fails once, and the upload resumes where the server stopped
+        report_file, report_content = write_report("resumed_week-1_report.pdf")
+        state.fail_from_byte, state.num_failures_left = 2 * CHUNK_SIZE_KB * 1024, 1
+        uploaded_file = create_upload(report_file).upload()
+        session = state.sessions[str(state.num_sessions_started)]
+        check("drive upload completes after a failed chunk in the middle of the upload",
+              uploaded_file.get("id") == "drive-file" and bytes(session["received"]) == report_content)
+        check("drive upload resumes in the same session", state.num_sessions_started == 1)
+        check("drive upload sends the failed chunk again (and only that chunk)",
+              state.chunk_offsets.count(state.fail_from_byte) == 2 and len(state.chunk_offsets) == 6)
+        check("finished drive upload removes its saved session", get_saved_sessions() == {})
+
+        # google drive: an upload that keeps failing leaves its session saved for the next upload of the same report
+        report_file, report_content = write_report("interrupted_week-1_report.pdf")
+        state.chunk_offsets = []
+        state.fail_from_byte, state.num_failures_left = 2 * CHUNK_SIZE_KB * 1024, 1000
+        try:
+            create_upload(report_file, max_retries=1).upload()
+            interrupted_bool = False
+        except (IOError, OSError):
+            interrupted_bool = True
+        num_sessions_started = state.num_sessions_started
+        check("interrupted drive upload raises and saves its session",
+              interrupted_bool and len(get_saved_sessions()) == 1)
+
+        state.chunk_offsets = []
+        state.num_failures_left = 0
+        uploaded_file = create_upload(report_file).upload()
+        session = state.sessions[str(state.num_sessions_started)]
+        check("next drive upload continues the saved session instead of starting a new one",
+              state.num_sessions_started == num_sessions_started)
+        check("next drive upload starts from the last byte received ({:,})".format(
+            state.chunk_offsets[0] if state.chunk_offsets else -1),
+            state.chunk_offsets[:1] == [state.fail_from_byte])
+        check("next drive upload completes the report",
+              uploaded_file.get("id") == "drive-file" and bytes(session["received"]) == report_content)
+        check("completed drive upload removes the saved session", get_saved_sessions() == {})
+
+        # slack: the report is uploaded once and shared to every selected channel
+        report_file, report_content = write_report("Slack-League_week-1_report.pdf")
+        slack_messenger = SlackMessenger(config, token="stub-token")
+        response = slack_messenger.upload_file_to_selected_slack_channel(report_file)
+        check("slack upload succeeds", response.get("ok") is True)
+        check("slack upload sends the report once", state.slack_uploads == [report_content])
+        check("slack upload shares the report to all channels with one call",
+              len(state.slack_completed_uploads) == 1 and
+              sorted(state.slack_completed_uploads[0].get("channels", "").split(",")) ==
+              sorted(SLACK_CHANNELS.values()))
+
+        # slack: an html error page is reported as a slack error
+        state.slack_html_error_bool = True
+        response = slack_messenger.upload_file_to_selected_slack_channel(report_file)
+        check("slack html error page is reported as a slack error ({})".format(response.get("error")),
+              response.get("ok") is False and "status 403" in response.get("error", ""))
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(report_dir, ignore_errors=True)
+
+    if failures:
+        print("\n{} publish check(s) failed.".format(len(failures)))
+        sys.exit(1)
+    print("\nAll publish checks passed.")
+
+
+if __name__ == "__main__":
+    main()
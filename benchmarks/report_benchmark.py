@@ -0,0 +1,120 @@
+# end-to-end benchmark of dev mode reports of synthetic leagues of different sizes, timing each stage of the report
+#
+# usage (from the project root directory):
+#     python -m benchmarks.report_benchmark [-t <team counts, e.g. 8,12,16,32>] [-w <week counts, e.g. 1,6,13,17>]
+#                                           [-r <standard|wr_flex|idp|idp_no_d>] [-n <num_playoff_simulations>] [-c]
+#
+# the synthetic leagues are written to test/league_id-synthetic-<teams>t-<weeks>w (see benchmarks.synthetic_league),
+# and the reports, charts and headshots to a temporary directory so that every run starts from empty caches (use -c to
+# keep the chart and headshot caches of the first run of each league for a second, warm run)
+
+import contextlib
+import getopt
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_league import SyntheticLeague  # noqa: E402
+from report.fantasy_football_report_builder import FantasyFootballReport  # noqa: E402
+from utils.headshot_cache import HeadshotCache  # noqa: E402
+from utils.stage_profiler import profiler  # noqa: E402
+
+# (column title, stage names) of the benchmark results
+STAGE_COLUMNS = [
+    ("setup", ["oauth", "yql_league_data", "bad_boy_stats", "yql_remaining_matchups"]),
+    ("yql", ["yql_scoreboard", "yql_rosters"]),
+    ("metrics", ["coaching_efficiency", "breakdown", "zscore", "power_ranking", "ties"]),
+    ("playoffs", ["playoff_probabilities"]),
+    ("charts", ["charts"]),
+    ("headshots", ["headshots"]),
+    ("doc_build", ["doc_build"])
+]
+
+
+def run_report(league_id, num_weeks, report_dir, num_playoff_simulations):
+    """ Generate the dev mode pdf report of a synthetic league with stage timing.
+
+    :return: tuple of (total seconds, dict of stage name to seconds)
+    """
+    profiler.reset()
+    profiler.enable()
+    begin = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fantasy_football_report = FantasyFootballReport(user_input_league_id=league_id,
+                                                        user_input_chosen_week=str(num_weeks),
+                                                        dev_bool=True)
+        fantasy_football_report.config.set("Fantasy_Football_Report_Settings", "report_directory_base_path",
+                                           os.path.join(report_dir, "reports"))
+        fantasy_football_report.config.set("Fantasy_Football_Report_Settings", "chart_cache_directory",
+                                           os.path.join(report_dir, "charts"))
+        if num_playoff_simulations is not None:
+            fantasy_football_report.config.set("Fantasy_Football_Report_Settings", "num_playoff_simulations",
+                                               str(num_playoff_simulations))
+        # the headshots of synthetic players are kept out of the shared headshot cache
+        fantasy_football_report.headshot_cache.shutdown()
+        fantasy_football_report.headshot_cache = HeadshotCache(os.path.join(report_dir, "headshots"))
+        fantasy_football_report.create_pdf_report()
+    total_time = time.perf_counter() - begin
+    stage_totals = profiler.get_stage_totals()
+    profiler.reset()
+    return total_time, stage_totals
+
+
+def main(argv):
+    usage = ("\nReport benchmark usage:\n"
+             "     python -m benchmarks.report_benchmark [-t <team counts>] [-w <week counts>] "
+             "[-r <standard|wr_flex|idp|idp_no_d>] [-n <num_playoff_simulations>] [-c]\n")
+    try:
+        opts, args = getopt.getopt(argv, "ht:w:r:n:c")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+
+    team_counts = [8, 12, 16, 32]
+    week_counts = [1, 6, 13, 17]
+    roster_settings = "standard"
+    num_playoff_simulations = None
+    warm_run_bool = False
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt == "-t":
+            team_counts = [int(num_teams) for num_teams in arg.split(",")]
+        elif opt == "-w":
+            week_counts = [int(num_weeks) for num_weeks in arg.split(",")]
+        elif opt == "-r":
+            roster_settings = arg
+        elif opt == "-n":
+            num_playoff_simulations = int(arg)
+        elif opt == "-c":
+            warm_run_bool = True
+
+    print("{:>5} {:>5} {:>5} {}{:>9}".format("teams", "weeks", "run", "".join(
+        "{:>10}".format(column) for column, _ in STAGE_COLUMNS), "total"))
+    for num_teams in team_counts:
+        for num_weeks in week_counts:
+            league_id = "synthetic-{}t-{}w".format(num_teams, num_weeks)
+            SyntheticLeague(league_id, num_teams=num_teams, num_weeks=num_weeks,
+                            roster_settings=roster_settings).write("test/league_id-" + league_id)
+
+            report_dir = tempfile.mkdtemp(prefix="report_benchmark_")
+            try:
+                for run in (["cold", "warm"] if warm_run_bool else ["cold"]):
+                    total_time, stage_totals = run_report(league_id, num_weeks, report_dir, num_playoff_simulations)
+                    print("{:>5} {:>5} {:>5} {}{:>8.2f}s".format(num_teams, num_weeks, run, "".join(
+                        "{:>9.3f}s".format(sum(stage_totals.get(stage, 0.0) for stage in stages))
+                        for _, stages in STAGE_COLUMNS), total_time))
+                    sys.stdout.flush()
+            finally:
+                shutil.rmtree(report_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
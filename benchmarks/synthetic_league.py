@@ -0,0 +1,406 @@
+# generator of synthetic Yahoo fantasy football leagues, written in the same layout as the data saved in save mode so
+# that reports can be generated from them in dev mode without any network access
+#
+# usage (from the project root directory):
+#     python -m benchmarks.synthetic_league -t <num_teams> -w <num_weeks> [-r <standard|wr_flex|idp|idp_no_d>]
+#                                           [-b <num_bench>] [-l <league_id>]
+#
+# then generate a report from it with:
+#     python generate_report.py -d -l <league_id> -w <num_weeks>
+
+import getopt
+import json
+import os
+import pickle
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+from calculate.bad_boy_stats import BadBoyStats  # noqa: E402
+
+GAME_KEY = "380"
+SEASON = "2018"
+NUM_HEADSHOTS = 16
+NUM_EXTRA_BAD_BOY_RECORDS = 800
+
+# active roster slots of each roster settings preset (the number of bench slots is set separately)
+ROSTER_SETTINGS = {
+    "standard": [("QB", 1), ("WR", 2), ("RB", 2), ("TE", 1), ("W/R/T", 1), ("K", 1), ("DEF", 1)],
+    "wr_flex": [("QB", 1), ("WR", 3), ("RB", 2), ("TE", 1), ("W/R", 1), ("K", 1), ("DEF", 1)],
+    "idp": [("QB", 1), ("WR", 2), ("RB", 2), ("TE", 1), ("W/R/T", 1), ("K", 1), ("DEF", 1), ("DB", 2), ("DL", 2),
+            ("LB", 2), ("D", 1)],
+    # defensive players only in their own DB, DL and LB slots, without the D (flex defense) slot
+    "idp_no_d": [("QB", 1), ("WR", 2), ("RB", 2), ("TE", 1), ("W/R/T", 1), ("K", 1), ("DEF", 1), ("DB", 2), ("DL", 2),
+                 ("LB", 2)]
+}
+
+# positions of the players that can fill each roster slot
+SLOT_POSITIONS = {
+    "W/R/T": ["WR", "RB", "TE"],
+    "W/R": ["WR", "RB"],
+    "DB": ["CB", "S"],
+    "DL": ["DE", "DT"],
+    "LB": ["LB"],
+    "D": ["CB", "S", "DE", "DT", "LB"]
+}
+
+# eligible positions of the players of each position (defensive players are also eligible for the IDP flex)
+ELIGIBLE_POSITIONS = {
+    "CB": ["CB", "DB", "D"],
+    "S": ["S", "DB", "D"],
+    "DE": ["DE", "DL", "D"],
+    "DT": ["DT", "DL", "D"],
+    "LB": ["LB", "D"]
+}
+
+# (mean, standard deviation) of the weekly fantasy points of the players of each position
+POSITION_POINTS = {
+    "QB": (18, 7), "WR": (10, 6), "RB": (11, 6), "TE": (7, 4), "K": (8, 3), "DEF": (8, 5),
+    "CB": (6, 3), "S": (7, 3), "DE": (7, 4), "DT": (5, 3), "LB": (9, 4)
+}
+
+NFL_TEAMS = [
+    ("ARI", "Arizona Cardinals"), ("ATL", "Atlanta Falcons"), ("BAL", "Baltimore Ravens"), ("BUF", "Buffalo Bills"),
+    ("CAR", "Carolina Panthers"), ("CHI", "Chicago Bears"), ("CIN", "Cincinnati Bengals"), ("CLE", "Cleveland Browns"),
+    ("DAL", "Dallas Cowboys"), ("DEN", "Denver Broncos"), ("DET", "Detroit Lions"), ("GB", "Green Bay Packers"),
+    ("HOU", "Houston Texans"), ("IND", "Indianapolis Colts"), ("JAX", "Jacksonville Jaguars"),
+    ("KC", "Kansas City Chiefs"), ("LAC", "Los Angeles Chargers"), ("LAR", "Los Angeles Rams"),
+    ("MIA", "Miami Dolphins"), ("MIN", "Minnesota Vikings"), ("NE", "New England Patriots"),
+    ("NO", "New Orleans Saints"), ("NYG", "New York Giants"), ("NYJ", "New York Jets"), ("OAK", "Oakland Raiders"),
+    ("PHI", "Philadelphia Eagles"), ("PIT", "Pittsburgh Steelers"), ("SEA", "Seattle Seahawks"),
+    ("SF", "San Francisco 49ers"), ("TB", "Tampa Bay Buccaneers"), ("TEN", "Tennessee Titans"),
+    ("WAS", "Washington Redskins")
+]
+
+
+class SyntheticLeague(object):
+    """ A randomly generated (but reproducible for a given seed) league with a round robin schedule, players with
+    weekly fantasy points and bye weeks, standings that agree with the played weeks, and bad boy records of some of
+    its players.
+    """
+
+    def __init__(self, league_id, num_teams=12, num_weeks=13, num_regular_season_weeks=None,
+                 roster_settings="standard", num_bench=6, num_playoff_slots=4, seed=0):
+
+        if num_teams % 2 != 0:
+            raise ValueError("Synthetic leagues must have an even number of teams.")
+        if roster_settings not in ROSTER_SETTINGS:
+            raise ValueError("Roster settings must be one of: {}.".format(", ".join(sorted(ROSTER_SETTINGS))))
+
+        self.league_id = league_id
+        self.league_key = GAME_KEY + ".l." + self.league_id
+        self.league_name = "Synthetic League {} Teams".format(num_teams)
+        self.num_teams = num_teams
+        self.num_weeks = num_weeks
+        self.num_regular_season_weeks = num_regular_season_weeks or max(num_weeks, 13)
+        self.roster_positions = ROSTER_SETTINGS[roster_settings] + [("BN", num_bench)]
+        self.num_playoff_slots = num_playoff_slots
+        self.rng = random.Random(seed)
+
+        self.team_ids = [str(team_id) for team_id in range(1, self.num_teams + 1)]
+        self.team_names = {team_id: "Team {}".format(team_id) for team_id in self.team_ids}
+        # (moves, trades) of each team
+        self.transactions = {team_id: (self.rng.randint(0, 30), self.rng.randint(0, 3)) for team_id in self.team_ids}
+        self.schedule = self.create_schedule()
+        self.rosters = {team_id: self.create_roster(team_id) for team_id in self.team_ids}
+        self.weekly_points = {week: self.create_weekly_points(week) for week in range(1, self.num_weeks + 1)}
+
+    def create_schedule(self):
+        """ Round robin schedule (circle method) of the regular season, repeated when there are more weeks than
+        opponents.
+
+        :return: dict of week to list of (team_id, team_id) matchups
+        """
+        team_ids = list(self.team_ids)
+        self.rng.shuffle(team_ids)
+        schedule = {}
+        for week in range(1, self.num_regular_season_weeks + 1):
+            schedule[week] = [(team_ids[index], team_ids[-1 - index]) for index in range(self.num_teams // 2)]
+            team_ids = [team_ids[0]] + [team_ids[-1]] + team_ids[1:-1]
+        return schedule
+
+    def create_player(self, team_id, player_number, position, selected_position):
+        nfl_team_abbr, nfl_team_name = self.rng.choice(NFL_TEAMS)
+        if position == "DEF":
+            name = nfl_team_name.rsplit(" ", 1)[0]
+        else:
+            name = "Player {}-{}".format(team_id, player_number)
+        return {
+            "player_key": "{}.p.{}{:03d}".format(GAME_KEY, team_id, player_number),
+            "name": {"full": name},
+            "editorial_team_abbr": nfl_team_abbr,
+            "editorial_team_full_name": nfl_team_name,
+            "display_position": position,
+            "eligible_positions": {"position": ELIGIBLE_POSITIONS.get(position, position)},
+            "bye_weeks": {"week": str(self.rng.randint(4, 12))},
+            "image_url": "",
+            "selected_position": {"position": selected_position}
+        }
+
+    def create_roster(self, team_id):
+        roster = []
+        for slot, count in self.roster_positions:
+            for _ in range(count):
+                if slot == "BN":
+                    position = self.rng.choice(
+                        ["QB", "WR", "WR", "RB", "RB", "TE", "K"] +
+                        (["CB", "S", "DE", "DT", "LB"] if "D" in dict(self.roster_positions) else []))
+                else:
+                    position = self.rng.choice(SLOT_POSITIONS.get(slot, [slot]))
+                roster.append(self.create_player(team_id, len(roster) + 1, position, slot))
+        return roster
+
+    def create_weekly_points(self, week):
+        """ Fantasy points of every player of every team for the given week (players on a bye score no points).
+
+        :return: dict of team_id to list of player points in roster order
+        """
+        weekly_points = {}
+        for team_id, roster in self.rosters.items():
+            points = []
+            for player in roster:
+                if int(player["bye_weeks"]["week"]) == week:
+                    points.append(0.0)
+                else:
+                    mean, std_dev = POSITION_POINTS[player["display_position"]]
+                    points.append(round(max(-2.0, self.rng.gauss(mean, std_dev)), 2))
+            weekly_points[team_id] = points
+        return weekly_points
+
+    def get_team_score(self, team_id, week):
+        return round(sum(points for player, points in zip(self.rosters[team_id], self.weekly_points[week][team_id])
+                         if player["selected_position"]["position"] != "BN"), 2)
+
+    def get_team_key(self, team_id):
+        return self.league_key + ".t." + team_id
+
+    def get_manager(self, team_id):
+        return {"manager": {"manager_id": team_id, "nickname": "Manager {}".format(team_id), "guid": "SYNTHETIC{}".format(team_id)}}
+
+    def get_team_data(self, team_id):
+        return {
+            "team_key": self.get_team_key(team_id),
+            "team_id": team_id,
+            "name": self.team_names[team_id],
+            "url": "https://football.fantasysports.yahoo.com/f1/{}/{}".format(self.league_id, team_id),
+            "waiver_priority": team_id,
+            "number_of_moves": str(self.transactions[team_id][0]),
+            "number_of_trades": str(self.transactions[team_id][1]),
+            "managers": self.get_manager(team_id)
+        }
+
+    def get_game_data(self):
+        return [{"game_key": GAME_KEY, "game_id": GAME_KEY, "name": "Football", "code": "nfl", "type": "full",
+                 "season": SEASON}]
+
+    def get_league_standings_data(self):
+        records = {team_id: {"wins": 0, "losses": 0, "ties": 0, "points_for": 0.0, "points_against": 0.0,
+                             "streak": ("win", 0)} for team_id in self.team_ids}
+        for week in range(1, self.num_weeks + 1):
+            for team_ids in self.schedule[week]:
+                scores = [self.get_team_score(team_id, week) for team_id in team_ids]
+                for team_id, score, opponent_score in [(team_ids[0], scores[0], scores[1]),
+                                                       (team_ids[1], scores[1], scores[0])]:
+                    record = records[team_id]
+                    result = "win" if score > opponent_score else "loss" if score < opponent_score else "tie"
+                    record[{"win": "wins", "loss": "losses", "tie": "ties"}[result]] += 1
+                    record["points_for"] += score
+                    record["points_against"] += opponent_score
+                    streak_type, streak_value = record["streak"]
+                    record["streak"] = (result, streak_value + 1 if result == streak_type else 1)
+
+        teams = []
+        ranked_team_ids = sorted(self.team_ids, key=lambda x: (records[x]["wins"] + records[x]["ties"] / 2.0,
+                                                               records[x]["points_for"]), reverse=True)
+        for rank, team_id in enumerate(ranked_team_ids, start=1):
+            record = records[team_id]
+            team_data = self.get_team_data(team_id)
+            team_data["team_standings"] = {
+                "rank": str(rank),
+                "playoff_seed": str(rank),
+                "outcome_totals": {
+                    "wins": str(record["wins"]),
+                    "losses": str(record["losses"]),
+                    "ties": str(record["ties"]),
+                    "percentage": "{:.3f}".format(
+                        (record["wins"] + record["ties"] / 2.0) / self.num_weeks).lstrip("0")
+                },
+                "streak": {"type": record["streak"][0], "value": str(record["streak"][1])},
+                "points_for": "{:.2f}".format(record["points_for"]),
+                "points_against": "{:.2f}".format(record["points_against"])
+            }
+            teams.append(team_data)
+
+        return [{
+            "league_key": self.league_key,
+            "league_id": self.league_id,
+            "name": self.league_name,
+            "url": "https://football.fantasysports.yahoo.com/f1/{}".format(self.league_id),
+            "num_teams": str(self.num_teams),
+            "scoring_type": "head",
+            "current_week": str(self.num_weeks + 1),
+            "start_week": "1",
+            "end_week": "16",
+            "season": SEASON,
+            "standings": {"teams": {"team": teams}}
+        }]
+
+    def get_roster_data(self):
+        return [{
+            "league_key": self.league_key,
+            "league_id": self.league_id,
+            "name": self.league_name,
+            "settings": {
+                "num_playoff_teams": str(self.num_playoff_slots),
+                "playoff_start_week": str(self.num_regular_season_weeks + 1),
+                "roster_positions": {"roster_position": [
+                    {"position": position, "count": str(count)} for position, count in self.roster_positions]}
+            }
+        }]
+
+    def get_teams_data(self):
+        return [self.get_team_data(team_id) for team_id in self.team_ids]
+
+    def get_result_data(self, week):
+        matchups = []
+        for team_ids in self.schedule[week]:
+            played_bool = week <= self.num_weeks
+            scores = [self.get_team_score(team_id, week) if played_bool else 0.0 for team_id in team_ids]
+            matchup = {
+                "week": str(week),
+                "status": "postevent" if played_bool else "preevent",
+                "is_tied": "1" if played_bool and scores[0] == scores[1] else "0",
+                "teams": {"team": [{
+                    "team_key": self.get_team_key(team_id),
+                    "team_id": team_id,
+                    "name": self.team_names[team_id],
+                    "team_points": {"coverage_type": "week", "week": str(week), "total": "{:.2f}".format(score)}
+                } for team_id, score in zip(team_ids, scores)]}
+            }
+            if played_bool and scores[0] != scores[1]:
+                matchup["winner_team_key"] = self.get_team_key(team_ids[0] if scores[0] > scores[1] else team_ids[1])
+            matchups.append(matchup)
+        return [{"league_key": self.league_key, "scoreboard": {"week": str(week), "matchups": {"matchup": matchups}}}]
+
+    def get_roster_stats_data(self, team_id, week, headshot_urls):
+        players = []
+        for player_number, (player, points) in enumerate(zip(self.rosters[team_id], self.weekly_points[week][team_id])):
+            player = dict(player)
+            # a few players are questionable in any given week
+            player["status"] = "Q" if self.rng.random() < 0.03 else None
+            player["player_points"] = {"coverage_type": "week", "week": str(week), "total": "{:.2f}".format(points)}
+            if headshot_urls:
+                player["image_url"] = headshot_urls[(int(team_id) + player_number) % len(headshot_urls)]
+            players.append(player)
+        return [{"team_key": self.get_team_key(team_id), "team_id": team_id, "name": self.team_names[team_id],
+                 "roster": {"coverage_type": "week", "week": str(week), "players": {"player": players}}}]
+
+    def get_bad_boy_data(self):
+        """ Bad boy records of a few of the league's players and NFL defenses, mixed with records of other players.
+        """
+        rankings = sorted(BadBoyStats.load_rankings().items())
+        bad_boy_data = {}
+
+        def add_record(name, nfl_team_abbr, position):
+            category, points = self.rng.choice(rankings)
+            bad_boy_data[name] = {"team": nfl_team_abbr, "date": "{}-{:02d}-{:02d}".format(
+                SEASON, self.rng.randint(1, 12), self.rng.randint(1, 28)), "pos": position,
+                "case": "CHARGED", "category": category, "points": points}
+
+        for roster in self.rosters.values():
+            for player in roster:
+                if player["display_position"] != "DEF" and self.rng.random() < 0.05:
+                    add_record(player["name"]["full"], player["editorial_team_abbr"], player["display_position"])
+        for record_number in range(NUM_EXTRA_BAD_BOY_RECORDS):
+            add_record("Other Player {}".format(record_number), self.rng.choice(NFL_TEAMS)[0],
+                       self.rng.choice(["QB", "WR", "RB", "TE", "OT", "G", "C", "CB", "S", "DE", "DT", "LB"]))
+        return bad_boy_data
+
+    @staticmethod
+    def write_headshots(headshot_dir):
+        """ Write a set of placeholder headshots that reports can download from file urls.
+
+        :return: list of headshot urls
+        """
+        if not os.path.exists(headshot_dir):
+            os.makedirs(headshot_dir)
+        headshot_urls = []
+        for headshot_number in range(NUM_HEADSHOTS):
+            headshot_file = os.path.join(headshot_dir, "headshot_{}.png".format(headshot_number))
+            if not os.path.exists(headshot_file):
+                Image.new("RGB", (250, 340), ((headshot_number * 53) % 256, (headshot_number * 97) % 256, 160)).save(
+                    headshot_file)
+            headshot_urls.append("file://" + os.path.abspath(headshot_file))
+        return headshot_urls
+
+    def write(self, league_test_dir, headshots_bool=True):
+        """ Write the league in the layout of the data saved in save mode.
+        """
+        if not os.path.exists(league_test_dir):
+            os.makedirs(league_test_dir)
+
+        def write_json(path, data):
+            with open(os.path.join(league_test_dir, path), "w") as json_out:
+                json.dump(data, json_out)
+
+        write_json("game_data.json", self.get_game_data())
+        write_json("league_standings_data.json", self.get_league_standings_data())
+        write_json("roster_data.json", self.get_roster_data())
+        write_json("teams_data.json", self.get_teams_data())
+
+        headshot_urls = self.write_headshots(os.path.join(league_test_dir, "headshots")) if headshots_bool else []
+        for week in range(1, self.num_regular_season_weeks + 1):
+            week_dir = os.path.join(league_test_dir, "week_{}".format(week))
+            if not os.path.exists(os.path.join(week_dir, "roster_data")):
+                os.makedirs(os.path.join(week_dir, "roster_data"))
+            write_json(os.path.join("week_{}".format(week), "result_data.json"), self.get_result_data(week))
+            if week <= self.num_weeks:
+                for team_id in self.team_ids:
+                    write_json(os.path.join("week_{}".format(week), "roster_data", "{}_roster_data.json".format(
+                        self.team_names[team_id].replace(" ", "-"))),
+                        self.get_roster_stats_data(team_id, week, headshot_urls))
+
+        with open(os.path.join(league_test_dir, "bad_boy_data.pkl"), "wb") as bb_out:
+            pickle.dump(self.get_bad_boy_data(), bb_out, pickle.HIGHEST_PROTOCOL)
+
+        return league_test_dir
+
+
+def main(argv):
+    usage = ("\nSynthetic league generator usage:\n"
+             "     python -m benchmarks.synthetic_league -t <num_teams> -w <num_weeks> "
+             "[-r <standard|wr_flex|idp|idp_no_d>] [-b <num_bench>] [-l <league_id>]\n")
+    try:
+        opts, args = getopt.getopt(argv, "ht:w:r:b:l:")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+
+    options_dict = {"num_teams": 12, "num_weeks": 13, "roster_settings": "standard", "num_bench": 6}
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt == "-t":
+            options_dict["num_teams"] = int(arg)
+        elif opt == "-w":
+            options_dict["num_weeks"] = int(arg)
+        elif opt == "-r":
+            options_dict["roster_settings"] = arg
+        elif opt == "-b":
+            options_dict["num_bench"] = int(arg)
+        elif opt == "-l":
+            options_dict["league_id"] = arg
+
+    league_id = options_dict.pop("league_id", "synthetic-{num_teams}t-{num_weeks}w".format(**options_dict))
+    league = SyntheticLeague(league_id, **options_dict)
+    league_test_dir = league.write("test/league_id-" + league_id)
+    print("Synthetic league \"{}\" written to {}.".format(league.league_name, league_test_dir))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,151 @@
+# micro-benchmark of the one-time season setup and the per-week metrics kernel for a synthetic 12-team league
+#
+# usage (from the project root directory):
+#     python -m benchmarks.week_kernel_benchmark
+
+import contextlib
+import io
+import os
+import random
+import sys
+import timeit
+from configparser import ConfigParser
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculate.season_context import SeasonContext  # noqa: E402
+
+NUM_TEAMS = 12
+NUM_WEEKS = 13
+ROSTER_POSITIONS = [("QB", 1), ("WR", 2), ("RB", 2), ("TE", 1), ("W/R/T", 1), ("K", 1), ("DEF", 1), ("BN", 6)]
+PLAYER_POSITIONS = ["QB", "QB", "WR", "WR", "WR", "WR", "RB", "RB", "RB", "RB", "TE", "TE", "K", "DEF", "WR"]
+
+
+def build_config():
+    config = ConfigParser()
+    config.read(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.ini"))
+    return config
+
+
+def build_roster():
+    roster_slots = {}
+    active_slots = []
+    for position, count in ROSTER_POSITIONS:
+        if position != "BN":
+            active_slots.extend([position] * count)
+        roster_slots["FLEX" if "/" in position else position] = count
+    return {"slots": roster_slots, "flex_positions": ["WR", "RB", "TE"]}, active_slots
+
+
+def build_standings(rng):
+    teams = []
+    for team_id in range(1, NUM_TEAMS + 1):
+        wins = rng.randint(0, NUM_WEEKS // 2)
+        losses = NUM_WEEKS // 2 - wins
+        teams.append({
+            "team_id": str(team_id),
+            "name": "Team %d" % team_id,
+            "managers": {"manager": {"nickname": "Manager %d" % team_id}},
+            "waiver_priority": str(team_id),
+            "number_of_moves": "0",
+            "number_of_trades": "0",
+            "team_standings": {
+                "rank": str(team_id),
+                "points_for": "%.2f" % rng.uniform(500, 800),
+                "points_against": "%.2f" % rng.uniform(500, 800),
+                "streak": {"type": "win", "value": "1"},
+                "outcome_totals": {"wins": str(wins), "losses": str(losses), "ties": "0", "percentage": ".500"}
+            }
+        })
+    return pd.DataFrame([{"current_week": str(NUM_WEEKS // 2 + 1), "standings": {"teams": {"team": teams}}}])
+
+
+def build_week(rng, week):
+    team_results_dict = {}
+    for team_id in range(1, NUM_TEAMS + 1):
+        team_name = "Team %d" % team_id
+        players = []
+        positions_filled_active = []
+        open_slots = [position for position, count in ROSTER_POSITIONS for _ in range(count) if position != "BN"]
+        for player_index, position in enumerate(PLAYER_POSITIONS):
+            if position in open_slots:
+                selected_position = position
+                open_slots.remove(position)
+            elif "W/R/T" in open_slots and position in ["WR", "RB", "TE"]:
+                selected_position = "W/R/T"
+                open_slots.remove("W/R/T")
+            else:
+                selected_position = "BN"
+            if selected_position != "BN":
+                positions_filled_active.append(selected_position)
+            players.append({
+                "name": "Player %d-%d" % (team_id, player_index),
+                "status": "",
+                "bye_week": rng.randint(4, 12),
+                "selected_position": selected_position,
+                "eligible_positions": position,
+                "fantasy_points": round(rng.uniform(0, 30), 2),
+                "bad_boy_points": 0,
+                "bad_boy_crime": "",
+                "headshot_url": "",
+                "nfl_team": ""
+            })
+        team_results_dict[team_name] = {
+            "name": team_name,
+            "manager": "Manager %d" % team_id,
+            "players": players,
+            "score": sum([p["fantasy_points"] for p in players if p["selected_position"] != "BN"]),
+            "bench_score": sum([p["fantasy_points"] for p in players if p["selected_position"] == "BN"]),
+            "team_id": str(team_id),
+            "bad_boy_points": 0,
+            "worst_offense": "",
+            "num_offenders": 0,
+            "positions_filled_active": positions_filled_active
+        }
+
+    team_names = list(team_results_dict.keys())
+    rng.shuffle(team_names)
+    matchups_list = []
+    for team_1, team_2 in zip(team_names[::2], team_names[1::2]):
+        team_1_won = team_results_dict[team_1]["score"] >= team_results_dict[team_2]["score"]
+        matchups_list.append({
+            team_1: {"result": "W" if team_1_won else "L", "score": team_results_dict[team_1]["score"]},
+            team_2: {"result": "L" if team_1_won else "W", "score": team_results_dict[team_2]["score"]}
+        })
+    return team_results_dict, matchups_list
+
+
+def main():
+    rng = random.Random(0)
+    config = build_config()
+    league_standings_data = build_standings(rng)
+    weeks = [build_week(rng, week) for week in range(1, NUM_WEEKS + 1)]
+
+    def setup():
+        roster, active_slots = build_roster()
+        return SeasonContext(config, "0", league_standings_data, roster, active_slots, {}, 4, NUM_WEEKS,
+                             str(NUM_WEEKS))
+
+    def run_season(season_context):
+        weekly_team_info = []
+        # the chosen (last) week is excluded because it also runs the playoff probabilities simulation
+        for week, (team_results_dict, matchups_list) in enumerate(weeks[:-1], start=1):
+            report_info_dict = season_context.calculate_week_metrics(weekly_team_info, team_results_dict,
+                                                                     matchups_list, str(week))
+            weekly_team_info.append(report_info_dict.get("team_results"))
+
+    repeats = 5
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_time = min(timeit.repeat(setup, number=1, repeat=repeats))
+        season_context = setup()
+        kernel_time = min(timeit.repeat(lambda: run_season(season_context), number=1, repeat=repeats))
+
+    print("{}-team league, best of {} runs:".format(NUM_TEAMS, repeats))
+    print("    season setup (once): {:.2f} ms".format(setup_time * 1000))
+    print("    per-week kernel:     {:.2f} ms".format(kernel_time * 1000 / (NUM_WEEKS - 1)))
+
+
+if __name__ == "__main__":
+    main()
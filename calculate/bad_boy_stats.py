@@ -1,79 +1,103 @@
 import csv
+import gzip
+import json
+import os
 import pickle
+import re
+import time
+import unicodedata
+from html.parser import HTMLParser
 
 import requests
-from bs4 import BeautifulSoup
+
+
+class ArrestsTableParser(HTMLParser):
+    """ Incremental extractor for the rows of the USA Today NFL Arrest DB table. Text fed to the parser is streamed
+    through without building a DOM, and the text of the cells (<td>) of every table row (<tr>) is passed to the given
+    callback as soon as the row ends.
+    """
+
+    def __init__(self, row_callback):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.row_callback = row_callback
+        self.row = None
+        self.cell = None
+
+    def end_cell(self):
+        if self.cell is not None:
+            self.row.append("".join(self.cell))
+            self.cell = None
+
+    def end_row(self):
+        if self.row is not None:
+            self.end_cell()
+            if self.row:
+                self.row_callback(self.row)
+            self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self.end_row()
+            self.row = []
+        elif tag == "td" and self.row is not None:
+            # end tags of table cells are optional in html
+            self.end_cell()
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            if self.row is not None:
+                self.end_cell()
+        elif tag in ["tr", "table"]:
+            self.end_row()
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+
+
+def normalize_player_name(name):
+    """ Normalize a player name so that variants of the same name from Yahoo and USA Today match, by removing
+    accents, punctuation, case, and generational suffixes (e.g. "Ha Ha Clinton-Dix" and "T.J. Ward Jr." become
+    "ha ha clinton dix" and "tj ward").
+    """
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    name = re.sub(r"[.'`]", "", name)
+    words = re.sub(r"[^a-z0-9]+", " ", name).split()
+    while len(words) > 1 and words[-1] in BadBoyStats.name_suffixes:
+        words.pop()
+    return " ".join(words)
 
 
 class BadBoyStats(object):
 
-    def __init__(self, dev_bool, save_bool, league_test_dir):
+    # bump when the structure of the cached bad boy data changes so that old cache files are ignored
+    cache_version = 2
+
+    # defensive players whose bad boy points roll up to their team's DEF
+    defensive_positions = ["CB", "LB", "DE", "DT", "S"]
+    name_suffixes = ["jr", "sr", "ii", "iii", "iv", "v"]
+
+    # bad boy data loaded once and used by the reports of every league run from the same process (or forked from it)
+    shared_bad_boy_data = None
+
+    url = "https://www.usatoday.com/sports/nfl/arrests/"
+
+    def __init__(self, config, dev_bool, save_bool, league_test_dir):
         """ Initialize class, load data from USA Today NFL Arrest DB. Combine defensive player data
         """
 
-        self.rankings = {}
-        # Load the scoring based on crime categories
-        with open("resources/crime_category_scoring.csv", mode="r", encoding="utf-8-sig") as infile:
-            reader = csv.reader(infile)
-            for rows in reader:
-                crime_category = rows[0].upper().strip()
-                if crime_category.startswith('"') and crime_category.endswith('"'):
-                    crime_category = crime_category[1:-1]
-                rank = int(rows[1])
-                self.rankings[crime_category] = rank
+        self.config = config
+
+        self.rankings = self.load_rankings()
+        # scores of each distinct crime category string found while scraping
+        self.category_scores = {}
 
         if not dev_bool:
-            url = "https://www.usatoday.com/sports/nfl/arrests/"
-            r = requests.get(url)
-            data = r.text
-            soup = BeautifulSoup(data, "html.parser")
-            self.bad_boy_data = {}
-
-            # Scrape USA Today NFL crime database site
-            for row in soup.findAll("tr"):
-                cells = row.findAll("td")
-                if len(cells) > 0:
-                    name = cells[2].text
-                    team = cells[1].text
-                    date = cells[0].text
-                    pos = cells[3].text
-                    case = cells[4].text.upper()
-                    temp_category = cells[5].text.upper()
-
-                    for item in temp_category.strip().split(","):
-                        category = item.strip()
-                        if category in self.rankings:
-                            score = self.rankings.get(category)
-                        else:
-                            score = 0
-                            print("Crime ranking not found: %s\nAssigning score of 0." % category)
-
-                        if name not in self.bad_boy_data:
-                            self.bad_boy_data[name] = {
-                                "team": team,
-                                "date": date,
-                                "pos": pos,
-                                "case": case,
-                                "category": category,
-                                "points": score
-                            }
-                        else:
-                            points = self.bad_boy_data[name].get("points") + score
-                            self.bad_boy_data[name]["points"] = points
-
-                        if pos in ["CB", "LB", "DE", "DT", "S"]:
-                            if team not in self.bad_boy_data:
-                                self.bad_boy_data[team] = {
-                                    "team": team,
-                                    "date": date,
-                                    "pos": pos,
-                                    "case": case,
-                                    "category": category,
-                                    "points": score
-                                }
-                            else:
-                                points = self.bad_boy_data[name].get("points") + score
-                                self.bad_boy_data[name]["points"] = points
+            if BadBoyStats.shared_bad_boy_data is not None:
+                self.bad_boy_data = BadBoyStats.shared_bad_boy_data
+            else:
+                self.bad_boy_data = self.get_cached_bad_boy_data()
             if save_bool:
                 with open(league_test_dir +
                           "/" +
@@ -91,21 +115,231 @@ class BadBoyStats(object):
         else:
             print("{} bad boy records loaded".format(len(self.bad_boy_data)))
 
+        self.name_aliases = self.load_name_aliases(
+            self.config.get("Bad_Boy_Settings", "bad_boy_name_aliases_file", fallback=None))
+        self.player_index, self.team_def_index = self.build_index(self.bad_boy_data, self.name_aliases)
+
+    @staticmethod
+    def load_rankings():
+        rankings = {}
+        # Load the scoring based on crime categories
+        with open("resources/crime_category_scoring.csv", mode="r", encoding="utf-8-sig") as infile:
+            reader = csv.reader(infile)
+            for rows in reader:
+                crime_category = rows[0].upper().strip()
+                if crime_category.startswith('"') and crime_category.endswith('"'):
+                    crime_category = crime_category[1:-1]
+                rank = int(rows[1])
+                rankings[crime_category] = rank
+        return rankings
+
+    @staticmethod
+    def load_name_aliases(aliases_file):
+        """ Load the table of player name aliases (Yahoo name, USA Today name) that normalizing names cannot match.
+        """
+        name_aliases = {}
+        if aliases_file and os.path.exists(aliases_file):
+            with open(aliases_file, mode="r", encoding="utf-8-sig") as infile:
+                reader = csv.reader(infile)
+                for rows in reader:
+                    if len(rows) >= 2:
+                        name_aliases[normalize_player_name(rows[0])] = normalize_player_name(rows[1])
+        return name_aliases
+
+    def build_index(self, bad_boy_data, name_aliases):
+        """ Build the lookup indexes used for every active player: records by normalized player name (including
+        aliases) and the total points of the defensive players of each NFL team.
+
+        :return: tuple of (dict of normalized player name to record, dict of team abbreviation to DEF record)
+        """
+        player_index = {}
+        team_def_index = {}
+        for name, record in bad_boy_data.items():
+            team = record.get("team", "").upper().strip()
+            # skip DEF records rolled up by older versions of the scraper (saved in dev mode bad boy data)
+            if name == record.get("team"):
+                continue
+
+            normalized_name = normalize_player_name(name)
+            if normalized_name in player_index:
+                # different spellings of the same player's name found on the page
+                indexed_record = dict(player_index[normalized_name])
+                indexed_record["points"] += record.get("points")
+                player_index[normalized_name] = indexed_record
+            else:
+                player_index[normalized_name] = record
+
+            if record.get("pos") in self.defensive_positions:
+                if team not in team_def_index:
+                    team_def_index[team] = {
+                        "team": team,
+                        "pos": "DEF",
+                        "category": record.get("category"),
+                        "points": record.get("points"),
+                        "worst_points": record.get("points")
+                    }
+                else:
+                    team_def_record = team_def_index[team]
+                    team_def_record["points"] += record.get("points")
+                    if record.get("points") > team_def_record["worst_points"]:
+                        team_def_record["category"] = record.get("category")
+                        team_def_record["worst_points"] = record.get("points")
+
+        for alias, name in name_aliases.items():
+            if name in player_index and alias not in player_index:
+                player_index[alias] = player_index[name]
+
+        return player_index, team_def_index
+
+    def load_cache(self, cache_file):
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with gzip.open(cache_file, "rt", encoding="utf-8") as cache_in:
+                cache = json.load(cache_in)
+        except (OSError, ValueError):
+            print("Unable to read bad boy cache file {}, ignoring it.".format(cache_file))
+            return None
+        # ignore cached data from a different cache version or scored with different crime category rankings
+        if cache.get("version") != self.cache_version or cache.get("rankings") != self.rankings:
+            return None
+        return cache
+
+    @staticmethod
+    def save_cache(cache_file, cache):
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # write to a temporary file first so that reports running at the same time never read a partial cache
+        temp_cache_file = "{}.{}.tmp".format(cache_file, os.getpid())
+        with gzip.open(temp_cache_file, "wt", encoding="utf-8") as cache_out:
+            json.dump(cache, cache_out, separators=(",", ":"))
+        os.replace(temp_cache_file, cache_file)
+
+    def get_cached_bad_boy_data(self):
+        """ Get bad boy data from the cache shared by all leagues on this host, and only download and parse the USA
+        Today NFL Arrest DB again when the cache is older than its TTL and the source has actually changed.
+        """
+        cache_file = os.path.expanduser(self.config.get("Bad_Boy_Settings", "bad_boy_cache_file"))
+        cache_ttl = self.config.getfloat("Bad_Boy_Settings", "bad_boy_cache_ttl_hours") * 3600
+
+        cache = self.load_cache(cache_file)
+        if cache and time.time() - cache.get("validated", 0) < cache_ttl:
+            return cache.get("bad_boy_data")
+
+        # revalidate cached data with a conditional GET
+        headers = {}
+        if cache:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache.get("etag")
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache.get("last_modified")
+
+        try:
+            r = requests.get(self.url, headers=headers, timeout=30, stream=True)
+            r.raise_for_status()
+        except requests.RequestException as e:
+            if cache:
+                print("Unable to check {} for new bad boy records ({}), using cached records.".format(self.url, e))
+                return cache.get("bad_boy_data")
+            print("Unable to retrieve bad boy records from {} ({}).".format(self.url, e))
+            return {}
+
+        if r.encoding is None:
+            r.encoding = "utf-8"
+
+        if r.status_code == 304 and cache:
+            print("Cached bad boy records are up to date.")
+        else:
+            cache = {
+                "version": self.cache_version,
+                "rankings": self.rankings,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "bad_boy_data": self.scrape_bad_boy_data(r.iter_content(chunk_size=65536, decode_unicode=True))
+            }
+        cache["validated"] = time.time()
+
+        self.save_cache(cache_file, cache)
+
+        return cache.get("bad_boy_data")
+
+    def get_category_scores(self, temp_category):
+        """ Split a row's comma separated crime categories and score them, scoring each distinct category string only
+        once per page.
+        """
+        category_scores = self.category_scores.get(temp_category)
+        if category_scores is None:
+            category_scores = []
+            for item in temp_category.strip().split(","):
+                category = item.strip()
+                if category in self.rankings:
+                    score = self.rankings.get(category)
+                else:
+                    score = 0
+                    print("Crime ranking not found: %s\nAssigning score of 0." % category)
+                category_scores.append((category, score))
+            self.category_scores[temp_category] = category_scores
+        return category_scores
+
+    def scrape_bad_boy_data(self, page_chunks):
+        """ Scrape USA Today NFL crime database site
+
+        :param page_chunks: the arrests page html, either as a string or as an iterable of text chunks
+        :return: dict of bad boy records by player name (defensive players are rolled up to DEF in build_index)
+        """
+        bad_boy_data = {}
+
+        def add_row(cells):
+            if len(cells) < 6:
+                return
+
+            name = cells[2]
+            team = cells[1]
+            date = cells[0]
+            pos = cells[3]
+            case = cells[4].upper()
+
+            for category, score in self.get_category_scores(cells[5].upper()):
+
+                if name not in bad_boy_data:
+                    bad_boy_data[name] = {
+                        "team": team,
+                        "date": date,
+                        "pos": pos,
+                        "case": case,
+                        "category": category,
+                        "points": score
+                    }
+                else:
+                    points = bad_boy_data[name].get("points") + score
+                    bad_boy_data[name]["points"] = points
+
+        if isinstance(page_chunks, str):
+            page_chunks = [page_chunks]
+
+        parser = ArrestsTableParser(add_row)
+        for chunk in page_chunks:
+            parser.feed(chunk)
+        parser.close()
+
+        return bad_boy_data
+
     def check_bad_boy_status(self, name, team, pos):
-        """ Looks up given player and returns number of 'bad boy' points based on scoring.
+        """ Looks up given player by normalized name (or team for DEF) and returns number of 'bad boy' points based on
+        scoring.
 
-        TODO: maybe limit for years and adjust defensive players rolling up to DEF team as it skews DEF scores high
+        TODO: maybe limit for years
         :param name: Player name to look up
         :param team: Player's team (maybe later limit to only crimes while on that team...or for DEF players)
         :param pos: Player's position
         :return: Integer number of bad boy points, crime recorded
         """
-        total = 0
-        category = ""
         if pos == "DEF":
-            name = team
-        if name in self.bad_boy_data:
-            crime = self.bad_boy_data.get(name)
-            total = crime.get("points")
-            category = crime.get("category")
-        return total, category
+            crime = self.team_def_index.get(team.upper().strip())
+        else:
+            crime = self.player_index.get(normalize_player_name(name))
+        if crime:
+            return crime.get("points"), crime.get("category")
+        return 0, ""
@@ -52,7 +52,7 @@ class CoachingEfficiency(object):
     def get_optimal_players(self, eligible_players, position):
         player_list = eligible_players[position]
 
-        num_slots = self.roster_slots[position]
+        num_slots = self.roster_slots.get(position, 0)
 
         return sorted(player_list, key=lambda x: x["fantasy_points"], reverse=True)[:num_slots]
 
@@ -79,7 +79,8 @@ class CoachingEfficiency(object):
             # extract already allocated players from candidates
             available = candidates - optimal_allocated
 
-            num_slots = self.roster_slots[flex_position]
+            # leagues without a slot for a flex position have no optimal players for it
+            num_slots = self.roster_slots.get(flex_position, 0)
 
             # convert back to list, sort, take as many as there are slots available
             optimal_flex = sorted(list(available), key=lambda x: x[1], reverse=True)[:num_slots]
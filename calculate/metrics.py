@@ -1,8 +1,89 @@
 # written by Wren J.R.
 # contributors: Kevin N., Joe M.
 
-import itertools
+import collections
+
 from calculate.playoff_probabilities import Team, Record
+from calculate.ranking import rank_values, name_codes
+
+# column layout of each weekly results table: every table starts with place, team, and manager columns, followed by
+# the listed team_results_dict keys and their formats (format strings, or functions of the value). Teams are ranked by
+# "metric" (rounded to "decimals" before checking for ties), or take their places from the rank already calculated in
+# "rank_key", and ties can only be broken for tables with "tiebreaks" columns. Values in "na_values" are shown as N/A.
+RESULTS_TABLE_SCHEMA = collections.OrderedDict([
+    ("score", {
+        "metric": "score",
+        "ascending": False,
+        "decimals": 2,
+        "tiebreaks": ["bench_score"],
+        "place_format": "{}",
+        "mark_ties": True,
+        "disqualified_value": None,
+        "rank_key": None,
+        "na_values": [],
+        "columns": [("score", "%.2f"), ("bench_score", "%.2f")]
+    }),
+    ("coaching_efficiency", {
+        "metric": "coaching_efficiency",
+        "ascending": False,
+        "decimals": 2,
+        "tiebreaks": [],
+        "place_format": "{}",
+        "mark_ties": True,
+        "disqualified_value": 0.0,
+        "rank_key": None,
+        "na_values": [],
+        "columns": [("coaching_efficiency", "%.2f%%")]
+    }),
+    ("luck", {
+        "metric": "luck",
+        "ascending": False,
+        "decimals": 2,
+        "tiebreaks": [],
+        "place_format": "{}",
+        "mark_ties": True,
+        "disqualified_value": None,
+        "rank_key": None,
+        "na_values": [],
+        "columns": [("luck", "%.2f%%")]
+    }),
+    ("power_rank", {
+        "metric": "power_rank",
+        "ascending": True,
+        "decimals": None,
+        "tiebreaks": [],
+        "place_format": "{}.0",
+        "mark_ties": True,
+        "disqualified_value": None,
+        "rank_key": None,
+        "na_values": [],
+        "columns": []
+    }),
+    ("zscore", {
+        "metric": "zscore",
+        "ascending": True,
+        "decimals": None,
+        "tiebreaks": [],
+        "place_format": "{}",
+        "mark_ties": False,
+        "disqualified_value": None,
+        "rank_key": "zscore_rank",
+        "na_values": [0],
+        "columns": [("zscore", lambda zscore: round(float(zscore), 2))]
+    }),
+    ("bad_boy", {
+        "metric": "bad_boy_points",
+        "ascending": False,
+        "decimals": 0,
+        "tiebreaks": [],
+        "place_format": "{}",
+        "mark_ties": True,
+        "disqualified_value": None,
+        "rank_key": None,
+        "na_values": [],
+        "columns": [("bad_boy_points", "%d"), ("worst_offense", "%s"), ("num_offenders", "%d")]
+    })
+])
 
 
 class CalculateMetrics(object):
@@ -127,215 +208,59 @@ class CalculateMetrics(object):
 
         return sorted_playoff_probs_data
 
-    @staticmethod
-    def get_score_data(score_results):
-        score_results_data = []
-        place = 1
-        for key, value in score_results:
-            ranked_team_name = key
-            ranked_team_manager = value.get("manager")
-            ranked_weekly_score = "%.2f" % float(value.get("score"))
-            ranked_weekly_bench_score = "%.2f" % float(value.get("bench_score"))
-
-            score_results_data.append(
-                [place, ranked_team_name, ranked_team_manager, ranked_weekly_score, ranked_weekly_bench_score])
-
-            place += 1
-
-        return score_results_data
-
-    def get_coaching_efficiency_data(self, coaching_efficiency_results):
-        coaching_efficiency_results_data = []
-        place = 1
-        for key, value in coaching_efficiency_results:
-            ranked_team_name = key
-            ranked_team_manager = value.get("manager")
-            ranked_coaching_efficiency = value.get("coaching_efficiency")
-
-            if ranked_coaching_efficiency == 0.0:
-                ranked_coaching_efficiency = "DQ"
-                self.coaching_efficiency_dq_count += 1
+    def get_results_table(self, team_results_dict, table_type, break_ties_bool=False):
+        """Rank teams by the metric of the given results table and lay out its rows according to its schema.
+
+        :param team_results_dict: weekly team results keyed by team name
+        :param table_type: key of the results table in RESULTS_TABLE_SCHEMA
+        :param break_ties_bool: break ties using the tiebreak columns of the table (if it has any)
+        :return: list of table rows and Ranking of the teams
+        """
+        schema = RESULTS_TABLE_SCHEMA[table_type]
+
+        team_names = list(team_results_dict.keys())
+        teams = [team_results_dict[team_name] for team_name in team_names]
+
+        tiebreaks = [[float(team.get(key)) for team in teams] for key in schema["tiebreaks"]]
+        # order teams with identical values by team name
+        tiebreaks.append(name_codes(team_names))
+
+        ranking = rank_values(
+            [team.get(schema["rank_key"] or schema["metric"]) for team in teams],
+            tiebreaks=tiebreaks,
+            ascending=schema["ascending"],
+            decimals=schema["decimals"],
+            break_ties_bool=break_ties_bool and bool(schema["tiebreaks"])
+        )
+
+        results_data = []
+        for team_index, place, tied in zip(ranking.order, ranking.places, ranking.tied):
+            team = teams[team_index]
+
+            if schema["rank_key"]:
+                place_label = schema["place_format"].format(team.get(schema["rank_key"]))
+            elif team.get(schema["metric"]) is None:
+                place_label = "N/A"
             else:
-                ranked_coaching_efficiency = "%.2f%%" % float(ranked_coaching_efficiency)
-
-            coaching_efficiency_results_data.append(
-                [place, ranked_team_name, ranked_team_manager, ranked_coaching_efficiency])
-
-            place += 1
-
-        return coaching_efficiency_results_data
-
-    @staticmethod
-    def get_luck_data(luck_results):
-        luck_results_data = []
-        place = 1
-        for key, value in luck_results:
-            ranked_team_name = key
-            ranked_team_manager = value.get("manager")
-            ranked_luck = "%.2f%%" % value.get("luck")
-
-            luck_results_data.append([place, ranked_team_name, ranked_team_manager, ranked_luck])
-
-            place += 1
-        return luck_results_data
-
-    @staticmethod
-    def get_bad_boy_data(bad_boy_results):
-        bad_boy_results_data = []
-        place = 1
-        for key, value in bad_boy_results:
-            ranked_team_name = key
-            ranked_team_manager = value.get("manager")
-            ranked_bb_points = "%d" % value.get("bad_boy_points")
-            ranked_offense = value.get("worst_offense")
-            ranked_count = "%d" % value.get("num_offenders")
-
-            bad_boy_results_data.append([place, ranked_team_name, ranked_team_manager, ranked_bb_points,
-                                         ranked_offense, ranked_count])
-
-            place += 1
-        return bad_boy_results_data
-
-    def get_num_ties(self, results_data, tie_type, break_ties_bool):
-
-        if tie_type == "power_rank":
-            groups = [list(group) for key, group in itertools.groupby(results_data, lambda x: x[0])]
-            num_ties = self.count_ties(groups)
-        else:
-            groups = [list(group) for key, group in itertools.groupby(results_data, lambda x: x[3])]
-            num_ties = self.count_ties(groups)
-
-        # if there are ties, record them and break them if possible
-        if num_ties > 0:
-            ties_count = 0
-            team_index = 0
-            place = 1
-            while ties_count != num_ties:
-
-                for group in groups:
-                    if len(group) > 1:
-                        ties_count += sum(range(len(group)))
-
-                        for team in group:
-                            if tie_type == "power_rank":
-                                results_data[team_index] = [
-                                    str(place) + ".0*",
-                                    team[1],
-                                    team[2],
-                                ]
-                            elif tie_type == "score" and break_ties_bool:
-                                results_data[team_index] = [
-                                    str(place),
-                                    team[1],
-                                    team[2],
-                                    team[3]
-                                ]
-                                if group.index(team) != (len(group) - 1):
-                                    place += 1
-                            elif tie_type == "bad_boy":
-                                results_data[team_index] = [
-                                    str(place) + "*",
-                                    team[1],
-                                    team[2],
-                                    team[3],
-                                    team[4],
-                                    team[5]
-                                ]
-                            else:
-                                results_data[team_index] = [
-                                    str(place) + "*",
-                                    team[1],
-                                    team[2],
-                                    team[3]
-                                ]
-                            if tie_type == "score":
-                                results_data[team_index].append(team[4])
-                            team_index += 1
-                        place += 1
-
-                    else:
-                        if tie_type == "power_rank":
-                            results_data[team_index] = [
-                                str(place) + ".0",
-                                group[0][1],
-                                group[0][2],
-                            ]
-                        elif tie_type == "score" and break_ties_bool:
-                            results_data[team_index] = [
-                                str(place),
-                                group[0][1],
-                                group[0][2],
-                                group[0][3]
-                            ]
-                        elif tie_type == "bad_boy":
-                            results_data[team_index] = [
-                                str(place),
-                                group[0][1],
-                                group[0][2],
-                                group[0][3],
-                                group[0][4],
-                                group[0][5]
-                            ]
-                        else:
-                            results_data[team_index] = [
-                                str(place),
-                                group[0][1],
-                                group[0][2],
-                                group[0][3]
-                            ]
-                        if tie_type == "score":
-                            results_data[team_index].append(group[0][4])
-                        team_index += 1
-                        place += 1
-        return num_ties
-
-    @staticmethod
-    def count_ties(groups):
-        num_ties = 0
-        for group in groups:
-            if len(group) > 1:
-                num_ties += sum(range(len(group)))
-
-        return num_ties
-
-    @staticmethod
-    def resolve_score_ties(score_results_data, break_ties_bool):
-
-        groups = [list(group) for key, group in itertools.groupby(score_results_data, lambda x: x[3])]
-
-        resolved_score_results_data = []
-        place = 1
-        for group in groups:
-            for team in sorted(group, key=lambda x: x[-1], reverse=True):
-                if groups.index(group) != 0:
-                    team[0] = place
-                else:
-                    if break_ties_bool:
-                        team[0] = place
-                resolved_score_results_data.append(team)
-                place += 1
-
-        return resolved_score_results_data
-
-    @staticmethod
-    def resolve_season_average_ties(season_average_results_data, with_percent_bool):
-
-        groups = [list(group) for key, group in itertools.groupby(season_average_results_data, lambda x: x[2])]
-
-        resolved_season_average_results_data = []
-        place = 1
-        for group in groups:
-            for team in sorted(group, key=lambda x: x[-1], reverse=True):
-                team[0] = place
-                if with_percent_bool:
-                    team[2] = "{0}% ({1})".format(str(team[2]), str(place))
+                place_label = schema["place_format"].format(place)
+                if tied and schema["mark_ties"]:
+                    place_label += "*"
+
+            row = [place_label, team_names[team_index], team.get("manager")]
+            for key, value_format in schema["columns"]:
+                value = team.get(key)
+                if value is None or (key == schema["metric"] and value in schema["na_values"]):
+                    row.append("N/A")
+                elif key == schema["metric"] and schema["disqualified_value"] == value:
+                    row.append("DQ")
+                    self.coaching_efficiency_dq_count += 1
+                elif callable(value_format):
+                    row.append(value_format(value))
                 else:
-                    team[2] = "{0} ({1})".format(str(team[2]), str(place))
-
-                resolved_season_average_results_data.append(team)
-            place += 1
+                    row.append(value_format % value)
+            results_data.append(row)
 
-        return resolved_season_average_results_data
+        return results_data, ranking
 
     # noinspection PyUnusedLocal
     @staticmethod
@@ -1,21 +1,163 @@
 # code based on https://github.com/cdtdev/ff_monte_carlo (originally written by https://github.com/cdtdev)
 
-import copy
 import datetime
-import random
 
 import numpy as np
 
 
+# number of trials simulated together as the rows of one matrix of game outcomes
+TRIALS_PER_BATCH = 5000
+
+
 class PlayoffProbabilities(object):
 
-    def __init__(self, simulations, num_weeks, week, playoff_slots, teams, matchups):
+    def __init__(self, simulations, num_weeks, week, playoff_slots, teams, matchups, keep_trials_bool=False,
+                 team_scores=None, playoff_reseeding_bool=False):
         self.simulations = simulations
         self.num_weeks = num_weeks
         self.week = week
         self.playoff_slots = playoff_slots
         self.teams = teams
         self.matchups = matchups
+        self.keep_trials_bool = keep_trials_bool
+
+        # teams are the columns of the simulated standings and remaining games the columns of the simulated outcomes
+        self.team_ids = list(self.teams.keys())
+        self.team_indices = {team_id: index for index, team_id in enumerate(self.team_ids)}
+        self.games = [(week, matchup[0], matchup[1]) for week, matchups in sorted(self.matchups.items())
+                      for matchup in matchups]
+
+        # outcomes of the remaining games of every trial as packed bits (set when the first team of the matchup wins),
+        # and the playoff teams of every trial by seed with their wins, kept for the conditional odds of what-if queries
+        self.trial_outcomes = None
+        self.trial_seeds = None
+        self.trial_seed_wins = None
+
+        # team ids of the teams found to make the playoffs in every trial or in none, and the fixed seeds by team id
+        self.clinched_teams = []
+        self.eliminated_teams = []
+        self.fixed_seeds = {}
+
+        # single elimination playoff bracket, with byes for the top seeds when the number of playoff teams is not a
+        # power of two, whose games are simulated from the mean and standard deviation of the weekly scores of each team
+        self.playoff_reseeding_bool = playoff_reseeding_bool
+        self.bracket_size = 1
+        while self.bracket_size < self.playoff_slots:
+            self.bracket_size *= 2
+        self.score_means = None
+        self.score_deviations = None
+        if team_scores and all(team_scores.get(team_id) for team_id in self.team_ids):
+            all_scores = np.concatenate([np.asarray(scores, dtype=np.float64) for scores in team_scores.values()])
+            league_deviation = all_scores.std() if len(all_scores) > 1 else 0.0
+            self.score_means = np.array([np.mean(team_scores[team_id]) for team_id in self.team_ids])
+            # teams with a single week of scores get the deviation of the scores of the whole league
+            self.score_deviations = np.array([np.std(team_scores[team_id], ddof=1) if len(team_scores[team_id]) > 1
+                                              else league_deviation for team_id in self.team_ids])
+
+    def get_place_bounds(self):
+        """ Get the best and worst place every team can finish the regular season in, from its current wins with points
+        and the number of its remaining games (points are not simulated, so they only break ties of wins).
+
+        :return: tuple of (best places, worst places) arrays by team index
+        """
+        min_wins = np.array([team.get_wins_with_points() for team in self.teams.values()])
+        max_wins = min_wins.copy()
+        for week, first_team_id, second_team_id in self.games:
+            max_wins[self.team_indices[first_team_id]] += 1
+            max_wins[self.team_indices[second_team_id]] += 1
+
+        # [a, b] is set when team a finishes ahead of team b in every trial (or in some trial), with equal wins going to
+        # the team listed first like in the stable sort of the simulation
+        team_order = np.arange(len(self.team_ids))
+        listed_first = team_order[:, None] < team_order[None, :]
+        always_ahead = (min_wins[:, None] > max_wins[None, :]) | \
+            ((min_wins[:, None] == max_wins[None, :]) & listed_first)
+        possibly_ahead = (max_wins[:, None] > min_wins[None, :]) | \
+            ((max_wins[:, None] == min_wins[None, :]) & listed_first)
+        np.fill_diagonal(always_ahead, False)
+        np.fill_diagonal(possibly_ahead, False)
+
+        return 1 + always_ahead.sum(axis=0), 1 + possibly_ahead.sum(axis=0)
+
+    def simulate_batch(self, num_trials, rng, simulated_teams):
+        """ Simulate the remaining games of a batch of trials at once.
+
+        :return: tuple of ((trials x games) bool array of game outcomes, (trials x simulated teams) array of wins with
+                 points)
+        """
+        first_team_wins = np.zeros((len(self.games), len(self.team_ids)))
+        second_team_wins = np.zeros((len(self.games), len(self.team_ids)))
+        for game_index, (week, first_team_id, second_team_id) in enumerate(self.games):
+            first_team_wins[game_index, self.team_indices[first_team_id]] = 1
+            second_team_wins[game_index, self.team_indices[second_team_id]] = 1
+        first_team_wins = first_team_wins[:, simulated_teams]
+        second_team_wins = second_team_wins[:, simulated_teams]
+
+        # create random binary results representing the rest of the matchups and add them to the existing wins
+        outcomes = rng.integers(0, 2, size=(num_trials, len(self.games)), dtype=np.uint8).astype(bool)
+        wins = np.array([team.get_wins_with_points() for team in self.teams.values()])[simulated_teams] + \
+            second_team_wins.sum(axis=0) + outcomes @ (first_team_wins - second_team_wins)
+        return outcomes, wins
+
+    def get_bracket_stages(self):
+        """ Get the names of the rounds of the playoff bracket, followed by the championship.
+        """
+        stages = []
+        num_teams = self.bracket_size
+        while num_teams > 1:
+            if num_teams == 2:
+                stages.append("Final")
+            elif num_teams == 4:
+                stages.append("Semifinal")
+            elif num_teams == 8:
+                stages.append("Quarterfinal")
+            else:
+                stages.append("Round of %d" % num_teams)
+            num_teams //= 2
+        # every playoff team is in the first round, including the teams with byes
+        if stages and self.bracket_size > self.playoff_slots:
+            stages[0] = "Playoffs"
+        return stages + ["Champion"]
+
+    def simulate_bracket(self, seeds, rng):
+        """ Simulate the playoff bracket of a batch of trials at once, from the playoff teams of every trial by seed.
+
+        :return: list of (trials x teams) arrays of the teams in each round of the bracket by team index (-1 for byes),
+                 followed by the (trials x 1) array of the champions
+        """
+        num_trials = len(seeds)
+
+        # seeds in bracket order, where the first round pairs seed s with seed (bracket size + 1 - s), and seeds past
+        # the playoff teams are byes (0)
+        bracket_order = [1]
+        while len(bracket_order) < self.bracket_size:
+            bracket_order = [seed for top_seed in bracket_order for seed in
+                             (top_seed, 2 * len(bracket_order) + 1 - top_seed)]
+        bracket = np.tile(np.array([seed if seed <= self.playoff_slots else 0 for seed in bracket_order]),
+                          (num_trials, 1))
+
+        stage_teams = []
+        while bracket.shape[1] > 1:
+            stage_teams.append(
+                np.where(bracket > 0, np.take_along_axis(seeds, np.maximum(bracket, 1) - 1, axis=1), -1))
+
+            if self.playoff_reseeding_bool and len(stage_teams) > 1:
+                # the best remaining seed plays the worst remaining seed
+                bracket = np.sort(bracket, axis=1)
+                num_games = bracket.shape[1] // 2
+                bracket = np.stack([bracket[:, :num_games], bracket[:, :num_games - 1:-1]], axis=2).reshape(
+                    num_trials, -1)
+
+            first_seeds = bracket[:, 0::2]
+            second_seeds = bracket[:, 1::2]
+            first_teams = np.take_along_axis(seeds, np.maximum(first_seeds, 1) - 1, axis=1)
+            second_teams = np.take_along_axis(seeds, np.maximum(second_seeds, 1) - 1, axis=1)
+            first_scores = rng.normal(self.score_means[first_teams], self.score_deviations[first_teams])
+            second_scores = rng.normal(self.score_means[second_teams], self.score_deviations[second_teams])
+            bracket = np.where((second_seeds == 0) | (first_scores > second_scores), first_seeds, second_seeds)
+
+        stage_teams.append(np.take_along_axis(seeds, bracket - 1, axis=1))
+        return stage_teams
 
     def calculate(self, chosen_week):
 
@@ -25,61 +167,92 @@ class PlayoffProbabilities(object):
 
             begin = datetime.datetime.now()
 
-            team_data = {}
+            rng = np.random.default_rng()
+            num_teams = len(self.team_ids)
+
+            # teams that make the playoffs in every trial (and teams whose seed is the same in every trial) or in none
+            # are found before the simulations, so that eliminated teams are not simulated and teams with a fixed seed
+            # are not ranked
+            best_places, worst_places = self.get_place_bounds()
+            self.clinched_teams = [self.team_ids[team] for team in np.flatnonzero(worst_places <= self.playoff_slots)]
+            self.eliminated_teams = [self.team_ids[team] for team in np.flatnonzero(best_places > self.playoff_slots)]
+            self.fixed_seeds = {self.team_ids[team]: int(best_places[team]) for team in np.flatnonzero(
+                (best_places == worst_places) & (best_places <= self.playoff_slots))}
+            simulated_teams = np.flatnonzero(best_places <= self.playoff_slots)
+            ranked_teams = np.array([team for team in simulated_teams if self.team_ids[team] not in self.fixed_seeds],
+                                    dtype=np.int64)
+            # columns of the simulated wins of every team (-1 for eliminated teams)
+            simulated_columns = np.full(num_teams, -1)
+            simulated_columns[simulated_teams] = np.arange(len(simulated_teams))
+            # the ranked teams take the seeds that are not fixed, in order
+            fixed_seed_places = np.array(sorted(self.fixed_seeds.values()), dtype=np.int64) - 1
+            fixed_seed_teams = np.array([self.team_indices[team_id] for team_id in sorted(
+                self.fixed_seeds, key=self.fixed_seeds.get)], dtype=np.int64)
+            open_seed_places = np.array([place for place in range(self.playoff_slots)
+                                         if place not in fixed_seed_places], dtype=np.int64)
+            print("...%d team(s) clinched (%d with a fixed seed) and %d team(s) eliminated before the simulations" % (
+                len(self.clinched_teams), len(self.fixed_seeds), len(self.eliminated_teams)))
+
+            num_wins_that_made_playoffs = np.zeros(self.num_weeks + 1, dtype=np.int64)
+            num_wins_that_missed_playoffs = np.zeros(self.num_weeks + 1, dtype=np.int64)
+            avg_wins = np.zeros(self.playoff_slots)
+            seed_counts = np.zeros((num_teams, self.playoff_slots), dtype=np.int64)
+            # the playoff bracket is only simulated with the weekly scores of the teams
+            simulate_bracket_bool = self.score_means is not None
+            stage_counts = np.zeros((num_teams, len(self.get_bracket_stages())), dtype=np.int64)
+            trial_outcomes, trial_seeds, trial_seed_wins = [], [], []
+
+            sim_count = 0
+            while sim_count < self.simulations:
+                num_trials = min(TRIALS_PER_BATCH, self.simulations - sim_count)
+                outcomes, wins = self.simulate_batch(num_trials, rng, simulated_teams)
+
+                # sort the ranked teams of every trial (ties keep the order of the teams, like a stable sort)
+                sorted_teams = ranked_teams[
+                    np.argsort(-wins[:, simulated_columns[ranked_teams]], axis=1, kind="stable")]
+                seeds = np.empty((num_trials, self.playoff_slots), dtype=np.int64)
+                seeds[:, fixed_seed_places] = fixed_seed_teams
+                seeds[:, open_seed_places] = sorted_teams[:, :len(open_seed_places)]
+                seed_wins = np.rint(np.take_along_axis(wins, simulated_columns[seeds], axis=1)).astype(np.int64)
+
+                np.add.at(num_wins_that_made_playoffs, np.clip(seed_wins[:, -1], 0, self.num_weeks), 1)
+                # the first team to miss the playoffs is the best ranked team without a seed (eliminated teams are not
+                # simulated)
+                if len(ranked_teams) > len(open_seed_places):
+                    missed_wins = np.rint(wins[np.arange(num_trials),
+                                               simulated_columns[sorted_teams[:, len(open_seed_places)]]])
+                    np.add.at(num_wins_that_missed_playoffs,
+                              np.clip(missed_wins.astype(np.int64), 0, self.num_weeks), 1)
 
-            num_wins_that_made_playoffs = [0] * self.num_weeks
-            num_wins_that_missed_playoffs = [0] * self.num_weeks
-            avg_wins = [0.0] * self.playoff_slots
+                # pick the teams making the playoffs
+                np.add.at(seed_counts, (seeds, np.arange(self.playoff_slots)), 1)
+                avg_wins += seed_wins.sum(axis=0)
 
-            sim_count = 1
-            while sim_count <= self.simulations:
+                # play the playoff bracket of every trial
+                if simulate_bracket_bool:
+                    for stage, teams in enumerate(self.simulate_bracket(seeds, rng)):
+                        np.add.at(stage_counts[:, stage], teams[teams >= 0], 1)
 
-                temp_teams = copy.deepcopy(self.teams)
+                if self.keep_trials_bool:
+                    trial_outcomes.append(np.packbits(outcomes, axis=1))
+                    trial_seeds.append(seeds.astype(np.int16))
+                    trial_seed_wins.append(seed_wins.astype(np.int16))
 
-                # create random binary results representing the rest of the matchups and add them to the existing wins
-                for week, matchups in self.matchups.items():
-                    for matchup in matchups:
-                        result = int(random.getrandbits(1))
-                        if result == 1:
-                            temp_teams[matchup[0]].add_win()
-                        else:
-                            temp_teams[matchup[1]].add_win()
+                sim_count += num_trials
 
-                # sort the teams
-                sorted_teams = sorted(temp_teams.values(), key=lambda x: x.get_wins_with_points(), reverse=True)
+            for team_index, team_id in enumerate(self.team_ids):
+                self.teams[team_id].add_playoff_tally(int(seed_counts[team_index].sum()))
+                for place, count in enumerate(seed_counts[team_index], start=1):
+                    self.teams[team_id].add_playoff_stats(place, int(count))
 
-                num_wins_that_made_playoffs[int(round(sorted_teams[self.playoff_slots - 1].get_wins_with_points(), 0)) - 1] += 1
-                num_wins_that_missed_playoffs[int(round(sorted_teams[self.playoff_slots].get_wins_with_points(), 0)) - 1] += 1
+            if self.keep_trials_bool:
+                self.trial_outcomes = np.concatenate(trial_outcomes)
+                self.trial_seeds = np.concatenate(trial_seeds)
+                self.trial_seed_wins = np.concatenate(trial_seed_wins)
 
-                # pick the teams making the playoffs
-                playoff_count = 1
-                while playoff_count <= self.playoff_slots:
-                    self.teams[sorted_teams[playoff_count - 1].get_id()].add_playoff_tally()
-                    avg_wins[playoff_count - 1] += round(sorted_teams[playoff_count - 1].get_wins_with_points(), 0)
-                    self.teams[sorted_teams[playoff_count - 1].get_id()].add_playoff_stats(playoff_count)
-                    playoff_count += 1
-
-                sim_count += 1
-
-            for team in self.teams.values():
-                # print(
-                #     team.get_name() + "\t" +
-                #     str(team.get_playoff_tally()) + "\t" +
-                #     "\t".join([str(stat) for stat in team.get_playoff_stats()])
-                # )
-
-                playoff_min_wins = round((avg_wins[self.playoff_slots - 1]) / self.simulations, 2)
-                if playoff_min_wins > team.get_wins():
-                    needed_wins = np.rint(playoff_min_wins - team.get_wins())
-                else:
-                    needed_wins = 0
-
-                team_data[int(team.get_id())] = [
-                    team.get_name(),
-                    team.get_playoff_tally(),
-                    team.get_playoff_stats(),
-                    needed_wins
-                ]
+            team_data = self.get_team_data(seed_counts, self.simulations,
+                                           round((avg_wins[self.playoff_slots - 1]) / self.simulations, 2),
+                                           stage_counts if simulate_bracket_bool else None)
 
             # print()
             # print("Average # of wins for playoff spot")
@@ -91,12 +264,12 @@ class PlayoffProbabilities(object):
             # print()
             # print("Histogram of wins required for final playoff spot")
             # playoffs_made_count = 1
-            # while playoffs_made_count <= len(num_wins_that_made_playoffs):
+            # while playoffs_made_count < len(num_wins_that_made_playoffs):
             #     print(
             #         str(playoffs_made_count) + "\t" +
-            #         str(round(((num_wins_that_made_playoffs[playoffs_made_count - 1]) /
+            #         str(round(((num_wins_that_made_playoffs[playoffs_made_count]) /
             #                    (self.simulations * 1.0)) * 100, 3)) + "\t" +
-            #         str(round(((num_wins_that_missed_playoffs[playoffs_made_count - 1]) /
+            #         str(round(((num_wins_that_missed_playoffs[playoffs_made_count]) /
             #                      (self.simulations * 1.0)) * 100, 3))
             #     )
             #     playoffs_made_count += 1
@@ -108,6 +281,123 @@ class PlayoffProbabilities(object):
         else:
             return None
 
+    def get_team_data(self, seed_counts, num_trials, playoff_min_wins, stage_counts=None):
+        """ Get the playoff odds of every team from the number of trials in which it got each playoff seed (and in which
+        it reached each stage of the playoff bracket).
+
+        :return: dict of [name, playoff odds, odds of each seed, needed wins] by team id, followed by the odds of each
+                 bracket stage when the bracket was simulated
+        """
+        team_data = {}
+        for team_index, team_id in enumerate(self.team_ids):
+            team = self.teams[team_id]
+
+            # a team that has clinched a playoff spot needs no more wins
+            if team_id in self.clinched_teams:
+                needed_wins = 0
+            elif playoff_min_wins > team.get_wins():
+                needed_wins = np.rint(playoff_min_wins - team.get_wins())
+            else:
+                needed_wins = 0
+
+            team_data[int(team_id)] = [
+                team.get_name(),
+                round(float(seed_counts[team_index].sum() / num_trials) * 100.0, 2),
+                [round(float(count / num_trials) * 100.0, 2) for count in seed_counts[team_index]],
+                needed_wins
+            ]
+            if stage_counts is not None:
+                team_data[int(team_id)].append(
+                    [round(float(count / num_trials) * 100.0, 2) for count in stage_counts[team_index]])
+        return team_data
+
+    def get_game_index(self, week, team_id):
+        """ Get the index of the remaining game of a team in a week, and whether the team is the first team of it.
+        """
+        for game_index, (game_week, first_team_id, second_team_id) in enumerate(self.games):
+            if int(game_week) == int(week) and team_id in [first_team_id, second_team_id]:
+                return game_index, team_id == first_team_id
+        raise ValueError("Team {} has no remaining game in week {}.".format(team_id, week))
+
+    def get_trial_mask(self, results):
+        """ Select the stored trials in which every given game result happened.
+
+        :param results: iterable of (week, winning team id) of remaining games
+        :return: bool array of the selected trials
+        """
+        if self.trial_outcomes is None:
+            raise ValueError("The trials of the playoff simulations were not kept.")
+
+        mask = np.ones(len(self.trial_seeds), dtype=bool)
+        for week, winning_team_id in results:
+            game_index, first_team_bool = self.get_game_index(week, winning_team_id)
+            first_team_won = (self.trial_outcomes[:, game_index >> 3] >> (7 - (game_index & 7))) & 1
+            mask &= first_team_won == int(first_team_bool)
+        return mask
+
+    def calculate_conditional(self, results):
+        """ Get the playoff odds of every team given the results of some remaining games, from the stored trials in
+        which they happened instead of from new simulations.
+
+        :param results: iterable of (week, winning team id) of remaining games
+        :return: tuple of (dict of [name, playoff odds, odds of each seed, needed wins] by team id, number of trials)
+        """
+        mask = self.get_trial_mask(results)
+        num_trials = int(mask.sum())
+        if num_trials == 0:
+            raise ValueError("None of the simulated trials has all of the given results.")
+
+        seed_counts = np.zeros((len(self.team_ids), self.playoff_slots), dtype=np.int64)
+        np.add.at(seed_counts, (self.trial_seeds[mask], np.arange(self.playoff_slots)), 1)
+        playoff_min_wins = round(float(self.trial_seed_wins[mask, self.playoff_slots - 1].mean()), 2)
+        return self.get_team_data(seed_counts, num_trials, playoff_min_wins), num_trials
+
+    def get_leverage_table(self, week=None):
+        """ Get the playoff odds of both teams of every remaining game (or of the games of one week) when they win and
+        when they lose it, for all games at once from the stored trials.
+
+        :return: list of [week, team id, opponent team id, playoff odds, odds with a win, odds with a loss] rows, one
+                 for each team of each game (odds with a result that happened in no trial are None)
+        """
+        if self.trial_outcomes is None:
+            raise ValueError("The trials of the playoff simulations were not kept.")
+
+        game_indices = [game_index for game_index, game in enumerate(self.games)
+                        if week is None or int(game[0]) == int(week)]
+        num_trials = len(self.trial_seeds)
+
+        # (trials x games) outcomes of the selected games and (trials x teams) playoff teams of every trial
+        outcomes = np.unpackbits(self.trial_outcomes, axis=1, count=len(self.games))[:, game_indices].astype(np.float64)
+        made_playoffs = np.zeros((num_trials, len(self.team_ids)))
+        made_playoffs[np.arange(num_trials)[:, None], self.trial_seeds] = 1
+
+        # number of trials in which each team made the playoffs when the first (or second) team won each game
+        first_team_won_playoffs = outcomes.T @ made_playoffs
+        second_team_won_playoffs = made_playoffs.sum(axis=0) - first_team_won_playoffs
+        num_first_team_won = outcomes.sum(axis=0)
+        num_second_team_won = num_trials - num_first_team_won
+
+        def get_odds(num_made_playoffs, num_results):
+            return round(float(num_made_playoffs / num_results) * 100.0, 2) if num_results else None
+
+        leverage_table = []
+        for column, game_index in enumerate(game_indices):
+            game_week, first_team_id, second_team_id = self.games[game_index]
+            for team_id, opponent_team_id, first_team_bool in [(first_team_id, second_team_id, True),
+                                                               (second_team_id, first_team_id, False)]:
+                team_index = self.team_indices[team_id]
+                first_team_odds = get_odds(first_team_won_playoffs[column, team_index], num_first_team_won[column])
+                second_team_odds = get_odds(second_team_won_playoffs[column, team_index], num_second_team_won[column])
+                leverage_table.append([
+                    game_week,
+                    team_id,
+                    opponent_team_id,
+                    round(float(made_playoffs[:, team_index].sum() / num_trials) * 100.0, 2),
+                    first_team_odds if first_team_bool else second_team_odds,
+                    second_team_odds if first_team_bool else first_team_odds
+                ])
+        return leverage_table
+
 
 class Team(object):
 
@@ -132,11 +422,11 @@ class Team(object):
     def add_win(self):
         self.wins_with_points += 1
 
-    def add_playoff_tally(self):
-        self.playoff_tally += 1
+    def add_playoff_tally(self, count=1):
+        self.playoff_tally += count
 
-    def add_playoff_stats(self, place):
-        self.playoff_stats[place - 1] += 1
+    def add_playoff_stats(self, place, count=1):
+        self.playoff_stats[place - 1] += count
 
     def get_id(self):
         return self.team_id
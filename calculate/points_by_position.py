@@ -1,3 +1,5 @@
+import numpy as np
+
 from calculate.coaching_efficiency import CoachingEfficiency
 
 
@@ -12,6 +14,9 @@ class PointsByPosition(object):
         }
         self.coaching_efficiency_dq_dict = {}
 
+        # roster settings do not change during the season, so coaching efficiency is set up only once
+        self.coaching_efficiency = CoachingEfficiency(roster_settings)
+
     @staticmethod
     def get_starting_players(players):
         return [p for p in players if p["selected_position"] != "BN"]
@@ -28,27 +33,8 @@ class PointsByPosition(object):
 
         return total_points_by_position
 
-    @staticmethod
-    def calculate_points_by_position_season_averages(season_average_points_by_position_dict, report_info_dict):
-
-        for team in list(season_average_points_by_position_dict.keys()):
-            points_by_position = season_average_points_by_position_dict.get(team)
-            season_average_points_by_position = {}
-            for week in points_by_position:
-                for position in week:
-                    position_points = season_average_points_by_position.get(position[0])
-                    if position_points:
-                        season_average_points_by_position[position[0]] = position_points + position[1]
-                    else:
-                        season_average_points_by_position[position[0]] = position[1]
-            season_average_points_by_position_list = []
-            for position in list(season_average_points_by_position.keys()):
-                season_average_points_by_position_list.append(
-                    [position, season_average_points_by_position.get(position) / len(points_by_position)])
-            season_average_points_by_position_list = sorted(season_average_points_by_position_list, key=lambda x: x[0])
-            season_average_points_by_position_dict[team] = season_average_points_by_position_list
-
-        report_info_dict["season_average_points_by_position"] = season_average_points_by_position_dict
+    def get_positions(self):
+        return sorted([slot for slot, count in self.roster_slots.items() if slot not in ["BN", "FLEX"] and count > 0])
 
     def execute_points_by_position(self, team_info):
 
@@ -57,24 +43,23 @@ class PointsByPosition(object):
         player_points_by_position = []
         starting_players = self.get_starting_players(players)
         for slot in list(self.roster_slots.keys()):
-            if slot != "BN" and slot != "FLEX":
+            # roster slots that cannot hold any players have no points
+            if slot != "BN" and slot != "FLEX" and self.roster_slots.get(slot):
                 player_points_by_position.append([slot, self.get_points_for_position(starting_players, slot)])
 
         player_points_by_position = sorted(player_points_by_position, key=lambda x: x[0])
         return player_points_by_position
 
-    def get_weekly_points_by_position(self, dq_ce_bool, config, week, roster, active_slots, team_results_dict):
+    def get_weekly_points_by_position(self, dq_ce_bool, config, week, active_slots, team_results_dict):
 
-        coaching_efficiency = CoachingEfficiency(roster)
+        coaching_efficiency = self.coaching_efficiency
+        coaching_efficiency.coaching_efficiency_dq_dict = {}
         weekly_points_by_position_data = []
 
         for team_name in team_results_dict:
             team_info = team_results_dict[team_name]
             team_info["coaching_efficiency"] = coaching_efficiency.execute_coaching_efficiency(
                 team_name, team_info, int(week), active_slots, disqualification_eligible=dq_ce_bool)
-            for slot in list(roster["slots"].keys()):
-                if roster["slots"].get(slot) == 0:
-                    del roster["slots"][slot]
             player_points_by_position = self.execute_points_by_position(team_info)
             weekly_points_by_position_data.append([team_name, player_points_by_position])
 
@@ -90,3 +75,29 @@ class PointsByPosition(object):
                     team_results_dict.get(team)["coaching_efficiency"] = 0.0
 
         return weekly_points_by_position_data
+
+
+class SeasonPointsByPosition(object):
+    """Running (teams x positions) totals of points by position, updated once per week for the season averages.
+    """
+
+    def __init__(self, team_names, positions):
+        self.team_index = {team_name: index for index, team_name in enumerate(team_names)}
+        self.positions = list(positions)
+        self.position_index = {position: index for index, position in enumerate(self.positions)}
+        self.season_totals = np.zeros((len(self.team_index), len(self.positions)))
+        self.num_weeks = 0
+
+    def add_week(self, weekly_points_by_position_data):
+        for team_name, player_points_by_position in weekly_points_by_position_data:
+            team_totals = self.season_totals[self.team_index[team_name]]
+            for position, points in player_points_by_position:
+                team_totals[self.position_index[position]] += points
+        self.num_weeks += 1
+
+    def get_season_averages(self):
+        return self.season_totals / max(self.num_weeks, 1)
+
+    def get_team_season_averages(self, team_name):
+        return [[position, points] for position, points in zip(
+            self.positions, self.season_totals[self.team_index[team_name]] / max(self.num_weeks, 1))]
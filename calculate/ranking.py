@@ -0,0 +1,66 @@
+import collections
+
+import numpy as np
+
+# order: team indices in ranked order
+# places: place of each ranked team (dense, so tied teams share a place and the next team takes the following place)
+# tied: whether each ranked team shares its place with at least one other team
+# group_sizes: number of teams sharing each distinct place
+# num_ties: number of tied team pairs across all places
+# num_tied_for_first: number of teams sharing first place
+Ranking = collections.namedtuple("Ranking",
+                                 ["order", "places", "tied", "group_sizes", "num_ties", "num_tied_for_first"])
+
+
+def rank_values(values, tiebreaks=None, ascending=False, decimals=None, break_ties_bool=False):
+    """Rank a metric column with one stable sort and find ties with run-length encoding.
+
+    :param values: metric value for each team (None or NaN for teams without a value, which are ranked last)
+    :param tiebreaks: list of value columns used (in order) to order teams whose metric values are tied
+    :param ascending: rank the lowest metric value first instead of the highest
+    :param decimals: number of decimals metric values are rounded to before checking for ties (None for exact)
+    :param break_ties_bool: give every team its own place using the tiebreak columns instead of sharing places
+    :return: Ranking of the given values
+    """
+    values = np.array([np.nan if value is None else value for value in values], dtype=float)
+    tie_values = values if decimals is None else np.round(values, decimals)
+    direction = 1 if ascending else -1
+
+    # np.lexsort is stable and sorts by its last key first
+    keys = [direction * np.asarray(tiebreak, dtype=float) for tiebreak in reversed(tiebreaks or [])]
+    keys.append(direction * tie_values)
+    order = np.lexsort(keys)
+
+    num_values = len(order)
+    if num_values == 0:
+        return Ranking(order, order, np.zeros(0, dtype=bool), order, 0, 0)
+
+    # run-length encode the sorted metric values, treating missing values as equal to each other
+    ranked_values = tie_values[order]
+    group_starts = np.ones(num_values, dtype=bool)
+    group_starts[1:] = ~((ranked_values[1:] == ranked_values[:-1]) |
+                         (np.isnan(ranked_values[1:]) & np.isnan(ranked_values[:-1])))
+    group_ids = np.cumsum(group_starts) - 1
+    group_sizes = np.diff(np.append(np.flatnonzero(group_starts), num_values))
+
+    if break_ties_bool:
+        places = np.arange(1, num_values + 1)
+        tied = np.zeros(num_values, dtype=bool)
+    else:
+        places = group_ids + 1
+        tied = group_sizes[group_ids] > 1
+
+    return Ranking(
+        order=order,
+        places=places,
+        tied=tied,
+        group_sizes=group_sizes,
+        num_ties=int(np.sum(group_sizes * (group_sizes - 1) // 2)),
+        num_tied_for_first=int(group_sizes[0])
+    )
+
+
+def name_codes(names):
+    """Convert team names to integer codes that sort the same way, for use as a final tiebreak column.
+    """
+    return np.unique(np.array(names, dtype=str), return_inverse=True)[1]
@@ -1,6 +1,6 @@
 import numpy as np
 
-from calculate.metrics import CalculateMetrics
+from calculate.ranking import rank_values
 
 
 class SeasonAverageCalculator(object):
@@ -10,46 +10,30 @@ class SeasonAverageCalculator(object):
 
     def get_average(self, data, key, with_percent_bool, bench_column_bool=True, reverse_bool=True):
 
-        season_average_list = []
-        team_index = 0
-        for team in data:
-            team_name = self.team_names[team_index]
-            # season_average_value = "{0:.2f}".format(sum([float(week[1]) for week in team]) / float(len(team)))
+        # numeric season averages of the (weeks x teams) data, indexed the same way as self.team_names, skipping
+        # missing or masked (NaN) weeks
+        num_valid_weeks = np.sum(~np.isnan(data), axis=0)
+        season_averages = np.where(num_valid_weeks > 0, np.nansum(data, axis=0) / np.maximum(num_valid_weeks, 1), 0.0)
 
-            valid_values = [value[1] for value in team if value[1] is not None]
-            average = np.mean(valid_values)
-            season_average_value = "{0:.2f}".format(average)
+        ranking = rank_values(season_averages, ascending=not reverse_bool, decimals=2)
+        season_average_places = np.empty(len(season_averages), dtype=int)
+        season_average_places[ranking.order] = ranking.places
 
-            season_average_list.append([team_name, season_average_value])
-            team_index += 1
-        ordered_average_values = sorted(season_average_list, key=lambda x: float(x[1]), reverse=reverse_bool)
-        index = 0
-        for team in ordered_average_values:
-            ordered_average_values[ordered_average_values.index(team)] = [index, team[0], team[1]]
-            index += 1
-
-        ordered_average_values = CalculateMetrics(None, None, None).resolve_season_average_ties(ordered_average_values,
-                                                                                                with_percent_bool)
+        # only format the season averages once they have been ranked
+        season_average_values = {}
+        for team_name, season_average, place in zip(self.team_names, season_averages, season_average_places):
+            season_average_value = "{0:.2f}{1}".format(season_average, "%" if with_percent_bool else "")
+            if key != "zscore_results_data":
+                season_average_value += " ({0})".format(place)
+            season_average_values[team_name] = season_average_value
 
+        # join the season averages to the rows of the weekly results table by team name
         ordered_season_average_list = []
         for ordered_team in self.report_info_dict.get(key):
-            for team in ordered_average_values:
-                if ordered_team[1] == team[1]:
-                    if with_percent_bool:
-                        ordered_team[3] = "{0:.2f}%".format(float(str(ordered_team[3]).replace("%", ""))) if \
-                            ordered_team[3] != "DQ" else "DQ"
-                        ordered_team.append(str(team[2]))
-
-                    elif bench_column_bool:
-                        ordered_team[3] = "{0:.2f}".format(float(str(ordered_team[3])))
-                        ordered_team.insert(-1, str(team[2]))
-
-                    else:
-                        value = "{0}".format(str(team[2]))
-                        if key == "zscore_results_data":
-                            value = value.split(" ")[0]
-                        ordered_team.append(value)
-
-                    ordered_season_average_list.append(ordered_team)
+            if bench_column_bool and not with_percent_bool:
+                ordered_team.insert(-1, season_average_values[ordered_team[1]])
+            else:
+                ordered_team.append(season_average_values[ordered_team[1]])
+            ordered_season_average_list.append(ordered_team)
 
         return ordered_season_average_list
@@ -0,0 +1,291 @@
+from calculate.breakdown import Breakdown
+from calculate.metrics import CalculateMetrics
+from calculate.playoff_probabilities import PlayoffProbabilities
+from calculate.points_by_position import PointsByPosition
+from calculate.power_ranking import PowerRanking
+from calculate.z_score import ZScore
+from utils.stage_profiler import profiler
+
+
+class SeasonContext(object):
+    """League data that does not change from week to week, built once per report, and the per-week kernel that
+    calculates only the week-dependent metrics.
+    """
+
+    def __init__(self,
+                 config,
+                 league_id,
+                 league_standings_data,
+                 roster,
+                 league_roster_active_slots,
+                 remaining_matchups_data,
+                 playoff_slots,
+                 num_regular_season_weeks,
+                 chosen_week,
+                 playoff_reseeding_bool=False,
+                 dq_ce_bool=False,
+                 break_ties_bool=False,
+                 test_bool=False):
+
+        self.config = config
+        self.league_id = league_id
+        self.league_standings_data = league_standings_data
+        self.league_roster_active_slots = league_roster_active_slots
+        self.playoff_slots = playoff_slots
+        self.num_regular_season_weeks = num_regular_season_weeks
+        self.chosen_week = chosen_week
+        self.playoff_reseeding_bool = playoff_reseeding_bool
+        self.dq_ce_bool = dq_ce_bool
+        self.break_ties_bool = break_ties_bool
+        self.test_bool = test_bool
+
+        # remove roster slots that cannot hold any players
+        for slot in list(roster["slots"].keys()):
+            if roster["slots"].get(slot) == 0:
+                del roster["slots"][slot]
+        self.roster = roster
+
+        # get current standings
+        standings_metrics = CalculateMetrics(self.config, self.league_id, self.playoff_slots)
+        self.current_standings_data = standings_metrics.get_standings(self.league_standings_data)
+        self.teams_info = standings_metrics.teams_info
+
+        # remaining matchups for the playoff probabilities simulation
+        self.remaining_matchups = {
+            week: [
+                (matchup["teams"]["team"][0]["team_id"], matchup["teams"]["team"][1]["team_id"]) for matchup in matchups
+            ] for week, matchups in remaining_matchups_data.items()
+        }
+        self.playoff_probs = None
+        self.playoff_probs_data = None
+        self.playoff_leverage_data = None
+        self.championship_probs_data = None
+
+        # calculates coaching efficiency and points by position for every week
+        self.points_by_position = PointsByPosition(self.roster, self.chosen_week)
+
+    def get_playoff_probs_data(self, weekly_team_info=None):
+        """Run the playoff probabilities simulation (only once) and create the playoff probabilities data for table.
+        The playoff bracket is simulated from the weekly scores of the teams when the weekly team results are given.
+        """
+        if self.playoff_probs_data is None:
+            team_scores = {}
+            for team_results_dict in weekly_team_info or []:
+                for team_results in team_results_dict.values():
+                    team_scores.setdefault(team_results["team_id"], []).append(float(team_results["score"]))
+
+            # the outcomes of every trial are kept for the playoff odds of each result of the remaining games
+            self.playoff_probs = PlayoffProbabilities(
+                self.config.getint("Fantasy_Football_Report_Settings", "num_playoff_simulations"),
+                self.num_regular_season_weeks,
+                self.chosen_week,
+                self.playoff_slots,
+                self.teams_info,
+                self.remaining_matchups,
+                keep_trials_bool=True,
+                team_scores=team_scores,
+                playoff_reseeding_bool=self.playoff_reseeding_bool
+            )
+
+            with profiler.stage("playoff_probabilities"):
+                team_playoff_probs_data = self.playoff_probs.calculate(self.chosen_week)
+
+            self.playoff_probs_data = CalculateMetrics.get_playoff_probs_data(
+                self.league_standings_data,
+                team_playoff_probs_data
+            )
+
+            # odds of every team to reach each round of the playoff bracket and to win the championship
+            self.championship_probs_data = []
+            if team_scores:
+                for team_id, team_data in team_playoff_probs_data.items():
+                    team = self.teams_info[str(team_id)]
+                    self.championship_probs_data.append([team.get_name(), team.get_manager()] + team_data[4])
+                self.championship_probs_data.sort(key=lambda x: x[2:][::-1], reverse=True)
+                for team in self.championship_probs_data:
+                    team[2:] = ["%.2f%%" % odds for odds in team[2:]]
+
+        return self.playoff_probs_data
+
+    def get_playoff_leverage_data(self):
+        """Create the playoff leverage data for table: the playoff odds of every team with a win and with a loss in its
+        matchup of the next week, from the trials of the playoff probabilities simulation.
+        """
+        if self.playoff_leverage_data is None:
+            self.get_playoff_probs_data()
+
+            self.playoff_leverage_data = []
+            if self.remaining_matchups:
+                with profiler.stage("playoff_leverage"):
+                    leverage_table = self.playoff_probs.get_leverage_table(min(self.remaining_matchups))
+
+                for week, team_id, opponent_team_id, playoff_odds, win_odds, loss_odds in leverage_table:
+                    team = self.teams_info[team_id]
+                    self.playoff_leverage_data.append([
+                        team.get_name(),
+                        team.get_manager(),
+                        self.teams_info[opponent_team_id].get_name(),
+                        playoff_odds,
+                        win_odds,
+                        loss_odds,
+                        (win_odds if win_odds is not None else playoff_odds) -
+                        (loss_odds if loss_odds is not None else playoff_odds)
+                    ])
+
+                # teams with the most at stake first
+                self.playoff_leverage_data.sort(key=lambda x: x[6], reverse=True)
+                for team in self.playoff_leverage_data:
+                    team[3:6] = ["%.2f%%" % odds if odds is not None else "N/A" for odds in team[3:6]]
+                    team[6] = "%+.2f%%" % team[6]
+
+        return self.playoff_leverage_data
+
+    def calculate_week_metrics(self, weekly_team_info, team_results_dict, matchups_list, week):
+
+        calc_metrics = CalculateMetrics(self.config, self.league_id, self.playoff_slots)
+
+        # calculate coaching efficiency metric and add values to team_results_dict, and get points by position
+        points_by_position = self.points_by_position
+        with profiler.stage("coaching_efficiency"):
+            weekly_points_by_position_data = \
+                points_by_position.get_weekly_points_by_position(self.dq_ce_bool, self.config, week,
+                                                                 self.league_roster_active_slots, team_results_dict)
+
+        # calculate luck metric and add values to team_results_dict
+        with profiler.stage("breakdown"):
+            breakdown = Breakdown()
+            breakdown_results = breakdown.execute_breakdown(team_results_dict, matchups_list)
+
+        # yes, this is kind of redundent but its clearer that the individual metrics
+        # are _not_ supposed to be modifying the things passed into it
+        for team_id in team_results_dict:
+            team_results_dict[team_id]["luck"] = breakdown_results[team_id]["luck"] * 100
+            team_results_dict[team_id]["breakdown"] = breakdown_results[team_id]["breakdown"]
+
+        # dependent on all previous weeks scores
+        with profiler.stage("zscore"):
+            zscore = ZScore(weekly_team_info + [team_results_dict])
+            zscore_results = zscore.execute()
+
+        for team_id in team_results_dict:
+            team_results_dict[team_id]["zscore"] = zscore_results[team_id]
+
+        with profiler.stage("power_ranking"):
+            power_ranking_metric = PowerRanking()
+            power_ranking_results = power_ranking_metric.execute_power_ranking(team_results_dict)
+
+        for team_id in team_results_dict:
+            team_results_dict[team_id]["power_rank"] = power_ranking_results[team_id]["power_rank"]
+            team_results_dict[team_id]["zscore_rank"] = power_ranking_results[team_id]["zscore_rank"]
+
+        # used only for testing what happens when different metrics are tied; requires uncommenting lines in method
+        if self.test_bool:
+            calc_metrics.test_ties(team_results_dict)
+
+        # playoff probabilities are only simulated for the chosen week
+        if int(week) == int(self.chosen_week):
+            playoff_probs_data = self.get_playoff_probs_data(weekly_team_info + [team_results_dict])
+            playoff_leverage_data = self.get_playoff_leverage_data()
+            championship_probs_data = self.championship_probs_data
+            championship_probs_headers = ["Team", "Manager"] + self.playoff_probs.get_bracket_stages()
+        else:
+            playoff_probs_data = None
+            playoff_leverage_data = None
+            championship_probs_data = None
+            championship_probs_headers = None
+
+        # create ranked data for each results table (score, coaching efficiency, luck, power ranking, zscore, and bad boy)
+        # and count the number of ties for each
+        with profiler.stage("ties"):
+            score_results_data, score_ranking = calc_metrics.get_results_table(
+                team_results_dict, "score", self.break_ties_bool)
+            coaching_efficiency_results_data, coaching_efficiency_ranking = calc_metrics.get_results_table(
+                team_results_dict, "coaching_efficiency", self.break_ties_bool)
+            efficiency_dq_count = calc_metrics.coaching_efficiency_dq_count
+            luck_results_data, luck_ranking = calc_metrics.get_results_table(
+                team_results_dict, "luck", self.break_ties_bool)
+            power_ranking_results_data, power_ranking_ranking = calc_metrics.get_results_table(
+                team_results_dict, "power_rank", self.break_ties_bool)
+            zscore_results_data, zscore_ranking = calc_metrics.get_results_table(
+                team_results_dict, "zscore", self.break_ties_bool)
+            bad_boy_results_data, bad_boy_ranking = calc_metrics.get_results_table(
+                team_results_dict, "bad_boy", self.break_ties_bool)
+
+        num_tied_scores = score_ranking.num_ties
+        num_tied_coaching_efficiencies = coaching_efficiency_ranking.num_ties
+        num_tied_lucks = luck_ranking.num_ties
+        num_tied_power_rankings = power_ranking_ranking.num_ties
+        num_tied_bad_boys = bad_boy_ranking.num_ties
+
+        # broken score ties leave no teams sharing first place
+        tie_for_first_score = score_ranking.num_tied_for_first > 1 and not self.break_ties_bool
+        tie_for_first_coaching_efficiency = coaching_efficiency_ranking.num_tied_for_first > 1
+        tie_for_first_luck = luck_ranking.num_tied_for_first > 1
+        tie_for_first_power_ranking = power_ranking_ranking.num_tied_for_first > 1
+        tie_for_first_bad_boy = bad_boy_ranking.num_tied_for_first > 1
+
+        num_tied_for_first_scores = score_ranking.num_tied_for_first
+        num_tied_for_first_coaching_efficiency = coaching_efficiency_ranking.num_tied_for_first
+        num_tied_for_first_luck = luck_ranking.num_tied_for_first
+        num_tied_for_first_power_ranking = power_ranking_ranking.num_tied_for_first
+        num_tied_for_first_bad_boy = bad_boy_ranking.num_tied_for_first
+
+        # output weekly metrics info
+        print("~~~~~ WEEK {} METRICS INFO ~~~~~".format(week))
+        print("              SCORE tie(s): {}".format(num_tied_scores))
+        print("COACHING EFFICIENCY tie(s): {}".format(num_tied_coaching_efficiencies))
+        print("               LUCK tie(s): {}".format(num_tied_lucks))
+        print("      POWER RANKING tie(s): {}".format(num_tied_power_rankings))
+        print("            BAD BOY tie(s): {}".format(num_tied_bad_boys))
+        coaching_efficiency_dq_dict = points_by_position.coaching_efficiency_dq_dict
+        if coaching_efficiency_dq_dict:
+            ce_dq_str = ""
+            for team in list(coaching_efficiency_dq_dict.keys()):
+                if coaching_efficiency_dq_dict.get(team) == -1:
+                    ce_dq_str += "{} (incomplete active squad), ".format(team)
+                else:
+                    ce_dq_str += "{} (ineligible bench players: {}/{}), ".format(team,
+                                                                                 coaching_efficiency_dq_dict.get(team),
+                                                                                 self.roster.get("slots").get("BN"))
+            print("   COACHING EFFICIENCY DQs: {}\n".format(ce_dq_str[:-2]))
+        else:
+            print("")
+
+        report_info_dict = {
+            "team_results": team_results_dict,
+            "current_standings_data": self.current_standings_data,
+            "playoff_probs_data": playoff_probs_data,
+            "playoff_leverage_data": playoff_leverage_data,
+            "championship_probs_data": championship_probs_data,
+            "championship_probs_headers": championship_probs_headers,
+            "score_results_data": score_results_data,
+            "coaching_efficiency_results_data": coaching_efficiency_results_data,
+            "luck_results_data": luck_results_data,
+            "power_ranking_results_data": power_ranking_results_data,
+            "zscore_results_data": zscore_results_data,
+            "bad_boy_results_data": bad_boy_results_data,
+            "num_tied_scores": num_tied_scores,
+            "num_tied_coaching_efficiencies": num_tied_coaching_efficiencies,
+            "num_tied_lucks": num_tied_lucks,
+            "num_tied_power_rankings": num_tied_power_rankings,
+            "num_tied_bad_boys": num_tied_bad_boys,
+            "efficiency_dq_count": efficiency_dq_count,
+            "tied_scores_bool": num_tied_scores > 0,
+            "tied_coaching_efficiencies_bool": num_tied_coaching_efficiencies > 0,
+            "tied_lucks_bool": num_tied_lucks > 0,
+            "tied_power_rankings_bool": num_tied_power_rankings > 0,
+            "tied_bad_boy_bool": num_tied_bad_boys > 0,
+            "tie_for_first_score": tie_for_first_score,
+            "tie_for_first_coaching_efficiency": tie_for_first_coaching_efficiency,
+            "tie_for_first_luck": tie_for_first_luck,
+            "tie_for_first_power_ranking": tie_for_first_power_ranking,
+            "tie_for_first_bad_boy": tie_for_first_bad_boy,
+            "num_tied_for_first_scores": num_tied_for_first_scores,
+            "num_tied_for_first_coaching_efficiency": num_tied_for_first_coaching_efficiency,
+            "num_tied_for_first_luck": num_tied_for_first_luck,
+            "num_tied_for_first_power_ranking": num_tied_for_first_power_ranking,
+            "num_tied_for_first_bad_boy": num_tied_for_first_bad_boy,
+            "weekly_points_by_position_data": weekly_points_by_position_data
+        }
+
+        return report_info_dict
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class SeasonMetrics(object):
+    """Weekly team metrics for the season stored in one (weeks x teams x metrics) array.
+
+    Teams are indexed in order of their team IDs, and coaching efficiency values of 0.0 (disqualified weeks) are
+    masked out of the season averages and line charts.
+    """
+
+    metrics = ["score", "coaching_efficiency", "luck", "power_rank", "zscore"]
+
+    def __init__(self, teams_data, num_weeks):
+
+        teams_data = sorted(teams_data, key=lambda team_info: int(team_info.get("team_id")))
+
+        self.team_ids = [team.get("team_id") for team in teams_data]
+        self.team_index = {team_id: index for index, team_id in enumerate(self.team_ids)}
+        self.team_names = [team.get("name") for team in teams_data]
+        self.team_managers = [""] * len(self.team_ids)
+
+        self.metric_index = {metric: index for index, metric in enumerate(self.metrics)}
+        self.values = np.full((num_weeks, len(self.team_ids), len(self.metrics)), np.nan)
+        self.coaching_efficiency_dq_mask = np.zeros((num_weeks, len(self.team_ids)), dtype=bool)
+        self.num_weeks = 0
+
+    def add_week(self, week, team_results_dict):
+
+        week_values = self.values[int(week) - 1]
+        for team_info in team_results_dict.values():
+            team_index = self.team_index[team_info.get("team_id")]
+            self.team_managers[team_index] = team_info.get("manager")
+
+            team_values = week_values[team_index]
+            for metric, metric_index in self.metric_index.items():
+                value = team_info.get(metric)
+                team_values[metric_index] = np.nan if value is None else value
+
+        self.coaching_efficiency_dq_mask[int(week) - 1] = \
+            week_values[:, self.metric_index["coaching_efficiency"]] == 0.0
+        self.num_weeks = max(self.num_weeks, int(week))
+
+    def get_metric(self, metric, mask_dq_bool=True):
+        """Get the (weeks x teams) slice of the given metric, with missing and masked values set to NaN.
+        """
+        metric_values = self.values[:self.num_weeks, :, self.metric_index[metric]]
+        if mask_dq_bool and metric == "coaching_efficiency":
+            metric_values = np.where(self.coaching_efficiency_dq_mask[:self.num_weeks], np.nan, metric_values)
+        return metric_values
+
+    def get_line_chart_data(self, metric):
+        """Get the [week, value] points of each team's line for the given metric.
+        """
+        metric_values = self.get_metric(metric)
+        unmasked_values = self.get_metric(metric, mask_dq_bool=False)
+
+        line_chart_data = []
+        for team_index in range(len(self.team_ids)):
+            team_values = metric_values[:, team_index]
+            # teams disqualified in every week still need at least one point on the chart
+            if np.all(np.isnan(team_values)):
+                team_values = unmasked_values[:, team_index]
+            line_chart_data.append([[week + 1, float(value)] for week, value in enumerate(team_values)
+                                    if not np.isnan(value)])
+        return line_chart_data
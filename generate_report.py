@@ -1,12 +1,17 @@
 # written by Wren J.R.
 
+import datetime
 import distutils.util as distutils
 import getopt
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 
 from report.fantasy_football_report_builder import FantasyFootballReport
+from utils.memory_tracker import memory_tracker
 from utils.slack_messenger import SlackMessenger
+from utils.stage_profiler import profiler
 from utils.upload_to_google_drive import GoogleDriveUploader
 
 # local config vars
@@ -16,17 +21,19 @@ config.read("config.ini")
 
 def main(argv):
     try:
-        opts, args = getopt.getopt(argv, "hl:w:qbtds")
+        opts, args = getopt.getopt(argv, "hl:w:qbtdso:", ["profile", "cprofile", "memory"])
     except getopt.GetoptError:
         print("\nYahoo Fantasy Football report application usage:\n"
-              "     python generate_report.py -t -l <yahoo_league_id> -w <chosen_week>\n")
+              "     python generate_report.py -t -l <yahoo_league_id> -w <chosen_week> -o <pdf|html> "
+              "[--profile|--cprofile] [--memory]\n")
         sys.exit(2)
 
     options_dict = {}
     for opt, arg in opts:
         if opt == "-h":
             print("\nYahoo Fantasy Football report application usage:\n"
-                  "     python generate_report.py -t -l <yahoo_league_id> -w <chosen_week>\n")
+                  "     python generate_report.py -t -l <yahoo_league_id> -w <chosen_week> -o <pdf|html> "
+                  "[--profile|--cprofile] [--memory]\n")
             sys.exit()
         elif opt in ("-l", "--league-id"):
             options_dict["league_id"] = arg
@@ -46,6 +53,19 @@ def main(argv):
             options_dict["dev_bool"] = True
         elif opt in ("-s", "--save"):
             options_dict["save_bool"] = True
+        elif opt in ("-o", "--output-format"):
+            if arg not in ["pdf", "html"]:
+                print("\nPlease select an output format of either 'pdf' or 'html'.")
+                sys.exit(2)
+            options_dict["output_format"] = arg
+        elif opt == "--profile":
+            options_dict["profile_bool"] = True
+        elif opt == "--cprofile":
+            # stage timings together with cProfile stats of each top level stage
+            options_dict["profile_bool"] = True
+            options_dict["cprofile_bool"] = True
+        elif opt == "--memory":
+            options_dict["memory_bool"] = True
 
     return options_dict
 
@@ -118,11 +138,64 @@ def use_chosen_week_function():
         use_chosen_week_function()
 
 
+def upload_report_to_google_drive(generated_report):
+    # upload pdf to google drive
+    google_drive_uploader = GoogleDriveUploader(generated_report)
+    upload_message = google_drive_uploader.upload_file()
+    print(upload_message)
+    return upload_message
+
+
+def post_report_to_slack(generated_report):
+    slack_messenger = SlackMessenger(config)
+    # post shareable link to uploaded google drive pdf on slack
+    # print(slack_messenger.post_to_selected_slack_channel(upload_message))
+
+    # upload pdf report directly to slack
+    print(slack_messenger.upload_file_to_selected_slack_channel(generated_report))
+    print("DONE!")
+
+
+def publish_report(generated_report, test_bool):
+    """ Upload the report to google drive and/or post it to slack, as set in config.ini, at the same time.
+    """
+    upload_file_to_google_drive_bool = bool(
+        distutils.strtobool(config.get("Google_Drive_Settings", "google_drive_upload")))
+    post_to_slack_bool = bool(distutils.strtobool(config.get("Slack_Settings", "post_to_slack")))
+
+    publish_functions = []
+    if upload_file_to_google_drive_bool:
+        if not test_bool:
+            publish_functions.append(upload_report_to_google_drive)
+        else:
+            print("Test report NOT uploaded to Google Drive.")
+
+    if post_to_slack_bool:
+        if not test_bool:
+            publish_functions.append(post_report_to_slack)
+        else:
+            print("Test report NOT posted to Slack.")
+
+    if publish_functions:
+        with ThreadPoolExecutor(max_workers=len(publish_functions)) as executor:
+            publishes = [executor.submit(publish_function, generated_report) for publish_function in publish_functions]
+        # a failed destination does not stop the other one
+        for publish in publishes:
+            if publish.exception() is not None:
+                print("Publishing FAILED ({}: {}).".format(type(publish.exception()).__name__, publish.exception()))
+
+
 # RUN FANTASY FOOTBALL REPORT PROGRAM
 if __name__ == '__main__':
 
     options = main(sys.argv[1:])
 
+    if options.get("profile_bool", False):
+        profiler.enable(options.get("cprofile_bool", False))
+    if options.get("memory_bool", False):
+        # memory usage and top allocation sites at the end of each stage of the report
+        memory_tracker.enable()
+
     report_info = use_default_league_function(options.get("league_id", None),
                                               options.get("week", None),
                                               options.get("dq_ce_bool", False),
@@ -132,31 +205,21 @@ if __name__ == '__main__':
                                               options.get("save_bool", False))
     fantasy_football_report = report_info[0]
     selected_league_id = report_info[1]
-    generated_report = fantasy_football_report.create_pdf_report()
-
-    upload_file_to_google_drive_bool = bool(
-        distutils.strtobool(config.get("Google_Drive_Settings", "google_drive_upload")))
-    upload_message = ""
-    if upload_file_to_google_drive_bool:
-        if not options.get("test_bool", False):
-            # upload pdf to google drive
-            google_drive_uploader = GoogleDriveUploader(generated_report)
-            upload_message = google_drive_uploader.upload_file()
-            print(upload_message)
-        else:
-            print("Test report NOT uploaded to Google Drive.")
-
-    post_to_slack_bool = bool(distutils.strtobool(config.get("Slack_Settings", "post_to_slack")))
-
-    if post_to_slack_bool:
-        if not options.get("test_bool", False):
-            slack_messenger = SlackMessenger(config)
-            # post shareable link to uploaded google drive pdf on slack
-            # print(slack_messenger.post_to_selected_slack_channel(upload_message))
-
-            # upload pdf report directly to slack
-            print(slack_messenger.upload_file_to_selected_slack_channel(generated_report))
-            print("DONE!")
-
-        else:
-            print("Test report NOT posted to Slack.")
+    if options.get("output_format", "pdf") == "html":
+        # html and json preview of the report
+        generated_report = fantasy_football_report.create_html_report()
+    else:
+        generated_report = fantasy_football_report.create_pdf_report()
+
+    if options.get("profile_bool", False):
+        profile_dir = os.path.join(
+            config.get("Fantasy_Football_Report_Settings", "profile_directory", fallback="./profiles"),
+            "league_id-{}_week-{}_{:%Y-%m-%d_%H-%M-%S}".format(
+                selected_league_id, fantasy_football_report.chosen_week, datetime.datetime.now()))
+        profiler.print_summary()
+        print("Report stage timings written to {} (collapsed stacks for flame graphs in {}).\n".format(
+            profiler.write(profile_dir), os.path.join(profile_dir, "collapsed_stacks.txt")))
+    if options.get("memory_bool", False):
+        memory_tracker.print_report()
+
+    publish_report(generated_report, options.get("test_bool", False))
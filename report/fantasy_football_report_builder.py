@@ -4,20 +4,23 @@
 
 import collections
 import datetime
-import itertools
+import html
 import os
+import sqlite3
 import sys
 from configparser import ConfigParser
 
 from calculate.bad_boy_stats import BadBoyStats
-from calculate.breakdown import Breakdown
-from calculate.metrics import CalculateMetrics
-from calculate.playoff_probabilities import PlayoffProbabilities
-from calculate.points_by_position import PointsByPosition
-from calculate.power_ranking import PowerRanking
+from calculate.points_by_position import PointsByPosition, SeasonPointsByPosition
 from calculate.season_averages import SeasonAverageCalculator
-from calculate.z_score import ZScore
+from calculate.season_context import SeasonContext
+from calculate.season_metrics import SeasonMetrics
+from report.html.html_generator import HtmlGenerator
 from report.pdf.pdf_generator import PdfGenerator
+from utils.headshot_cache import HeadshotCache
+from utils.history_warehouse import HistoryWarehouse, get_full_league_key
+from utils.memory_tracker import memory_tracker
+from utils.stage_profiler import profiler
 from utils.yql_query import YqlQuery
 
 
@@ -29,7 +32,10 @@ class FantasyFootballReport(object):
                  break_ties_bool=False,
                  test_bool=False,
                  dev_bool=False,
-                 save_bool=False):
+                 save_bool=False,
+                 week_complete_bool=False,
+                 weekly_metrics=None,
+                 unique_test_report_bool=False):
 
         # config vars
         self.config = ConfigParser()
@@ -43,6 +49,13 @@ class FantasyFootballReport(object):
         self.break_ties_bool = break_ties_bool
 
         self.test_bool = test_bool
+        # test reports of reports run at the same time (see batch_report.py) are named after their league and week so
+        # that they do not overwrite each other
+        self.unique_test_report_bool = unique_test_report_bool
+
+        # metrics of the weeks before the chosen week kept from the previous reports of a long-running process (see
+        # report_daemon.py), by week number, so that only the new weeks are calculated
+        self.weekly_metrics = weekly_metrics if weekly_metrics is not None else {}
 
         # verification output message
         print("\nGenerating%s fantasy football report for league with id: %s on %s..." % (
@@ -56,15 +69,23 @@ class FantasyFootballReport(object):
             elif save_bool:
                 os.makedirs(self.league_test_dir)
 
+        # yahoo oauth token check
+        with profiler.stage("oauth"):
+            self.yql_query = YqlQuery(self.config, self.league_id, save_bool, dev_bool, self.league_test_dir)
+
         # run base yql queries
-        self.yql_query = YqlQuery(self.config, self.league_id, save_bool, dev_bool, self.league_test_dir)
-        self.league_key = self.yql_query.get_league_key()
-        self.league_standings_data = self.yql_query.get_league_standings_data()
-        self.league_name = self.yql_query.league_name
-        roster_data = self.yql_query.get_roster_data()
-        self.playoff_slots = self.yql_query.playoff_slots
-        self.num_regular_season_weeks = self.yql_query.num_regular_season_weeks
-        self.teams_data = self.yql_query.get_teams_data()
+        with profiler.stage("yql_league_data"):
+            self.league_key = self.yql_query.get_league_key()
+            self.league_standings_data = self.yql_query.get_league_standings_data()
+            self.league_name = self.yql_query.league_name
+            self.season = self.yql_query.season
+            self.previous_league_key = self.yql_query.previous_league_key
+            roster_data = self.yql_query.get_roster_data()
+            self.playoff_slots = self.yql_query.playoff_slots
+            self.playoff_reseeding_bool = self.yql_query.playoff_reseeding_bool
+            self.num_regular_season_weeks = self.yql_query.num_regular_season_weeks
+            self.teams_data = self.yql_query.get_teams_data()
+        memory_tracker.checkpoint("yql_league_data")
 
         roster_slots = collections.defaultdict(int)
         self.league_roster_active_slots = []
@@ -95,7 +116,15 @@ class FantasyFootballReport(object):
             "flex_positions": flex_positions
         }
 
-        self.BadBoy = BadBoyStats(dev_bool, save_bool, self.league_test_dir)
+        with profiler.stage("bad_boy_stats"):
+            self.BadBoy = BadBoyStats(self.config, dev_bool, save_bool, self.league_test_dir)
+        memory_tracker.checkpoint("bad_boy_stats")
+
+        # player headshots are downloaded in the background into a cache shared by all weeks and leagues
+        self.headshot_cache = HeadshotCache(
+            self.config.get("Fantasy_Football_Report_Settings", "headshot_cache_directory"),
+            self.config.getint("Fantasy_Football_Report_Settings", "num_headshot_download_threads"),
+            self.config.getint("Fantasy_Football_Report_Settings", "headshot_thumbnail_dpi"))
 
         # user input validation
         if user_input_chosen_week:
@@ -106,7 +135,9 @@ class FantasyFootballReport(object):
             if chosen_week == "default":
                 self.chosen_week = str(int(self.league_standings_data.loc[0, "current_week"]) - 1)
             elif 0 < int(chosen_week) < 18:
-                if 0 < int(chosen_week) <= int(self.league_standings_data.loc[0, "current_week"]) - 1:
+                # a week whose matchups are all over is complete before the league moves on to the next week
+                if week_complete_bool or \
+                        0 < int(chosen_week) <= int(self.league_standings_data.loc[0, "current_week"]) - 1:
                     self.chosen_week = chosen_week
                 else:
                     incomplete_week = input(
@@ -121,11 +152,32 @@ class FantasyFootballReport(object):
                 raise ValueError("You must select either 'default' or an integer from 1 to 17 for the chosen week.")
         except ValueError:
             raise ValueError("You must select either 'default' or an integer from 1 to 17 for the chosen week.")
+        self.chosen_week_complete_bool = week_complete_bool or \
+            int(self.chosen_week) < int(self.league_standings_data.loc[0, "current_week"])
 
         # run yql queries requiring chosen week
         self.remaining_matchups_data = {}
-        for week in range(int(self.chosen_week) + 1, self.num_regular_season_weeks + 1):
-            self.remaining_matchups_data[week] = self.yql_query.get_matchups_data(week)
+        with profiler.stage("yql_remaining_matchups"):
+            for week in range(int(self.chosen_week) + 1, self.num_regular_season_weeks + 1):
+                self.remaining_matchups_data[week] = self.yql_query.get_matchups_data(week)
+
+        # season data used by every week's metrics
+        self.season_context = SeasonContext(
+            config=self.config,
+            league_id=self.league_id,
+            league_standings_data=self.league_standings_data,
+            roster=self.roster,
+            league_roster_active_slots=self.league_roster_active_slots,
+            remaining_matchups_data=self.remaining_matchups_data,
+            playoff_slots=self.playoff_slots,
+            num_regular_season_weeks=self.num_regular_season_weeks,
+            chosen_week=self.chosen_week,
+            playoff_reseeding_bool=self.playoff_reseeding_bool,
+            dq_ce_bool=self.dq_ce_bool,
+            break_ties_bool=self.break_ties_bool,
+            test_bool=self.test_bool
+        )
+        memory_tracker.checkpoint("setup")
 
         # output league info for verification
         print("...setup complete for \"{}\" ({}) week {} report.\n".format(self.league_name.upper(),
@@ -170,9 +222,6 @@ class FantasyFootballReport(object):
         if not os.path.exists(self.league_test_dir + "/week_" + chosen_week + "/roster_data"):
             os.makedirs(self.league_test_dir + "/week_" + chosen_week + "/roster_data")
 
-        if not os.path.exists(self.league_test_dir + "/week_" + chosen_week + "/player_headshots"):
-            os.makedirs(self.league_test_dir + "/week_" + chosen_week + "/player_headshots")
-
         matchups = self.yql_query.get_matchups_data(chosen_week)
 
         matchup_list = []
@@ -297,382 +346,177 @@ class FantasyFootballReport(object):
 
     def calculate_metrics(self, weekly_team_info, week, chosen_week):
 
-        matchups_list = self.retrieve_scoreboard(week)
-        team_results_dict = self.retrieve_data(week)
-
-        # get current standings
-        calc_metrics = CalculateMetrics(self.config, self.league_id, self.playoff_slots)
+        with profiler.stage("yql_scoreboard"):
+            matchups_list = self.retrieve_scoreboard(week)
+        with profiler.stage("yql_rosters"):
+            team_results_dict = self.retrieve_data(week)
 
-        # calculate coaching efficiency metric and add values to team_results_dict, and get points by position
-        points_by_position = PointsByPosition(self.roster, self.chosen_week)
-        weekly_points_by_position_data = \
-            points_by_position.get_weekly_points_by_position(self.dq_ce_bool, self.config, week,
-                                                             self.roster, self.league_roster_active_slots,
-                                                             team_results_dict)
+        # start downloading the headshots of the chosen week's starters (boom and bust players) while metrics and
+        # the rest of the report are created
+        if int(week) == int(chosen_week):
+            self.headshot_cache.prefetch([player["headshot_url"] for team_results in team_results_dict.values()
+                                          for player in team_results["players"] if player["selected_position"] != "BN"])
 
-        # calculate luck metric and add values to team_results_dict
-        breakdown = Breakdown()
-        breakdown_results = breakdown.execute_breakdown(team_results_dict, matchups_list)
+        return self.season_context.calculate_week_metrics(weekly_team_info, team_results_dict, matchups_list, week)
 
-        # yes, this is kind of redundent but its clearer that the individual metrics
-        # are _not_ supposed to be modifying the things passed into it
-        for team_id in team_results_dict:
-            team_results_dict[team_id]["luck"] = breakdown_results[team_id]["luck"] * 100
-            team_results_dict[team_id]["breakdown"] = breakdown_results[team_id]["breakdown"]
+    def create_report_data(self):
+        """ Calculate the metrics of every week of the season and the season averages used by the report.
 
-        # dependent on all previous weeks scores
-        zscore = ZScore(weekly_team_info + [team_results_dict])
-        zscore_results = zscore.execute()
-
-        for team_id in team_results_dict:
-            team_results_dict[team_id]["zscore"] = zscore_results[team_id]
+        :return: tuple of (report_info_dict, line_chart_data_list)
+        """
+        report_info_dict = {}
 
-        power_ranking_metric = PowerRanking()
-        power_ranking_results = power_ranking_metric.execute_power_ranking(team_results_dict)
+        weekly_team_info = []
 
-        for team_id in team_results_dict:
-            team_results_dict[team_id]["power_rank"] = power_ranking_results[team_id]["power_rank"]
-            team_results_dict[team_id]["zscore_rank"] = power_ranking_results[team_id]["zscore_rank"]
+        weekly_top_scores = []
 
-        # used only for testing what happens when different metrics are tied; requires uncommenting lines in method
-        if self.test_bool:
-            calc_metrics.test_ties(team_results_dict)
+        # (weeks x teams x metrics) array of weekly team metrics for the season, indexed by team ID
+        season_metrics = SeasonMetrics(self.teams_data, int(self.chosen_week))
 
-        for key in team_results_dict:
-            try:
-                st = team_results_dict[key]  # .decode('utf-8')
-                team_results_dict[key] = st
-            except AttributeError:
-                pass
-
-        # create score data for table
-        score_results = sorted(iter(team_results_dict.items()),
-                               key=lambda k_v: (float(k_v[1].get("score")), k_v[0]), reverse=True)
-        score_results_data = calc_metrics.get_score_data(score_results)
-
-        current_standings_data = calc_metrics.get_standings(self.league_standings_data)
-
-        # create playoff probabilities data for table
-        remaining_matchups = {
-            week: [
-                (matchup["teams"]["team"][0]["team_id"], matchup["teams"]["team"][1]["team_id"]) for matchup in matchups
-            ] for week, matchups in self.remaining_matchups_data.items()
-        }
-
-        playoff_probs = PlayoffProbabilities(
-            self.config.getint("Fantasy_Football_Report_Settings", "num_playoff_simulations"),
-            self.num_regular_season_weeks,
-            week,
-            self.playoff_slots,
-            calc_metrics.teams_info,
-            remaining_matchups
+        # season totals of points by position, updated once per week
+        season_points_by_position = SeasonPointsByPosition(
+            [team.get("name") for team in self.teams_data],
+            PointsByPosition(self.roster, self.chosen_week).get_positions()
         )
 
-        team_playoff_probs_data = playoff_probs.calculate(chosen_week)
+        # the chosen week is not kept when teams are manually disqualified from its coaching efficiency
+        keep_chosen_week_bool = not self.config.get("Fantasy_Football_Report_Settings",
+                                                    "coaching_efficiency_disqualified_teams")
 
-        if team_playoff_probs_data:
-            playoff_probs_data = calc_metrics.get_playoff_probs_data(
-                self.league_standings_data,
-                team_playoff_probs_data
-            )
-        else:
-            playoff_probs_data = None
-
-        # create coaching efficiency data for table
-        coaching_efficiency_results = sorted(iter(team_results_dict.items()),
-                                             key=lambda k_v: (k_v[1].get("coaching_efficiency"), k_v[0]), reverse=True)
-        coaching_efficiency_results_data = calc_metrics.get_coaching_efficiency_data(
-            coaching_efficiency_results)
-        efficiency_dq_count = calc_metrics.coaching_efficiency_dq_count
-
-        # create luck data for table
-        luck_results = sorted(iter(team_results_dict.items()),
-                              key=lambda k_v: (k_v[1].get("luck"), k_v[0]), reverse=True)
-        luck_results_data = calc_metrics.get_luck_data(luck_results)
-
-        # create power ranking data for table
-        power_ranking_results = sorted(iter(list(team_results_dict.items())), key=lambda k_v: k_v[1]["power_rank"])
-        power_ranking_results_data = []
-        for key, value in power_ranking_results:
-            # season avg calc does something where it keys off the second value in the array
-            power_ranking_results_data.append(
-                [value.get("power_rank"), key, value.get("manager")]
-            )
-
-        # create zscore data for table
-        zscore_results = sorted(iter(list(team_results_dict.items())),
-                                key=lambda k_v: (k_v[1].get("zscore_rank"), k_v[0]))
-
-        zscore_results_data = []
-        for key, value in zscore_results:
-            zscore = value.get("zscore", None)
-            zscore_rank = value.get("zscore_rank", "N/A")
-            if zscore:
-                zscore = round(float(zscore), 2)
+        week_counter = 1
+        while week_counter <= int(self.chosen_week):
+            if week_counter < int(self.chosen_week) and week_counter in self.weekly_metrics:
+                week_metrics = self.weekly_metrics[week_counter]
             else:
-                zscore = "N/A"
-            zscore_results_data.append([zscore_rank, key, value.get("manager"), zscore])
-
-        # create bad boy data for table
-        bad_boy_results = sorted(iter(team_results_dict.items()),
-                                 key=lambda k_v: (float(k_v[1].get("bad_boy_points")), k_v[0]), reverse=True)
-        bad_boy_results_data = calc_metrics.get_bad_boy_data(bad_boy_results)
-
-        # count number of ties for points, coaching efficiency, luck, power ranking, or bad boy ranking
-        # tie_type can be "score", "coaching_efficiency", "luck", "power_rank", or "bad_boy"
-
-        num_tied_scores = calc_metrics.get_num_ties(score_results_data, "score", self.break_ties_bool)
-        # reorder score data based on bench points
-        if num_tied_scores > 0:
-            score_results_data = calc_metrics.resolve_score_ties(score_results_data, self.break_ties_bool)
-            calc_metrics.get_num_ties(score_results_data, "score", self.break_ties_bool)
-        tie_for_first_score = False
-        if score_results_data[0][0] == score_results_data[1][0]:
-            tie_for_first_score = True
-        num_tied_for_first_scores = len(
-            [list(group) for key, group in itertools.groupby(score_results_data, lambda x: x[3])][0])
-
-        num_tied_coaching_efficiencies = calc_metrics.get_num_ties(coaching_efficiency_results_data,
-                                                                        "coaching_efficiency", self.break_ties_bool)
-        tie_for_first_coaching_efficiency = False
-        if coaching_efficiency_results_data[0][0] == coaching_efficiency_results_data[1][0]:
-            tie_for_first_coaching_efficiency = True
-        num_tied_for_first_coaching_efficiency = len(
-            [list(group) for key, group in itertools.groupby(coaching_efficiency_results_data, lambda x: x[3])][0])
-
-        num_tied_lucks = calc_metrics.get_num_ties(luck_results_data, "luck", self.break_ties_bool)
-        tie_for_first_luck = False
-        if luck_results_data[0][0] == luck_results_data[1][0]:
-            tie_for_first_luck = True
-        num_tied_for_first_luck = len(
-            [list(group) for key, group in itertools.groupby(luck_results_data, lambda x: x[3])][0])
-
-        num_tied_power_rankings = calc_metrics.get_num_ties(power_ranking_results_data, "power_rank",
-                                                                 self.break_ties_bool)
-        tie_for_first_power_ranking = False
-        if power_ranking_results_data[0][0] == power_ranking_results_data[1][0]:
-            tie_for_first_power_ranking = True
-        num_tied_for_first_power_ranking = len(
-            [list(group) for key, group in itertools.groupby(power_ranking_results_data, lambda x: x[0])][0])
-
-        num_tied_bad_boys = calc_metrics.get_num_ties(bad_boy_results_data, "bad_boy", self.break_ties_bool)
-
-        tie_for_first_bad_boy = False
-        if num_tied_bad_boys > 0:
-            if bad_boy_results_data[0][0] == bad_boy_results_data[1][0]:
-                tie_for_first_bad_boy = True
-        num_tied_for_first_bad_boy = len(
-            [list(group) for key, group in itertools.groupby(bad_boy_results_data, lambda x: x[3])][0])
-
-        # output weekly metrics info
-        print("~~~~~ WEEK {} METRICS INFO ~~~~~".format(week))
-        print("              SCORE tie(s): {}".format(num_tied_scores))
-        print("COACHING EFFICIENCY tie(s): {}".format(num_tied_coaching_efficiencies))
-        print("               LUCK tie(s): {}".format(num_tied_lucks))
-        print("      POWER RANKING tie(s): {}".format(num_tied_power_rankings))
-        print("            BAD BOY tie(s): {}".format(num_tied_bad_boys))
-        coaching_efficiency_dq_dict = points_by_position.coaching_efficiency_dq_dict
-        if coaching_efficiency_dq_dict:
-            ce_dq_str = ""
-            for team in list(coaching_efficiency_dq_dict.keys()):
-                if coaching_efficiency_dq_dict.get(team) == -1:
-                    ce_dq_str += "{} (incomplete active squad), ".format(team)
-                else:
-                    ce_dq_str += "{} (ineligible bench players: {}/{}), ".format(team,
-                                                                                 coaching_efficiency_dq_dict.get(team),
-                                                                                 self.roster.get("slots").get("BN"))
-            print("   COACHING EFFICIENCY DQs: {}\n".format(ce_dq_str[:-2]))
-        else:
-            print("")
-
-        report_info_dict = {
-            "team_results": team_results_dict,
-            "current_standings_data": current_standings_data,
-            "playoff_probs_data": playoff_probs_data,
-            "score_results_data": score_results_data,
-            "coaching_efficiency_results_data": coaching_efficiency_results_data,
-            "luck_results_data": luck_results_data,
-            "power_ranking_results_data": power_ranking_results_data,
-            "zscore_results_data": zscore_results_data,
-            "bad_boy_results_data": bad_boy_results_data,
-            "num_tied_scores": num_tied_scores,
-            "num_tied_coaching_efficiencies": num_tied_coaching_efficiencies,
-            "num_tied_lucks": num_tied_lucks,
-            "num_tied_power_rankings": num_tied_power_rankings,
-            "num_tied_bad_boys": num_tied_bad_boys,
-            "efficiency_dq_count": efficiency_dq_count,
-            "tied_scores_bool": num_tied_scores > 0,
-            "tied_coaching_efficiencies_bool": num_tied_coaching_efficiencies > 0,
-            "tied_lucks_bool": num_tied_lucks > 0,
-            "tied_power_rankings_bool": num_tied_power_rankings > 0,
-            "tied_bad_boy_bool": num_tied_bad_boys > 0,
-            "tie_for_first_score": tie_for_first_score,
-            "tie_for_first_coaching_efficiency": tie_for_first_coaching_efficiency,
-            "tie_for_first_luck": tie_for_first_luck,
-            "tie_for_first_power_ranking": tie_for_first_power_ranking,
-            "tie_for_first_bad_boy": tie_for_first_bad_boy,
-            "num_tied_for_first_scores": num_tied_for_first_scores,
-            "num_tied_for_first_coaching_efficiency": num_tied_for_first_coaching_efficiency,
-            "num_tied_for_first_luck": num_tied_for_first_luck,
-            "num_tied_for_first_power_ranking": num_tied_for_first_power_ranking,
-            "num_tied_for_first_bad_boy": num_tied_for_first_bad_boy,
-            "weekly_points_by_position_data": weekly_points_by_position_data
-        }
-
-        return report_info_dict
-
-    def create_pdf_report(self):
-
-        chosen_week_ordered_team_names = []
-        chosen_week_ordered_managers = []
-        report_info_dict = {}
-
-        weekly_team_info = []
+                with profiler.stage("week_{}".format(week_counter)):
+                    report_info_dict = self.calculate_metrics(weekly_team_info,
+                                                              week=str(week_counter),
+                                                              chosen_week=self.chosen_week)
+
+                week_metrics = {
+                    "team_results": report_info_dict.get("team_results"),
+                    "top_scorer": {
+                        "week": week_counter,
+                        "team": report_info_dict.get("score_results_data")[0][1],
+                        "manager": report_info_dict.get("score_results_data")[0][2],
+                        "score": report_info_dict.get("score_results_data")[0][3]
+                    },
+                    "weekly_points_by_position_data": report_info_dict.get("weekly_points_by_position_data")
+                }
+                if week_counter < int(self.chosen_week) or keep_chosen_week_bool:
+                    self.weekly_metrics[week_counter] = week_metrics
 
-        time_series_points_data = []
-        time_series_efficiency_data = []
-        time_series_luck_data = []
-        time_series_power_rank_data = []
-        time_series_zscore_data = []
+            weekly_top_scores.append(week_metrics["top_scorer"])
 
-        weekly_top_scores = []
+            weekly_team_info.append(week_metrics["team_results"])
 
-        season_average_points_by_position_dict = collections.defaultdict(list)
+            season_metrics.add_week(week_counter, week_metrics["team_results"])
+            season_points_by_position.add_week(week_metrics["weekly_points_by_position_data"])
+            memory_tracker.checkpoint("week_{}".format(week_counter))
 
-        week_counter = 1
-        while week_counter <= int(self.chosen_week):
-            report_info_dict = self.calculate_metrics(weekly_team_info,
-                                                      week=str(week_counter),
-                                                      chosen_week=self.chosen_week)
-
-            top_scorer = {
-                 "week": week_counter,
-                 "team": report_info_dict.get("score_results_data")[0][1],
-                 "manager": report_info_dict.get("score_results_data")[0][2],
-                 "score": report_info_dict.get("score_results_data")[0][3]
-             }
-            weekly_top_scores.append(top_scorer)
-
-            weekly_team_info.append(report_info_dict.get("team_results"))
-
-            # create team data for charts
-            teams_data_list = []
-            team_results = report_info_dict.get("team_results")
-            for team in team_results:
-                temp_team_info = team_results.get(team)
-                teams_data_list.append([
-                    temp_team_info.get("team_id"),
-                    team,
-                    temp_team_info.get("manager"),
-                    temp_team_info.get("score"),
-                    temp_team_info.get("coaching_efficiency"),
-                    temp_team_info.get("luck"),
-                    temp_team_info.get("power_rank"),
-                    temp_team_info.get("zscore")
-                ])
-
-                points_by_position = report_info_dict.get("weekly_points_by_position_data")
-                for weekly_info in points_by_position:
-                    if weekly_info[0] == team:
-                        season_average_points_by_position_dict[team].append(weekly_info[1])
-
-            teams_data_list.sort(key=lambda x: int(x[0]))
-
-            ordered_team_names = []
-            ordered_team_managers = []
-            weekly_points_data = []
-            weekly_coaching_efficiency_data = []
-            weekly_luck_data = []
-            weekly_power_rank_data = []
-            weekly_zscore_data = []
-
-            for team in teams_data_list:
-                ordered_team_names.append(team[1])
-                ordered_team_managers.append(team[2])
-                weekly_points_data.append([int(week_counter), float(team[3])])
-                weekly_coaching_efficiency_data.append([int(week_counter), team[4]])
-                weekly_luck_data.append([int(week_counter), float(team[5])])
-                weekly_power_rank_data.append([int(week_counter), team[6]])
-                weekly_zscore_data.append([int(week_counter), team[7]])
-
-            chosen_week_ordered_team_names = ordered_team_names
-            chosen_week_ordered_managers = ordered_team_managers
-
-            if week_counter == 1:
-                for team_points in weekly_points_data:
-                    time_series_points_data.append([team_points])
-                for team_efficiency in weekly_coaching_efficiency_data:
-                    time_series_efficiency_data.append([team_efficiency])
-                for team_luck in weekly_luck_data:
-                    time_series_luck_data.append([team_luck])
-                for team_power_rank in weekly_power_rank_data:
-                    time_series_power_rank_data.append([team_power_rank])
-                for team_zscore in weekly_zscore_data:
-                    time_series_zscore_data.append([team_zscore])
-            else:
-                for index, team_points in enumerate(weekly_points_data):
-                    time_series_points_data[index].append(team_points)
-                for index, team_efficiency in enumerate(weekly_coaching_efficiency_data):
-                    if float(team_efficiency[1]) != 0.0:
-                        time_series_efficiency_data[index].append(team_efficiency)
-                for index, team_luck in enumerate(weekly_luck_data):
-                    time_series_luck_data[index].append(team_luck)
-                for index, team_power_rank in enumerate(weekly_power_rank_data):
-                    time_series_power_rank_data[index].append(team_power_rank)
-                for index, team_zscore in enumerate(weekly_zscore_data):
-                    time_series_zscore_data[index].append(team_zscore)
             week_counter += 1
 
         report_info_dict["weekly_top_scorers"] = weekly_top_scores
 
         # calculate season average metrics and then add columns for them to their respective metric table data
-        season_average_calculator = SeasonAverageCalculator(chosen_week_ordered_team_names, report_info_dict)
+        season_average_calculator = SeasonAverageCalculator(season_metrics.team_names, report_info_dict)
         report_info_dict["score_results_data"] = season_average_calculator.get_average(
-            time_series_points_data, "score_results_data", with_percent_bool=False)
+            season_metrics.get_metric("score"), "score_results_data", with_percent_bool=False)
         report_info_dict["coaching_efficiency_results_data"] = season_average_calculator.get_average(
-            time_series_efficiency_data, "coaching_efficiency_results_data", with_percent_bool=True)
-        report_info_dict["luck_results_data"] = season_average_calculator.get_average(time_series_luck_data,
-                                                                                      "luck_results_data",
-                                                                                      with_percent_bool=True)
+            season_metrics.get_metric("coaching_efficiency"), "coaching_efficiency_results_data",
+            with_percent_bool=True)
+        report_info_dict["luck_results_data"] = season_average_calculator.get_average(
+            season_metrics.get_metric("luck"), "luck_results_data", with_percent_bool=True)
         report_info_dict["power_ranking_results_data"] = season_average_calculator.get_average(
-            time_series_power_rank_data, "power_ranking_results_data", with_percent_bool=False, bench_column_bool=False,
-            reverse_bool=False)
+            season_metrics.get_metric("power_rank"), "power_ranking_results_data", with_percent_bool=False,
+            bench_column_bool=False, reverse_bool=False)
 
         # report_info_dict["zscore_results_data"] = season_average_calculator.get_average(
-        #      time_series_zscore_data, "zscore_results_data", with_percent_bool=False, bench_column_bool=False,
-        #      reverse_bool=False)
-
-        line_chart_data_list = [chosen_week_ordered_team_names,
-                                chosen_week_ordered_managers,
-                                time_series_points_data,
-                                time_series_efficiency_data,
-                                time_series_luck_data,
-                                time_series_power_rank_data,
-                                time_series_zscore_data]
-
-        # calculate season average points by position and add them to the report_info_dict
-        PointsByPosition.calculate_points_by_position_season_averages(season_average_points_by_position_dict,
-                                                                      report_info_dict)
-
-        filename = self.league_name.replace(" ",
-                                            "-") + "(" + self.league_id + ")_week-" + self.chosen_week + "_report.pdf"
+        #      season_metrics.get_metric("zscore"), "zscore_results_data", with_percent_bool=False,
+        #      bench_column_bool=False, reverse_bool=False)
+
+        line_chart_data_list = [season_metrics.team_names,
+                                season_metrics.team_managers,
+                                season_metrics.get_line_chart_data("score"),
+                                season_metrics.get_line_chart_data("coaching_efficiency"),
+                                season_metrics.get_line_chart_data("luck"),
+                                season_metrics.get_line_chart_data("power_rank"),
+                                season_metrics.get_line_chart_data("zscore")]
+
+        # add season average points by position to the report_info_dict
+        report_info_dict["season_average_points_by_position"] = season_points_by_position
+        memory_tracker.checkpoint("season_averages")
+
+        history_database = self.config.get("Fantasy_Football_Report_Settings", "history_database", fallback="")
+        if history_database:
+            with profiler.stage("history"):
+                report_info_dict["all_time_leaderboards"] = self.update_history(history_database, weekly_team_info)
+
+        return report_info_dict, line_chart_data_list
+
+    def update_history(self, history_database, weekly_team_info):
+        """ Store the metrics of the completed weeks of the season in the history warehouse, and query the all-time
+        leaderboards of every season of the league stored there.
+
+        :return: dict of all-time leaderboard rows, or None if the history warehouse could not be used
+        """
+        league_key = get_full_league_key(self.league_key)
+        completed_weeks = weekly_team_info if self.chosen_week_complete_bool else weekly_team_info[:-1]
+        try:
+            history_warehouse = HistoryWarehouse(history_database)
+            try:
+                if self.season is not None and completed_weeks:
+                    history_warehouse.store_season(
+                        league_key, self.season, self.league_name,
+                        get_full_league_key(self.previous_league_key) if self.previous_league_key else None,
+                        completed_weeks)
+                return history_warehouse.get_leaderboards(
+                    league_key, self.season,
+                    self.config.getint("Fantasy_Football_Report_Settings", "all_time_leaderboard_size", fallback=10))
+            finally:
+                history_warehouse.close()
+        except sqlite3.Error as e:
+            print("Unable to use the league history in {} ({}).".format(history_database, e))
+            return None
+
+    def get_report_filename(self, extension):
+
+        filename = self.league_name.replace(" ", "-") + "(" + self.league_id + ")_week-" + self.chosen_week + \
+            "_report." + extension
         report_save_dir = self.config.get("Fantasy_Football_Report_Settings",
                                           "report_directory_base_path") + \
             "/" + self.league_name.replace(" ", "-") + "(" + self.league_id + ")"
-        report_title_text = self.league_name + " (" + self.league_id + ") Week " + self.chosen_week + " Report"
-        report_footer_text = \
-            "<para alignment='center'>Report generated %s for Yahoo Fantasy Football league '%s' (%s).</para>" % \
-            ("{:%Y-%b-%d %H:%M:%S}".format(datetime.datetime.now()), self.league_name, self.league_id)
 
         if not os.path.isdir(report_save_dir):
             os.makedirs(report_save_dir)
 
         if not self.test_bool:
             filename_with_path = os.path.join(report_save_dir, filename)
+        elif self.unique_test_report_bool:
+            filename_with_path = os.path.join(
+                self.config.get("Fantasy_Football_Report_Settings", "report_directory_base_path") + "/",
+                "test_report_" + self.league_id + "_week-" + self.chosen_week + "." + extension)
         else:
             filename_with_path = os.path.join(
                 self.config.get("Fantasy_Football_Report_Settings", "report_directory_base_path") + "/",
-                "test_report.pdf")
+                "test_report." + extension)
+        return filename_with_path
+
+    def get_report_title_text(self):
+        return self.league_name + " (" + self.league_id + ") Week " + self.chosen_week + " Report"
+
+    def get_report_footer_text(self):
+        return "Report generated %s for Yahoo Fantasy Football league '%s' (%s)." % (
+            "{:%Y-%b-%d %H:%M:%S}".format(datetime.datetime.now()), self.league_name, self.league_id)
+
+    def create_pdf_report(self):
+
+        with profiler.stage("metrics"):
+            report_info_dict, line_chart_data_list = self.create_report_data()
+
+        filename_with_path = self.get_report_filename("pdf")
+        report_title_text = self.get_report_title_text()
+        report_footer_text = "<para alignment='center'>%s</para>" % self.get_report_footer_text()
 
         # instantiate pdf generator
         pdf_generator = PdfGenerator(
@@ -682,6 +526,7 @@ class FantasyFootballReport(object):
             num_regular_season_weeks=self.num_regular_season_weeks,
             week=self.chosen_week,
             test_dir=self.league_test_dir,
+            headshot_cache=self.headshot_cache,
             break_ties_bool=self.break_ties_bool,
             report_title_text=report_title_text,
             report_footer_text=report_footer_text,
@@ -689,8 +534,40 @@ class FantasyFootballReport(object):
         )
 
         # generate pdf of report
-        file_for_upload = pdf_generator.generate_pdf(filename_with_path, line_chart_data_list)
+        with profiler.stage("pdf"):
+            file_for_upload = pdf_generator.generate_pdf(filename_with_path, line_chart_data_list)
+        self.headshot_cache.shutdown()
+        memory_tracker.checkpoint("pdf")
 
         print("...SUCCESS! Generated PDF: {}\n".format(file_for_upload))
 
         return file_for_upload
+
+    def create_html_report(self):
+        """ Create a quick preview of the report as a self-contained html page and a json document of the same data.
+        """
+        with profiler.stage("metrics"):
+            report_info_dict, line_chart_data_list = self.create_report_data()
+
+        html_generator = HtmlGenerator(
+            config=self.config,
+            league_id=self.league_id,
+            playoff_slots=self.playoff_slots,
+            num_regular_season_weeks=self.num_regular_season_weeks,
+            week=self.chosen_week,
+            headshot_cache=self.headshot_cache,
+            break_ties_bool=self.break_ties_bool,
+            report_title_text=self.get_report_title_text(),
+            report_footer_text=html.escape(self.get_report_footer_text()),
+            report_info_dict=report_info_dict
+        )
+
+        # generate html and json of report
+        with profiler.stage("html"):
+            file_for_upload = html_generator.generate_html(self.get_report_filename("html"), line_chart_data_list)
+        self.headshot_cache.shutdown()
+        memory_tracker.checkpoint("html")
+
+        print("...SUCCESS! Generated HTML: {}\n".format(file_for_upload))
+
+        return file_for_upload
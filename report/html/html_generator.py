@@ -0,0 +1,496 @@
+# lightweight html and json output of the same report data as the pdf report, for quick previews
+
+import base64
+import html
+import json
+import math
+import os
+from string import Template
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# see https://sashat.me/2017/01/11/list-of-20-simple-distinct-colors/ for colors (same as the pdf charts)
+SERIES_COLORS = ["#e6194b", "#3cb44b", "#ffe119", "#0082c8", "#f58231", "#911eb4", "#46f0f0", "#f032e6", "#d2f53c",
+                 "#fabebe", "#008080", "#e6beff"]
+
+TIE_FOOTNOTE = "*Tie(s)."
+BREAK_EFFICIENCY_TIES_FOOTNOTE = "*The league commissioner will resolve coaching efficiency ties manually."
+
+
+def load_template(template_name):
+    with open(os.path.join(TEMPLATE_DIR, template_name), "r", encoding="utf-8") as template_file:
+        return Template(template_file.read())
+
+
+def to_json_value(value):
+    # numpy values used in the report data
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class HtmlGenerator(object):
+    def __init__(self,
+                 config,
+                 league_id,
+                 playoff_slots,
+                 num_regular_season_weeks,
+                 week,
+                 headshot_cache,
+                 break_ties_bool,
+                 report_title_text,
+                 report_footer_text,
+                 report_info_dict
+                 ):
+
+        self.config = config
+        self.league_id = league_id
+        self.playoff_slots = playoff_slots
+        self.num_regular_season_weeks = num_regular_season_weeks
+        self.week = week
+        self.headshot_cache = headshot_cache
+        self.break_ties_bool = break_ties_bool
+        self.report_title_text = report_title_text
+        self.report_footer_text = report_footer_text
+        self.report_info_dict = report_info_dict
+
+        self.section_template = load_template("section.html")
+        self.team_section_template = load_template("team_section.html")
+        self.report_template = load_template("report.html")
+
+        # table of contents entries as (anchor, title)
+        self.toc = []
+
+    def get_sections_data(self):
+        """ Get the headers, rows and highlighting of every metric table, in the order of the pdf report.
+        """
+        report_info_dict = self.report_info_dict
+
+        # the bench points column of the score table is only shown when score ties are broken with it
+        score_results_data = report_info_dict.get("score_results_data")
+        if not (report_info_dict.get("num_tied_scores") > 0 and self.break_ties_bool):
+            score_results_data = [team[:-1] for team in score_results_data]
+            score_headers = ["Place", "Team", "Manager", "Points", "Season Avg. (Place)"]
+        else:
+            score_headers = ["Place", "Team", "Manager", "Points", "Season Avg. (Place)", "Bench Points"]
+
+        ordinals = ["1st", "2nd", "3rd"] + ["{}th".format(place) for place in range(4, self.playoff_slots + 1)]
+        playoff_probs_classes = []
+        for team in report_info_dict.get("playoff_probs_data"):
+            if float(team[3].split("%")[0]) == 100.00 and int(team[4].split(" ")[0]) == 0:
+                playoff_probs_classes.append("clinched")
+            elif (int(team[4].split(" ")[0]) + int(self.week)) > self.num_regular_season_weeks and \
+                    float(team[3].split("%")[0]) == 0.00:
+                playoff_probs_classes.append("eliminated")
+            else:
+                playoff_probs_classes.append("")
+
+        num_teams = len(report_info_dict.get("coaching_efficiency_results_data"))
+        efficiency_dq_count = report_info_dict.get("efficiency_dq_count")
+        coaching_efficiency_classes = self.get_tie_classes(
+            num_teams, report_info_dict.get("tie_for_first_coaching_efficiency"),
+            report_info_dict.get("num_tied_for_first_coaching_efficiency"))
+        for index in range(num_teams - efficiency_dq_count, num_teams):
+            coaching_efficiency_classes[index] = "dq"
+
+        if self.break_ties_bool:
+            score_classes = ["leader"] + [""] * (num_teams - 1)
+            coaching_efficiency_footnote = BREAK_EFFICIENCY_TIES_FOOTNOTE
+        else:
+            score_classes = self.get_tie_classes(num_teams, report_info_dict.get("tie_for_first_score"),
+                                                 report_info_dict.get("num_tied_for_first_scores"))
+            coaching_efficiency_footnote = TIE_FOOTNOTE
+
+        sections_data = [
+            {
+                "key": "standings",
+                "title": "League Standings",
+                "headers": ["Place", "Team", "Manager", "Record", "Points For", "Points Against", "Streak", "Waiver",
+                            "Moves", "Trades"],
+                "rows": report_info_dict.get("current_standings_data"),
+                "row_classes": [],
+            },
+            {
+                "key": "playoff_probabilities",
+                "title": "Playoff Probabilities",
+                "subtitle": "Playoff probabilities were calculated using {0:,} Monte Carlo simulations to predict team "
+                            "performances through the end of the regular fantasy season.".format(
+                                self.config.getint("Fantasy_Football_Report_Settings", "num_playoff_simulations")),
+                "headers": ["Team", "Manager", "Record", "Playoffs", "Needed"] + ordinals[:self.playoff_slots],
+                "rows": report_info_dict.get("playoff_probs_data"),
+                "row_classes": playoff_probs_classes,
+            },
+            {
+                "key": "power_rankings",
+                "title": "Team Power Rankings",
+                "subtitle": "Average of weekly score, coaching efficiency and luck ranks.",
+                "headers": ["Power Rank", "Team", "Manager", "Season Avg. (Place)"],
+                "rows": report_info_dict.get("power_ranking_results_data"),
+                "row_classes": self.get_tie_classes(num_teams, report_info_dict.get("tie_for_first_power_ranking"),
+                                                    report_info_dict.get("num_tied_for_first_power_ranking")),
+                "footnote": TIE_FOOTNOTE if report_info_dict.get("tied_power_rankings_bool") else None,
+            },
+            {
+                "key": "zscores",
+                "title": "Team Z-Score Rankings",
+                "subtitle": "Measure of standard deviations away from mean for a score. Shows teams performing above "
+                            "or below their normal scores for the current week.",
+                "headers": ["Place", "Team", "Manager", "Z-Score"],
+                "rows": report_info_dict.get("zscore_results_data"),
+                "row_classes": ["leader"],
+            },
+            {
+                "key": "scores",
+                "title": "Team Score Rankings",
+                "headers": score_headers,
+                "rows": score_results_data,
+                "row_classes": score_classes,
+                "footnote": TIE_FOOTNOTE if report_info_dict.get("tied_scores_bool") and not self.break_ties_bool
+                else None,
+            },
+            {
+                "key": "coaching_efficiency",
+                "title": "Team Coaching Efficiency Rankings",
+                "headers": ["Place", "Team", "Manager", "Coaching Efficiency (%)", "Season Avg. (Place)"],
+                "rows": report_info_dict.get("coaching_efficiency_results_data"),
+                "row_classes": coaching_efficiency_classes,
+                "footnote": coaching_efficiency_footnote if report_info_dict.get("tied_coaching_efficiencies_bool")
+                else None,
+            },
+            {
+                "key": "luck",
+                "title": "Team Luck Rankings",
+                "headers": ["Place", "Team", "Manager", "Luck (%)", "Season Avg. (Place)"],
+                "rows": report_info_dict.get("luck_results_data"),
+                "row_classes": self.get_tie_classes(num_teams, report_info_dict.get("tie_for_first_luck"),
+                                                    report_info_dict.get("num_tied_for_first_luck")),
+                "footnote": TIE_FOOTNOTE if report_info_dict.get("tied_lucks_bool") else None,
+            },
+            {
+                "key": "weekly_top_scorers",
+                "title": "Weekly Top Scorers",
+                "headers": ["Week", "Team", "Manager", "Score"],
+                "rows": [[week["week"], week["team"], week["manager"], week["score"]]
+                         for week in report_info_dict.get("weekly_top_scorers")],
+                "row_classes": [],
+            },
+            {
+                "key": "bad_boy",
+                "title": "Bad Boy Rankings",
+                "headers": ["Place", "Team", "Manager", "Bad Boy Pts", "Worst Offense", "# Offenders"],
+                "rows": report_info_dict.get("bad_boy_results_data"),
+                "row_classes": ["bad-boy-leader" if row_class else "" for row_class in self.get_tie_classes(
+                    num_teams, report_info_dict.get("tie_for_first_bad_boy"),
+                    report_info_dict.get("num_tied_for_first_bad_boy"))],
+                "footnote": TIE_FOOTNOTE if report_info_dict.get("tied_bad_boy_bool") else None,
+            },
+        ]
+
+        # championship probabilities from the simulated playoff bracket and playoff leverage of the matchups of the
+        # next week, after the playoff probabilities
+        if report_info_dict.get("playoff_leverage_data"):
+            sections_data.insert(2, {
+                "key": "playoff_leverage",
+                "title": "Playoff Leverage",
+                "subtitle": "Playoff probabilities of every team with a win and with a loss in its week {} matchup, "
+                            "from the same simulations.".format(int(self.week) + 1),
+                "headers": ["Team", "Manager", "Opponent", "Playoffs", "With Win", "With Loss", "Leverage"],
+                "rows": report_info_dict.get("playoff_leverage_data"),
+                "row_classes": [],
+            })
+        if report_info_dict.get("championship_probs_data"):
+            sections_data.insert(2, {
+                "key": "championship_probabilities",
+                "title": "Championship Probabilities",
+                "subtitle": "Odds of reaching each round of the playoffs and winning the championship, with the score "
+                            "of every team in every playoff game drawn from its weekly scores.",
+                "headers": report_info_dict.get("championship_probs_headers"),
+                "rows": report_info_dict.get("championship_probs_data"),
+                "row_classes": ["leader"],
+            })
+
+        # all-time leaderboards of every season of the league stored in the history warehouse
+        all_time_leaderboards = report_info_dict.get("all_time_leaderboards")
+        if all_time_leaderboards and all_time_leaderboards["top_scores"]:
+            seasons = all_time_leaderboards["seasons"]
+            seasons_text = "Season {}".format(seasons[0]) if len(seasons) == 1 else "Seasons {} to {}".format(
+                seasons[0], seasons[-1])
+            sections_data.extend([
+                {
+                    "key": "all_time_scores",
+                    "title": "All-Time Top Weekly Scores",
+                    "subtitle": seasons_text,
+                    "headers": ["Place", "Season", "Week", "Team", "Manager", "Points"],
+                    "rows": all_time_leaderboards["top_scores"],
+                    "row_classes": ["leader"],
+                },
+                {
+                    "key": "all_time_coaching_efficiency",
+                    "title": "All-Time Best Coaching Efficiency",
+                    "subtitle": seasons_text,
+                    "headers": ["Place", "Season", "Week", "Team", "Manager", "Coaching Efficiency (%)"],
+                    "rows": all_time_leaderboards["top_coaching_efficiencies"],
+                    "row_classes": ["leader"],
+                },
+                {
+                    "key": "all_time_careers",
+                    "title": "All-Time Career Luck",
+                    "subtitle": "Weekly averages of every manager over {}".format(seasons_text.lower()),
+                    "headers": ["Place", "Manager", "Seasons", "Weeks", "Avg. Points", "Avg. Coaching Efficiency (%)",
+                                "Avg. Luck (%)"],
+                    "rows": all_time_leaderboards["manager_careers"],
+                    "row_classes": ["leader"],
+                },
+            ])
+
+        return sections_data
+
+    @staticmethod
+    def get_tie_classes(num_teams, tie_for_first_bool, num_tied_for_first):
+        # highlight the leader, or every team tied for first place
+        num_leaders = num_tied_for_first if tie_for_first_bool else 1
+        return ["leader"] * num_leaders + [""] * (num_teams - num_leaders)
+
+    def get_teams_data(self):
+        """ Get the points by position, offending players and boom and bust players of every team, in alphabetical
+        order like the pdf team pages.
+        """
+        team_results = self.report_info_dict.get("team_results")
+        season_average_points_by_position = self.report_info_dict.get("season_average_points_by_position")
+
+        teams_data = []
+        for team_name, weekly_points_by_position in sorted(
+                self.report_info_dict.get("weekly_points_by_position_data"), key=lambda team_info: team_info[0]):
+            players = team_results[team_name]["players"]
+            starting_players = sorted([player for player in players if player["selected_position"] != "BN"],
+                                      key=lambda player: player["fantasy_points"], reverse=True)
+            offending_players = sorted([player for player in players if player["bad_boy_points"] > 0],
+                                       key=lambda player: player["bad_boy_points"], reverse=True)
+
+            teams_data.append({
+                "name": team_name,
+                "weekly_points_by_position": weekly_points_by_position,
+                "season_average_points_by_position":
+                    season_average_points_by_position.get_team_season_averages(team_name),
+                "bad_boys": [[player["name"], player["bad_boy_points"], player["bad_boy_crime"]]
+                             for player in offending_players],
+                "boom": starting_players[0],
+                "bust": starting_players[-1],
+            })
+        return teams_data
+
+    @staticmethod
+    def get_charts_data(line_chart_data_list):
+        series_names = line_chart_data_list[0]
+        return [
+            {"key": "points", "title": "Weekly Points", "y_axis_title": "Fantasy Points", "y_step": 10.00,
+             "series_names": series_names, "data": line_chart_data_list[2]},
+            {"key": "coaching_efficiency", "title": "Weekly Coaching Efficiency",
+             "y_axis_title": "Coaching Efficiency (%)", "y_step": 5.00, "series_names": series_names,
+             "data": line_chart_data_list[3]},
+            {"key": "luck", "title": "Weekly Luck", "y_axis_title": "Luck (%)", "y_step": 20.00,
+             "series_names": series_names, "data": line_chart_data_list[4]},
+        ]
+
+    @staticmethod
+    def create_line_chart(chart, num_weeks, width=550, height=300):
+        """ Inline svg line chart with one line per team.
+        """
+        left, right, top, bottom = 55, width - 15, 30, height - 90
+        values = [point[1] for team_data in chart["data"] for point in team_data] or [0.0]
+        y_min = math.floor(min(values) / chart["y_step"]) * chart["y_step"]
+        y_max = math.ceil(max(values) / chart["y_step"]) * chart["y_step"]
+        if y_max == y_min:
+            y_max = y_min + chart["y_step"]
+
+        def x_position(week):
+            return left + (right - left) * week / float(num_weeks + 1)
+
+        def y_position(value):
+            return bottom - (bottom - top) * (value - y_min) / float(y_max - y_min)
+
+        svg = ["<svg class=\"chart\" xmlns=\"http://www.w3.org/2000/svg\" width=\"{0}\" height=\"{1}\" "
+               "viewBox=\"0 0 {0} {1}\" font-family=\"Helvetica\" font-size=\"10\">".format(width, height),
+               "<rect width=\"{}\" height=\"{}\" fill=\"#d6d3d0\" fill-opacity=\"0.3\"/>".format(width, height),
+               "<text x=\"{}\" y=\"18\" text-anchor=\"middle\" font-size=\"14\" font-weight=\"bold\">{}</text>".format(
+                   width / 2.0, html.escape(chart["title"])),
+               "<text transform=\"translate(14,{}) rotate(-90)\" text-anchor=\"middle\">{}</text>".format(
+                   (top + bottom) / 2.0, html.escape(chart["y_axis_title"]))]
+
+        # y-axis grid, scaled down to at most 15 lines
+        y_step = chart["y_step"]
+        while (y_max - y_min) / y_step > 15:
+            y_step *= 2
+        value = y_min
+        while value <= y_max + y_step / 1000.0:
+            svg.append("<line x1=\"{0}\" x2=\"{1}\" y1=\"{2:.1f}\" y2=\"{2:.1f}\" stroke=\"#000\" stroke-width=\"0.25\"/>"
+                       "<text x=\"{3}\" y=\"{4:.1f}\" text-anchor=\"end\">{5:.0f}</text>".format(
+                           left, right, y_position(value), left - 5, y_position(value) + 3, value))
+            value += y_step
+
+        # x-axis with a tick for every week
+        svg.append("<line x1=\"{0}\" x2=\"{1}\" y1=\"{2}\" y2=\"{2}\" stroke=\"#000\"/>".format(left, right, bottom))
+        for week in range(1, num_weeks + 1):
+            svg.append("<text x=\"{:.1f}\" y=\"{}\" text-anchor=\"middle\">{}</text>".format(
+                x_position(week), bottom + 14, week))
+        svg.append("<text x=\"{}\" y=\"{}\" text-anchor=\"middle\">Weeks</text>".format(left - 25, bottom + 14))
+
+        for index, team_data in enumerate(chart["data"]):
+            color = SERIES_COLORS[index % len(SERIES_COLORS)]
+            points = " ".join("{:.1f},{:.1f}".format(x_position(week), y_position(value)) for week, value in team_data)
+            svg.append("<polyline points=\"{}\" fill=\"none\" stroke=\"{}\" stroke-width=\"2\"/>".format(points, color))
+            svg.extend("<circle cx=\"{:.1f}\" cy=\"{:.1f}\" r=\"2.5\" fill=\"{}\"/>".format(
+                x_position(week), y_position(value), color) for week, value in team_data)
+
+            # legend of two rows below the chart
+            legend_x = 10 + (index // 2) * (width - 20) / math.ceil(len(chart["data"]) / 2.0)
+            legend_y = bottom + 40 + (index % 2) * 18
+            svg.append("<rect x=\"{:.1f}\" y=\"{}\" width=\"8\" height=\"8\" fill=\"{}\"/>"
+                       "<text x=\"{:.1f}\" y=\"{}\" font-size=\"8\">{}</text>".format(
+                           legend_x, legend_y - 7, color, legend_x + 12, legend_y,
+                           html.escape(chart["series_names"][index][:20])))
+
+        svg.append("</svg>")
+        return "\n".join(svg)
+
+    @staticmethod
+    def create_pie_chart(labels_and_values, width=380, height=200):
+        """ Inline svg pie chart with a legend, like BreakdownPieDrawing (negative values are shown as 0.0).
+        """
+        radius = 75
+        center_x, center_y = 80, height / 2.0
+        values = [max(value, 0.0) for _, value in labels_and_values]
+        total = sum(values)
+
+        svg = ["<svg xmlns=\"http://www.w3.org/2000/svg\" width=\"{0}\" height=\"{1}\" viewBox=\"0 0 {0} {1}\" "
+               "font-family=\"Helvetica\" font-size=\"8\">".format(width, height)]
+        angle = math.pi / 2
+        for index, ((label, value), positive_value) in enumerate(zip(labels_and_values, values)):
+            color = SERIES_COLORS[index % len(SERIES_COLORS)]
+            if total > 0 and positive_value > 0:
+                if positive_value == total:
+                    svg.append("<circle cx=\"{}\" cy=\"{}\" r=\"{}\" fill=\"{}\" stroke=\"#fff\"/>".format(
+                        center_x, center_y, radius, color))
+                else:
+                    # slices go clockwise from the top, like reportlab pie charts
+                    end_angle = angle - 2 * math.pi * positive_value / total
+                    svg.append("<path d=\"M{0},{1} L{2:.2f},{3:.2f} A{4},{4} 0 {5},1 {6:.2f},{7:.2f} Z\" fill=\"{8}\" "
+                               "stroke=\"#fff\"/>".format(
+                                   center_x, center_y,
+                                   center_x + radius * math.cos(angle), center_y - radius * math.sin(angle),
+                                   radius, 1 if angle - end_angle > math.pi else 0,
+                                   center_x + radius * math.cos(end_angle), center_y - radius * math.sin(end_angle),
+                                   color))
+                    angle = end_angle
+
+            legend_y = center_y + (index - len(values) / 2.0) * 12 + 9
+            svg.append("<rect x=\"180\" y=\"{0:.1f}\" width=\"8\" height=\"8\" fill=\"{1}\"/>"
+                       "<text x=\"193\" y=\"{2:.1f}\">{3}</text>"
+                       "<text x=\"{4}\" y=\"{2:.1f}\" text-anchor=\"end\">{5:.2f}</text>".format(
+                           legend_y - 7, color, legend_y, html.escape(str(label)[:20]), width - 10, value))
+        svg.append("</svg>")
+        return "\n".join(svg)
+
+    def get_headshot(self, url):
+        # headshots are embedded so that the html page is self-contained
+        local_img_path = self.headshot_cache.get_thumbnail(url, 72) if self.headshot_cache and url else None
+        if local_img_path is None:
+            return ""
+        with open(local_img_path, "rb") as img_file:
+            return "<img src=\"data:image/png;base64,{}\" width=\"72\" alt=\"\">".format(
+                base64.b64encode(img_file.read()).decode("ascii"))
+
+    def render_section(self, section):
+        anchor = "section-{}".format(section["key"])
+        self.toc.append((anchor, section["title"]))
+
+        rows = []
+        for index, row in enumerate(section["rows"]):
+            row_class = section["row_classes"][index] if index < len(section["row_classes"]) else ""
+            rows.append("<tr{}>{}</tr>".format(
+                " class=\"{}\"".format(row_class) if row_class else "",
+                "".join("<td>{}</td>".format(html.escape(str(value))) for value in row)))
+
+        return self.section_template.substitute(
+            anchor=anchor,
+            title=html.escape(section["title"]),
+            subtitle="<p class=\"subtitle\">{}</p>".format(html.escape(section["subtitle"]))
+            if section.get("subtitle") else "",
+            headers="<tr>{}</tr>".format("".join("<th>{}</th>".format(html.escape(header))
+                                                 for header in section["headers"])),
+            rows="\n".join(rows),
+            footnote="<p class=\"footnote\">{}</p>".format(html.escape(section["footnote"]))
+            if section.get("footnote") else ""
+        )
+
+    def render_team_section(self, team_number, team):
+        anchor = "team-{}".format(team_number)
+        self.toc.append((anchor, team["name"]))
+
+        bad_boy_rows = team["bad_boys"] or [["N/A", "N/A", "N/A"]]
+        return self.team_section_template.substitute(
+            anchor=anchor,
+            team_name=html.escape(team["name"]),
+            weekly_pie_chart=self.create_pie_chart(team["weekly_points_by_position"]),
+            season_pie_chart=self.create_pie_chart(team["season_average_points_by_position"]),
+            bad_boy_rows="\n".join("<tr>{}</tr>".format("".join("<td>{}</td>".format(html.escape(str(value)))
+                                                                for value in row)) for row in bad_boy_rows),
+            boom_player=html.escape("{} -- {}".format(team["boom"]["name"], team["boom"]["nfl_team"])),
+            bust_player=html.escape("{} -- {}".format(team["bust"]["name"], team["bust"]["nfl_team"])),
+            boom_headshot=self.get_headshot(team["boom"]["headshot_url"]),
+            bust_headshot=self.get_headshot(team["bust"]["headshot_url"]),
+            boom_points=team["boom"]["fantasy_points"],
+            bust_points=team["bust"]["fantasy_points"]
+        )
+
+    def generate_html(self, filename_with_path, line_chart_data_list):
+        """ Write the report as a self-contained html page and a json document of the same data.
+
+        :return: path of the html page
+        """
+        sections_data = self.get_sections_data()
+        charts_data = self.get_charts_data(line_chart_data_list)
+        teams_data = self.get_teams_data()
+        num_weeks = len(line_chart_data_list[2][0]) if line_chart_data_list[2] else 0
+
+        self.toc = []
+        sections = [self.render_section(section) for section in sections_data]
+        self.toc.append(("section-charts", "Weekly Charts"))
+        sections.append("<section id=\"section-charts\">\n{}\n</section>".format(
+            "\n".join(self.create_line_chart(chart, num_weeks) for chart in charts_data)))
+        sections.extend(self.render_team_section(team_number, team)
+                        for team_number, team in enumerate(teams_data, start=1))
+
+        report_html = self.report_template.substitute(
+            title=html.escape(self.report_title_text),
+            toc="\n".join("<tr><td><a href=\"#{}\">{}</a></td></tr>".format(anchor, html.escape(title))
+                          for anchor, title in self.toc),
+            sections="\n".join(sections),
+            footer=self.report_footer_text
+        )
+
+        html_filename = os.path.splitext(filename_with_path)[0] + ".html"
+        with open(html_filename, "w", encoding="utf-8") as html_file:
+            html_file.write(report_html)
+
+        report_json = {
+            "title": self.report_title_text,
+            "league_id": self.league_id,
+            "week": self.week,
+            "sections": {section["key"]: {"title": section["title"], "headers": section["headers"],
+                                          "rows": section["rows"]} for section in sections_data},
+            "charts": {chart["key"]: {"title": chart["title"], "series_names": chart["series_names"],
+                                      "data": chart["data"]} for chart in charts_data},
+            "teams": [{
+                "name": team["name"],
+                "weekly_points_by_position": team["weekly_points_by_position"],
+                "season_average_points_by_position": team["season_average_points_by_position"],
+                "bad_boys": team["bad_boys"],
+                "boom": {key: team["boom"][key] for key in ["name", "nfl_team", "fantasy_points"]},
+                "bust": {key: team["bust"][key] for key in ["name", "nfl_team", "fantasy_points"]},
+            } for team in teams_data]
+        }
+        with open(os.path.splitext(filename_with_path)[0] + ".json", "w", encoding="utf-8") as json_file:
+            json.dump(report_json, json_file, indent=2, default=to_json_value)
+
+        return html_filename
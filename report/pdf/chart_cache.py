@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import reportlab
+from reportlab.graphics import shapes
+from reportlab.graphics.shapes import Drawing, Group, UserNode
+from reportlab.lib import attrmap, colors, validators
+
+# the only objects a cached chart is made of (its shapes, their colors, and the attribute maps and validators of the
+# shape classes), so that a chart file of the (possibly shared) cache directory cannot make the report load anything
+# else
+CHART_GLOBALS = {
+    ("reportlab.graphics.shapes", "Drawing"): shapes.Drawing,
+    ("reportlab.graphics.shapes", "Group"): shapes.Group,
+    ("reportlab.graphics.shapes", "Circle"): shapes.Circle,
+    ("reportlab.graphics.shapes", "Ellipse"): shapes.Ellipse,
+    ("reportlab.graphics.shapes", "Line"): shapes.Line,
+    ("reportlab.graphics.shapes", "PolyLine"): shapes.PolyLine,
+    ("reportlab.graphics.shapes", "Polygon"): shapes.Polygon,
+    ("reportlab.graphics.shapes", "Rect"): shapes.Rect,
+    ("reportlab.graphics.shapes", "String"): shapes.String,
+    ("reportlab.graphics.shapes", "Wedge"): shapes.Wedge,
+    ("reportlab.lib.attrmap", "AttrMap"): attrmap.AttrMap,
+    ("reportlab.lib.attrmap", "AttrMapValue"): attrmap.AttrMapValue,
+    ("reportlab.lib.colors", "Color"): colors.Color,
+    ("reportlab.lib.colors", "CMYKColor"): colors.CMYKColor,
+    ("reportlab.lib.colors", "PCMYKColor"): colors.PCMYKColor,
+    ("reportlab.lib.validators", "NoneOr"): validators.NoneOr,
+    ("reportlab.lib.validators", "OneOf"): validators.OneOf,
+    ("reportlab.lib.validators", "SequenceOf"): validators.SequenceOf,
+    ("reportlab.lib.validators", "_isAnything"): validators._isAnything,
+    ("reportlab.lib.validators", "_isBoolean"): validators._isBoolean,
+    ("reportlab.lib.validators", "_isColorOrNone"): validators._isColorOrNone,
+    ("reportlab.lib.validators", "_isListOfShapes"): validators._isListOfShapes,
+    ("reportlab.lib.validators", "_isNumber"): validators._isNumber,
+    ("reportlab.lib.validators", "_isNumberOrNone"): validators._isNumberOrNone,
+    ("reportlab.lib.validators", "_isString"): validators._isString,
+    ("reportlab.lib.validators", "_isTransform"): validators._isTransform,
+    ("reportlab.lib.validators", "_isValidChildOrNone"): validators._isValidChildOrNone
+}
+
+
+class ChartUnpickler(pickle.Unpickler):
+    """ Unpickler that only resolves the objects in CHART_GLOBALS, looked up by their exact module and name (never by
+    importing or by following dotted names).
+    """
+
+    def find_class(self, module, name):
+        chart_global = CHART_GLOBALS.get((module, name))
+        if chart_global is None or "." in name:
+            raise pickle.UnpicklingError("{}.{} is not part of a chart".format(module, name))
+        return chart_global
+
+
+class ChartCache(object):
+    """ Charts stored on disk in their rendered vector form (the chart widgets expanded into plain shapes), keyed by a
+    hash of the chart type, its input data, and its style, so that re-running a report does not lay out unchanged
+    charts again.
+    """
+
+    # bump when the look of LineChartGenerator or BreakdownPieDrawing changes so that old cached charts are ignored
+    chart_style_version = 2
+
+    def __init__(self, cache_dir, max_size_mb=64, max_age_days=30):
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 * 1024
+        self.max_age = max_age_days * 24 * 60 * 60
+        if self.cache_dir:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir, exist_ok=True)
+            self.evict()
+
+    def evict(self):
+        """ Remove the charts (and temporary files left by interrupted reports) that have not been used for longer than
+        the maximum age, then the least recently used charts until the cache is within its maximum size.
+        """
+        now = time.time()
+        chart_files = []
+        for file_name in os.listdir(self.cache_dir):
+            if not (file_name.endswith(".pickle") or file_name.endswith(".tmp")):
+                continue
+            chart_file = os.path.join(self.cache_dir, file_name)
+            try:
+                file_stat = os.stat(chart_file)
+            except OSError:
+                continue
+            chart_files.append((file_stat.st_mtime, file_stat.st_size, chart_file))
+
+        cache_size = sum(file_size for _, file_size, _ in chart_files)
+        for last_used, file_size, chart_file in sorted(chart_files):
+            if (self.max_age <= 0 or now - last_used <= self.max_age) and \
+                    (self.max_size <= 0 or cache_size <= self.max_size):
+                break
+            self.remove(chart_file)
+            cache_size -= file_size
+
+    @staticmethod
+    def remove(chart_file):
+        try:
+            os.remove(chart_file)
+        except OSError:
+            pass
+
+    def get_key(self, chart_type, chart_args):
+        key_data = json.dumps([chart_type, chart_args, self.chart_style_version, reportlab.Version],
+                              sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha1(key_data.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def to_plain_value(cls, value):
+        """ Convert the numpy numbers of chart data (at any depth of lists and tuples) to python numbers, so that
+        cached charts never contain numpy objects.
+        """
+        if isinstance(value, np.generic):
+            return value.item()
+        elif isinstance(value, (list, tuple)):
+            return type(value)(cls.to_plain_value(item) for item in value)
+        return value
+
+    @classmethod
+    def expand_shape(cls, shape):
+        """ Replace chart widgets (at any depth) with the plain shapes they draw, which unlike the widgets can be
+        pickled and are drawn without any further layout.
+        """
+        if isinstance(shape, UserNode):
+            return cls.expand_shape(shape.provideNode())
+        elif isinstance(shape, Drawing):
+            expanded_shape = Drawing(shape.width, shape.height)
+            for attribute in ["background", "hAlign", "vAlign", "renderScale"]:
+                setattr(expanded_shape, attribute, getattr(shape, attribute))
+        elif isinstance(shape, Group):
+            expanded_shape = Group()
+        else:
+            # primitive shapes of the newly created chart are not shared with anything else
+            for attribute, value in list(shape.__dict__.items()):
+                shape.__dict__[attribute] = cls.to_plain_value(value)
+            return shape
+
+        expanded_shape.transform = cls.to_plain_value(shape.transform[:])
+        for child in shape.contents:
+            expanded_shape.add(cls.expand_shape(child))
+        return expanded_shape
+
+    def get_drawing(self, chart_type, chart_args, create_drawing):
+        """ Get a chart drawing from the cache, or create it with the given function and add it to the cache.
+
+        :param chart_type: name of the chart type
+        :param chart_args: json serializable data and style arguments that fully determine the chart
+        :param create_drawing: function that creates the chart drawing from the arguments
+        :return: reportlab Drawing
+        """
+        if not self.cache_dir:
+            return create_drawing()
+
+        chart_file = os.path.join(self.cache_dir, "{}_{}.pickle".format(chart_type, self.get_key(chart_type,
+                                                                                                 chart_args)))
+        if os.path.exists(chart_file):
+            try:
+                with open(chart_file, "rb") as chart_in:
+                    drawing = ChartUnpickler(chart_in).load()
+                if not isinstance(drawing, Drawing):
+                    raise pickle.UnpicklingError("not a chart drawing")
+                # the modification time of a chart is when it was last used, for the eviction of unused charts
+                os.utime(chart_file)
+                return drawing
+            except Exception as e:
+                print("Unable to read cached chart {} ({}), creating it again.".format(chart_file, e))
+                self.remove(chart_file)
+
+        drawing = self.expand_shape(create_drawing())
+
+        # write to a temporary file first so that reports running at the same time never read a partial chart
+        temp_chart_file = "{}.{}.tmp".format(chart_file, os.getpid())
+        with open(temp_chart_file, "wb") as chart_out:
+            pickle.dump(drawing, chart_out, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_chart_file, chart_file)
+
+        return drawing
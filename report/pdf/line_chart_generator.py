@@ -42,8 +42,7 @@ class LineChartGenerator(_DrawingEditorMixin, Drawing):
         self.chart.x = 45
         self.chart.strokeWidth = 1
 
-        for color in series_colors_cmyk:
-            index = series_colors_cmyk.index(color)
+        for index, color in enumerate(series_colors_cmyk):
             self.chart.lines[index].strokeColor = PCMYKColor(color[0], color[1], color[2], color[3], alpha=color[4])
             self.chart.lines[index].symbol = makeMarker('FilledCircle')
             self.chart.lines[index].symbol.strokeColor = PCMYKColor(color[0], color[1], color[2], color[3],
@@ -2,6 +2,15 @@
 # contributors: Kevin N., Joe M., /u/softsign
 
 import copy
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, NameObject
 
 from reportlab.graphics.shapes import Line, Drawing
 from reportlab.lib import colors
@@ -17,9 +26,26 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.platypus import Spacer
 from reportlab.rl_settings import canvas_basefontname as bfn
 
+from report.pdf.chart_cache import ChartCache
 from report.pdf.line_chart_generator import LineChartGenerator
 from report.pdf.pie_chart_generator import BreakdownPieDrawing
 from report.pdf.utils import get_image
+from utils.stage_profiler import profiler
+
+# table of contents links to team sections built as separate pdf fragments are resolved when the fragments are merged
+TEAM_SECTION_LINK_PREFIX = "team-section:"
+
+# pdf generator used by the team pages process pool
+team_pages_generator = None
+
+
+def set_team_pages_generator(pdf_generator):
+    global team_pages_generator
+    team_pages_generator = pdf_generator
+
+
+def build_team_stats_fragment(team_fragment):
+    return team_pages_generator.build_team_stats_fragment(team_fragment)
 
 
 class PdfGenerator(object):
@@ -30,6 +56,7 @@ class PdfGenerator(object):
                  num_regular_season_weeks,
                  week,
                  test_dir,
+                 headshot_cache,
                  break_ties_bool,
                  report_title_text,
                  report_footer_text,
@@ -42,9 +69,22 @@ class PdfGenerator(object):
         self.num_regular_season_weeks = num_regular_season_weeks
         self.week = week
         self.test_dir = test_dir
+        self.headshot_cache = headshot_cache
+        # charts are reused from earlier reports when their data and style have not changed
+        self.chart_cache = ChartCache(
+            self.config.get("Fantasy_Football_Report_Settings", "chart_cache_directory", fallback=None),
+            max_size_mb=self.config.getint("Fantasy_Football_Report_Settings", "chart_cache_max_size_mb",
+                                           fallback=64),
+            max_age_days=self.config.getint("Fantasy_Football_Report_Settings", "chart_cache_max_age_days",
+                                            fallback=30))
+        # headshots used in this document, each embedded only once
+        self.headshot_images = {}
         self.break_ties_bool = break_ties_bool
         self.current_standings_data = report_info_dict.get("current_standings_data")
         self.playoff_probs_data = report_info_dict.get("playoff_probs_data")
+        self.playoff_leverage_data = report_info_dict.get("playoff_leverage_data")
+        self.championship_probs_data = report_info_dict.get("championship_probs_data")
+        self.championship_probs_headers = [report_info_dict.get("championship_probs_headers")]
         self.score_results_data = report_info_dict.get("score_results_data")
         self.coaching_efficiency_results_data = report_info_dict.get("coaching_efficiency_results_data")
         self.luck_results_data = report_info_dict.get("luck_results_data")
@@ -75,6 +115,7 @@ class PdfGenerator(object):
         self.weekly_points_by_position_data = report_info_dict.get("weekly_points_by_position_data")
         self.season_average_team_points_by_position = report_info_dict.get("season_average_points_by_position")
         self.weekly_top_scorers = report_info_dict.get("weekly_top_scorers")
+        self.all_time_leaderboards = report_info_dict.get("all_time_leaderboards")
 
         # table of contents
         self.toc = TableOfContents(self.break_ties_bool)
@@ -184,6 +225,10 @@ class PdfGenerator(object):
         ]
         self.playoff_probs_col_widths = [1.75 * inch, 0.90 * inch, 0.90 * inch, 0.65 * inch, 0.65 * inch] +\
                                         [round(3.3 / self.playoff_slots, 2) * inch] * self.playoff_slots
+        self.playoff_leverage_headers = [["Team", "Manager", "Opponent", "Playoffs", "With Win", "With Loss",
+                                          "Leverage"]]
+        self.playoff_leverage_col_widths = [1.75 * inch, 1.00 * inch, 1.75 * inch, 0.80 * inch, 0.80 * inch,
+                                            0.80 * inch, 0.85 * inch]
         self.bad_boy_col_widths = [0.75 * inch, 1.75 * inch, 1.25 * inch, 1.25 * inch, 1.75 * inch, 1.00 * inch]
         self.power_ranking_headers = [["Power Rank", "Team", "Manager", "Season Avg. (Place)"]]
         self.scores_headers = [["Place", "Team", "Manager", "Points", "Season Avg. (Place)"]]
@@ -192,6 +237,14 @@ class PdfGenerator(object):
         self.luck_headers = [["Place", "Team", "Manager", "Luck (%)", "Season Avg. (Place)"]]
         self.bad_boy_headers = [["Place", "Team", "Manager", "Bad Boy Pts", "Worst Offense", "# Offenders"]]
         self.zscores_headers = [["Place", "Team", "Manager", "Z-Score"]]
+        self.all_time_scores_headers = [["Place", "Season", "Week", "Team", "Manager", "Points"]]
+        self.all_time_efficiency_headers = [["Place", "Season", "Week", "Team", "Manager", "Coaching Efficiency (%)"]]
+        self.all_time_careers_headers = [["Place", "Manager", "Seasons", "Weeks", "Avg. Points",
+                                          "Avg. Coaching Efficiency (%)", "Avg. Luck (%)"]]
+        self.all_time_weeks_col_widths = [0.65 * inch, 0.80 * inch, 0.65 * inch, 1.90 * inch, 1.75 * inch,
+                                          2.00 * inch]
+        self.all_time_careers_col_widths = [0.65 * inch, 1.75 * inch, 0.75 * inch, 0.75 * inch, 1.10 * inch,
+                                            1.85 * inch, 1.25 * inch]
         self.tie_for_first_footer = "<i>&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;*Tie(s).</i>"
         # self.break_efficiency_ties_footer = "<i>&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;*The league commissioner will " \
         #                                     "resolve coaching efficiency ties manually. The tiebreaker goes " \
@@ -240,13 +293,12 @@ class PdfGenerator(object):
                        [Paragraph(report_footer_text, getSampleStyleSheet()["Normal"])]]
         self.report_footer = Table(footer_data, colWidths=7.75 * inch)
 
-    # noinspection PyUnusedLocal
     @staticmethod
     def add_page_number(canvas, doc):
         """
-        Add the page number
+        Add the page number (offset for report fragments that do not start on the first page)
         """
-        page_num = canvas.getPageNumber()
+        page_num = canvas.getPageNumber() + getattr(doc, "first_page_number", 1) - 1
         text = "Page %s" % page_num
         canvas.drawRightString(4.45 * inch, 0.25 * inch, text)
 
@@ -254,6 +306,12 @@ class PdfGenerator(object):
         self.toc.add_toc_page()
         return PageBreak()
 
+    def get_toc_height(self, doc):
+        """ Get the height left on the first page for the table of contents, below the report title and spacer.
+        """
+        # frames pad their content by 6 points on each side
+        return doc.height - 12 - self.report_title.wrap(doc.width, doc.height)[1] - self.spacer_half_inch.height
+
     def set_tied_values_style(self, num_tied_values, table_style_list, metric_type):
 
         num_tied_for_first = num_tied_values
@@ -325,7 +383,7 @@ class PdfGenerator(object):
         # self.toc.add_metric_section(title._cellvalues[0][0].getPlainText())
 
         title = self.create_title(title_text, element_type="section",
-                                  anchor="<a name = page.html#" + str(self.toc.get_current_anchor()) + "></a>",
+                                  anchor="<a name=\"" + str(self.toc.get_current_anchor()) + "\"/>",
                                   subtitle_text=subtitle_text)
         self.toc.add_metric_section(title_text)
 
@@ -452,8 +510,7 @@ class PdfGenerator(object):
             table.setStyle(self.style)
         return table
 
-    @staticmethod
-    def create_line_chart(data, data_length, series_names, chart_title, x_axis_title, y_axis_title, y_step):
+    def create_line_chart(self, data, data_length, series_names, chart_title, x_axis_title, y_axis_title, y_step):
 
         # see https://sashat.me/2017/01/11/list-of-20-simple-distinct-colors/ for colors
         series_colors = [
@@ -470,25 +527,34 @@ class PdfGenerator(object):
             [100, 0, 0, 50, 100],  # teal
             [10, 25, 0, 0, 100]  # lavender
         ]
+        # colors are repeated in leagues with more teams than colors
+        series_colors = [series_colors[index % len(series_colors)] for index in range(len(series_names))]
 
         box_width = 550
         box_height = 240
         chart_width = 490
         chart_height = 150
 
-        # fit y-axis of table
-        values = [weeks[1] for teams in data for weeks in teams]
-        values_min = min(values)
-        values_max = max(values)
+        def create_drawing():
+            # fit y-axis of table
+            values = [weeks[1] for teams in data for weeks in teams]
+            values_min = min(values)
+            values_max = max(values)
 
-        points_line_chart = LineChartGenerator(series_colors, box_width, box_height, chart_width, chart_height)
-        points_line_chart.make_title(chart_title)
-        points_line_chart.make_data(data)
-        points_line_chart.make_x_axis(x_axis_title, 0, data_length + 1, 1)
-        points_line_chart.make_y_axis(y_axis_title, values_min, values_max, y_step)
-        points_line_chart.make_series_labels(series_names)
+            points_line_chart = LineChartGenerator(series_colors, box_width, box_height, chart_width, chart_height)
+            points_line_chart.make_title(chart_title)
+            points_line_chart.make_data(data)
+            points_line_chart.make_x_axis(x_axis_title, 0, data_length + 1, 1)
+            points_line_chart.make_y_axis(y_axis_title, values_min, values_max, y_step)
+            points_line_chart.make_series_labels(series_names)
 
-        return points_line_chart
+            return points_line_chart
+
+        return self.chart_cache.get_drawing(
+            "line_chart",
+            [data, data_length, series_names, chart_title, x_axis_title, y_axis_title, y_step, series_colors,
+             box_width, box_height, chart_width, chart_height],
+            create_drawing)
 
     @staticmethod
     def get_image(path, width=1 * inch):
@@ -497,84 +563,104 @@ class PdfGenerator(object):
         aspect = ih / float(iw)
         return Image(path, width=width, height=(width * aspect))
 
+    def create_pie_chart(self, labels, data):
+        with profiler.stage("charts"):
+            return self.chart_cache.get_drawing("pie_chart", [labels, data], lambda: BreakdownPieDrawing(labels, data))
+
+    def get_team_headshots(self, best_weekly_player, worst_weekly_player):
+        with profiler.stage("headshots"):
+            best_player_headshot = get_image(best_weekly_player["headshot_url"], self.headshot_cache, 1 * inch,
+                                             self.headshot_images)
+            worst_player_headshot = get_image(worst_weekly_player["headshot_url"], self.headshot_cache, 1 * inch,
+                                              self.headshot_images)
+        return best_player_headshot, worst_player_headshot
+
+    def get_boom_and_bust_players(self, team_name):
+        starting_players = [player for player in self.team_data[team_name]["players"]
+                            if player["selected_position"] != "BN"]
+        starting_players = sorted(starting_players, key=lambda x: x["fantasy_points"], reverse=True)
+        return starting_players[0], starting_players[-1]
+
+    def create_team_stats_page(self, team, season_average_team_data_by_position, anchor):
+        doc_elements = []
+
+        title = self.create_title("<i>" + team[0] + "</i>", element_type="section",
+                                  anchor="<a name=\"" + str(anchor) + "\"/>")
+
+        doc_elements.append(title)
+
+        labels = []
+        weekly_data = []
+        season_data = [x[1] for x in season_average_team_data_by_position.get_team_season_averages(team[0])]
+        for week in team[1]:
+            labels.append(week[0])
+            weekly_data.append(week[1])
+        team_table = Table(
+            [[self.create_title("Weekly Points by Position", title_width=2.00),
+              self.create_title("Season Average Points by Position", title_width=2.00)],
+             [self.create_pie_chart(labels, weekly_data),
+              self.create_pie_chart(labels, season_data)]],
+            colWidths=[4.25 * inch, 4.25 * inch],
+            style=TableStyle([
+                ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.white),
+                ("BOX", (0, 0), (-1, -1), 0.25, colors.white),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("VALIGN", (0, 0), (-1, 0), "MIDDLE")
+            ]))
+        doc_elements.append(team_table)
+
+        offending_players = []
+        player_info = self.team_data[team[0]]["players"]
+        for player in player_info:
+            if player["bad_boy_points"] > 0:
+                offending_players.append(player)
+
+        doc_elements.append(self.spacer_half_inch)
+        doc_elements.append(self.create_title("Whodunnit?", 8.5, "section"))
+        doc_elements.append(self.spacer_tenth_inch)
+        offending_players = sorted(offending_players, key=lambda x: x["bad_boy_points"], reverse=True)
+        offending_players_data = []
+        for player in offending_players:
+            offending_players_data.append([player["name"], player["bad_boy_points"], player["bad_boy_crime"]])
+        # if there are no offending players, add a dummy row to avoid breaking
+        if not offending_players_data:
+            offending_players_data = [["N/A", "N/A", "N/A"]]
+        bad_boys_table = self.create_data_table([["Starting Player", "Bad Boy Points", "Worst Offense"]],
+                                                offending_players_data,
+                                                self.style_red_highlight,
+                                                self.style_tied_bad_boy,
+                                                [2.50 * inch, 2.50 * inch, 2.75 * inch])
+
+        best_weekly_player, worst_weekly_player = self.get_boom_and_bust_players(team[0])
+
+        doc_elements.append(bad_boys_table)
+
+        doc_elements.append(self.spacer_tenth_inch)
+
+        best_player_headshot, worst_player_headshot = self.get_team_headshots(best_weekly_player, worst_weekly_player)
+
+        data = [["BOOOOOOOOM", "...b... U... s... T"],
+                [best_weekly_player["name"] + " -- " + best_weekly_player["nfl_team"],
+                 worst_weekly_player["name"] + " -- " + worst_weekly_player["nfl_team"]],
+                [best_player_headshot, worst_player_headshot],
+                [best_weekly_player["fantasy_points"], worst_weekly_player["fantasy_points"]]]
+        table = Table(data, colWidths=4.0 * inch)
+        table.setStyle(self.boom_bust_table_style)
+        doc_elements.append(self.spacer_half_inch)
+        doc_elements.append(self.create_title("Boom... or Bust", 8.5, "section"))
+        doc_elements.append(self.spacer_tenth_inch)
+        doc_elements.append(table)
+
+        return doc_elements
+
     def create_team_stats_pages(self, doc_elements, weekly_team_data_by_position, season_average_team_data_by_position):
         team_number = 1
         alphabetical_teams = sorted(weekly_team_data_by_position, key=lambda team_info: team_info[0])
         for team in alphabetical_teams:
 
-            title = self.create_title("<i>" + team[0] + "</i>", element_type="section",
-                                      anchor="<a name = page.html#" + str(self.toc.get_current_anchor()) + "></a>")
+            anchor = self.toc.get_current_anchor()
             self.toc.add_team_section(team[0])
-
-            doc_elements.append(title)
-
-            labels = []
-            weekly_data = []
-            season_data = [x[1] for x in season_average_team_data_by_position.get(team[0])]
-            for week in team[1]:
-                labels.append(week[0])
-                weekly_data.append(week[1])
-            team_table = Table(
-                [[self.create_title("Weekly Points by Position", title_width=2.00),
-                  self.create_title("Season Average Points by Position", title_width=2.00)],
-                 [BreakdownPieDrawing(labels, weekly_data),
-                  BreakdownPieDrawing(labels, season_data)]],
-                colWidths=[4.25 * inch, 4.25 * inch],
-                style=TableStyle([
-                    ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.white),
-                    ("BOX", (0, 0), (-1, -1), 0.25, colors.white),
-                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                    ("VALIGN", (0, 0), (-1, 0), "MIDDLE")
-                ]))
-            doc_elements.append(team_table)
-
-            offending_players = []
-            starting_players = []
-            player_info = self.team_data[team[0]]["players"]
-            for player in player_info:
-                if player["bad_boy_points"] > 0:
-                    offending_players.append(player)
-                if player["selected_position"] != "BN":
-                    starting_players.append(player)
-
-            doc_elements.append(self.spacer_half_inch)
-            doc_elements.append(self.create_title("Whodunnit?", 8.5, "section"))
-            doc_elements.append(self.spacer_tenth_inch)
-            offending_players = sorted(offending_players, key=lambda x: x["bad_boy_points"], reverse=True)
-            offending_players_data = []
-            for player in offending_players:
-                offending_players_data.append([player["name"], player["bad_boy_points"], player["bad_boy_crime"]])
-            # if there are no offending players, add a dummy row to avoid breaking
-            if not offending_players_data:
-                offending_players_data = [["N/A", "N/A", "N/A"]]
-            bad_boys_table = self.create_data_table([["Starting Player", "Bad Boy Points", "Worst Offense"]],
-                                                    offending_players_data,
-                                                    self.style_red_highlight,
-                                                    self.style_tied_bad_boy,
-                                                    [2.50 * inch, 2.50 * inch, 2.75 * inch])
-
-            starting_players = sorted(starting_players, key=lambda x: x["fantasy_points"], reverse=True)
-            best_weekly_player = starting_players[0]
-            worst_weekly_player = starting_players[-1]
-          
-            doc_elements.append(bad_boys_table)
-
-            doc_elements.append(self.spacer_tenth_inch)
-
-            best_player_headshot = get_image(best_weekly_player["headshot_url"], self.test_dir, self.week, 1 * inch)
-            worst_player_headshot = get_image(worst_weekly_player["headshot_url"], self.test_dir, self.week, 1 * inch)
-
-            data = [["BOOOOOOOOM", "...b... U... s... T"],
-                    [best_weekly_player["name"] + " -- " + best_weekly_player["nfl_team"],
-                     worst_weekly_player["name"] + " -- " + worst_weekly_player["nfl_team"]],
-                    [best_player_headshot, worst_player_headshot],
-                    [best_weekly_player["fantasy_points"], worst_weekly_player["fantasy_points"]]]
-            table = Table(data, colWidths=4.0 * inch)
-            table.setStyle(self.boom_bust_table_style)
-            doc_elements.append(self.spacer_half_inch)
-            doc_elements.append(self.create_title("Boom... or Bust", 8.5, "section"))
-            doc_elements.append(self.spacer_tenth_inch)
-            doc_elements.append(table)
+            doc_elements.extend(self.create_team_stats_page(team, season_average_team_data_by_position, anchor))
 
             if team_number == len(alphabetical_teams):
                 doc_elements.append(Spacer(1, 1.75 * inch), )
@@ -587,6 +673,110 @@ class PdfGenerator(object):
             #     doc_elements.append(self.page_break)
             team_number += 1
 
+    def build_fragment(self, filename, elements, first_page):
+        """ Build part of the report as its own pdf, numbering its pages from the given first page.
+        """
+        doc = SimpleDocTemplate(filename, pagesize=LETTER, rightMargin=25, leftMargin=25, topMargin=10,
+                                bottomMargin=10)
+        doc.pagesize = portrait(LETTER)
+        doc.first_page_number = first_page
+        doc.build(elements, onFirstPage=self.add_page_number, onLaterPages=self.add_page_number)
+        return len(PdfReader(filename).pages)
+
+    def build_team_stats_fragment(self, team_fragment):
+        """ Build the stats pages of one team as a pdf fragment (run in the team pages process pool).
+        """
+        team, anchor, first_page, filename, last_team_bool = team_fragment
+        elements = self.create_team_stats_page(team, self.season_average_team_points_by_position, anchor)
+        if last_team_bool:
+            elements.append(Spacer(1, 1.75 * inch))
+        return self.build_fragment(filename, elements, first_page)
+
+    def create_team_stats_fragments(self, weekly_team_data_by_position, fragment_dir):
+        """ Add the team sections to the table of contents, and create the (not yet built) pdf fragment of each team,
+        expecting each team section to fill one page like the table of contents does.
+        """
+        team_fragments = []
+        alphabetical_teams = sorted(weekly_team_data_by_position, key=lambda team_info: team_info[0])
+        for team_number, team in enumerate(alphabetical_teams, start=1):
+            anchor = self.toc.get_current_anchor()
+            first_page = self.toc.toc_page
+            self.toc.add_team_section(team[0], link_prefix=TEAM_SECTION_LINK_PREFIX)
+            if team_number < len(alphabetical_teams):
+                self.toc.add_toc_page()
+
+            # headshots are downloaded and scaled before the team pages are built in other processes
+            self.get_team_headshots(*self.get_boom_and_bust_players(team[0]))
+
+            team_fragments.append([team, anchor, first_page,
+                                   os.path.join(fragment_dir, "team_{}.pdf".format(team_number)),
+                                   team_number == len(alphabetical_teams)])
+        return team_fragments
+
+    def generate_pdf_with_team_fragments(self, filename_with_path, doc, elements, num_processes):
+        """ Build the team stats pages as separate pdf fragments in a process pool while the rest of the report is built
+        in this process, then merge them into the final report with continuous page numbers and working team links in
+        the table of contents.
+        """
+        fragment_dir = tempfile.mkdtemp(prefix="team_pages_")
+        try:
+            with profiler.stage("team_pages"):
+                team_fragments = self.create_team_stats_fragments(self.weekly_points_by_position_data, fragment_dir)
+
+            # the last page break before the team pages is replaced by the start of the first team fragment
+            if isinstance(elements[-1], PageBreak):
+                elements.pop()
+            elements.insert(2, self.toc.get_toc(self.get_toc_height(doc)))
+
+            # forked processes use this generator as it is, so nothing in it needs to be pickled
+            with ProcessPoolExecutor(max_workers=num_processes, mp_context=multiprocessing.get_context("fork"),
+                                     initializer=set_team_pages_generator, initargs=(self,)) as executor:
+                team_page_counts = executor.map(build_team_stats_fragment, team_fragments)
+
+                print("generating PDF ({}) with team pages built in {} processes...".format(
+                    filename_with_path.split("/")[-1], num_processes))
+                with profiler.stage("doc_build"):
+                    doc.build(elements, onFirstPage=self.add_page_number, onLaterPages=self.add_page_number)
+                with profiler.stage("team_pages_wait"):
+                    team_page_counts = list(team_page_counts)
+
+            # rebuild fragments whose page numbers are off because an earlier part was longer or shorter than expected
+            next_page = len(PdfReader(doc.filename).pages) + 1
+            for team_fragment, team_page_count in zip(team_fragments, team_page_counts):
+                if team_fragment[2] != next_page:
+                    team_fragment[2] = next_page
+                    team_page_count = self.build_team_stats_fragment(team_fragment)
+                next_page += team_page_count
+
+            footer_filename = os.path.join(fragment_dir, "footer.pdf")
+            self.build_fragment(footer_filename, [self.report_footer], next_page)
+
+            writer = PdfWriter()
+            writer.append(doc.filename)
+            team_first_pages = {}
+            for team_fragment in team_fragments:
+                team_first_pages[str(team_fragment[1])] = len(writer.pages)
+                writer.append(team_fragment[3])
+            writer.append(footer_filename)
+
+            # point the team links of the table of contents at the first page of each team's fragment
+            for page in writer.pages:
+                for annotation in page.get("/Annots", []):
+                    annotation = annotation.get_object()
+                    uri = annotation.get("/A", {}).get("/URI", "")
+                    if uri.startswith(TEAM_SECTION_LINK_PREFIX):
+                        team_page = writer.pages[team_first_pages[uri[len(TEAM_SECTION_LINK_PREFIX):]]]
+                        del annotation["/A"]
+                        annotation[NameObject("/Dest")] = ArrayObject([team_page.indirect_reference,
+                                                                       NameObject("/Fit")])
+
+            with open(filename_with_path, "wb") as report_file:
+                writer.write(report_file)
+        finally:
+            shutil.rmtree(fragment_dir, ignore_errors=True)
+
+        return filename_with_path
+
     def generate_pdf(self, filename_with_path, line_chart_data_list):
 
         elements = []
@@ -654,6 +844,38 @@ class PdfGenerator(object):
         )
         elements.append(self.add_page_break())
 
+        # championship probabilities from the simulated playoff bracket
+        if self.championship_probs_data:
+            num_stages = len(self.championship_probs_headers[0]) - 2
+            self.create_section(
+                elements,
+                "Championship Probabilities",
+                self.championship_probs_headers,
+                self.championship_probs_data,
+                self.style,
+                self.style,
+                [1.75 * inch, 1.25 * inch] + [round(4.75 / num_stages, 2) * inch] * num_stages,
+                subtitle_text="Odds of reaching each round of the playoffs and winning the championship, with the "
+                              "score of every team in every playoff game drawn from its weekly scores."
+            )
+            elements.append(self.spacer_twentieth_inch)
+
+        # playoff leverage of the matchups of the next week
+        if self.playoff_leverage_data:
+            self.create_section(
+                elements,
+                "Playoff Leverage",
+                self.playoff_leverage_headers,
+                self.playoff_leverage_data,
+                self.style_no_highlight,
+                self.style_no_highlight,
+                self.playoff_leverage_col_widths,
+                subtitle_text="Playoff probabilities of every team with a win and with a loss in its week %s matchup, "
+                              "from the same simulations." % (int(self.week) + 1)
+            )
+        if self.championship_probs_data or self.playoff_leverage_data:
+            elements.append(self.add_page_break())
+
         # power ranking
         self.create_section(
             elements,
@@ -762,50 +984,108 @@ class PdfGenerator(object):
         points_data = line_chart_data_list[2]
         efficiency_data = line_chart_data_list[3]
         luck_data = line_chart_data_list[4]
-        zscore_data = line_chart_data_list[5]
+        zscore_data = line_chart_data_list[6]
 
-        # Remove any zeros from coaching efficiency to make table prettier
-        for team in efficiency_data:
-            week_index = 0
-            for week in team:
-                if len(team) > 1:
-                    if week[1] == 0.0:
-                        del team[week_index]
-                week_index += 1
+        # coaching efficiency data excludes disqualified (0.0) weeks to make table prettier
 
         # create line charts for points, coaching efficiency, and luck
-        elements.append(self.create_line_chart(points_data, len(points_data[0]), series_names, "Weekly Points", "Weeks",
-                                               "Fantasy Points", 10.00))
-        elements.append(self.spacer_twentieth_inch)
-        elements.append(
-            self.create_line_chart(efficiency_data, len(points_data[0]), series_names, "Weekly Coaching Efficiency",
-                                   "Weeks", "Coaching Efficiency (%)", 5.00))
-        elements.append(self.spacer_twentieth_inch)
-        elements.append(
-            self.create_line_chart(luck_data, len(points_data[0]), series_names, "Weekly Luck", "Weeks", "Luck (%)",
-                                   20.00))
+        with profiler.stage("charts"):
+            elements.append(self.create_line_chart(points_data, len(points_data[0]), series_names, "Weekly Points",
+                                                   "Weeks", "Fantasy Points", 10.00))
+            elements.append(self.spacer_twentieth_inch)
+            elements.append(
+                self.create_line_chart(efficiency_data, len(points_data[0]), series_names,
+                                       "Weekly Coaching Efficiency", "Weeks", "Coaching Efficiency (%)", 5.00))
+            elements.append(self.spacer_twentieth_inch)
+            elements.append(
+                self.create_line_chart(luck_data, len(points_data[0]), series_names, "Weekly Luck", "Weeks", "Luck (%)",
+                                       20.00))
         elements.append(self.spacer_tenth_inch)
         elements.append(self.add_page_break())
 
+        # all-time leaderboards of every season of the league stored in the history warehouse
+        if self.all_time_leaderboards and self.all_time_leaderboards["top_scores"]:
+            seasons = self.all_time_leaderboards["seasons"]
+            seasons_text = "Season {}".format(seasons[0]) if len(seasons) == 1 else "Seasons {} to {}".format(
+                seasons[0], seasons[-1])
+            self.create_section(
+                elements,
+                "All-Time Top Weekly Scores",
+                self.all_time_scores_headers,
+                self.all_time_leaderboards["top_scores"],
+                self.style,
+                self.style,
+                self.all_time_weeks_col_widths,
+                subtitle_text=seasons_text
+            )
+            elements.append(self.spacer_twentieth_inch)
+
+            self.create_section(
+                elements,
+                "All-Time Best Coaching Efficiency",
+                self.all_time_efficiency_headers,
+                self.all_time_leaderboards["top_coaching_efficiencies"],
+                self.style,
+                self.style,
+                self.all_time_weeks_col_widths,
+                subtitle_text=seasons_text
+            )
+            elements.append(self.add_page_break())
+
+            self.create_section(
+                elements,
+                "All-Time Career Luck",
+                self.all_time_careers_headers,
+                self.all_time_leaderboards["manager_careers"],
+                self.style,
+                self.style,
+                self.all_time_careers_col_widths,
+                subtitle_text="Weekly averages of every manager over {}".format(seasons_text.lower())
+            )
+            elements.append(self.add_page_break())
+
         # # Exclude z-score time series data unless it is determined to be relevant
         # elements.append(self.create_line_chart(zscore_data, len(points_data[0]), series_names, "Weekly Z-Score",
         #                                        "Weeks", "Z-Score", 5.00))
         # elements.append(self.spacer_tenth_inch)
         # elements.append(self.page_break)
 
+        num_team_page_processes = self.config.getint("Fantasy_Football_Report_Settings", "num_team_page_processes",
+                                                     fallback=0)
+        fork_team_pages_bool = num_team_page_processes > 0 and "fork" in multiprocessing.get_all_start_methods()
+        if fork_team_pages_bool:
+            # forking while other threads may hold locks is unsafe, so the headshot downloads are finished first
+            self.headshot_cache.shutdown()
+            if threading.active_count() > 1:
+                # other threads (like those of the report server) keep running, so the team pages are built here
+                print("Team pages built in this process, since other threads are running.")
+                fork_team_pages_bool = False
+
+        if fork_team_pages_bool:
+            # the main part of the report is built in this process and written next to the merged report
+            doc.filename = os.path.splitext(filename_with_path)[0] + "_main.pdf"
+            try:
+                return self.generate_pdf_with_team_fragments(filename_with_path, doc, elements,
+                                                             num_team_page_processes)
+            finally:
+                if os.path.exists(doc.filename):
+                    os.remove(doc.filename)
+
         # dynamically build additional pages for individual team stats
-        self.create_team_stats_pages(elements, self.weekly_points_by_position_data,
-                                     self.season_average_team_points_by_position)
+        with profiler.stage("team_pages"):
+            self.create_team_stats_pages(elements, self.weekly_points_by_position_data,
+                                         self.season_average_team_points_by_position)
 
         # insert table of contents after report title and spacer
-        elements.insert(2, self.toc.get_toc())
+        elements.insert(2, self.toc.get_toc(self.get_toc_height(doc)))
 
         elements.append(self.add_page_break())
         elements.append(self.report_footer)
 
         # build pdf
         print("generating PDF ({})...".format(filename_with_path.split("/")[-1]))
-        doc.build(elements, onFirstPage=self.add_page_number, onLaterPages=self.add_page_number)
+        with profiler.stage("doc_build"):
+            doc.build(elements, onFirstPage=self.add_page_number, onLaterPages=self.add_page_number)
 
         return doc.filename
 
@@ -852,19 +1132,19 @@ class TableOfContents(object):
             color = "blue"
 
         metric_section = [
-            Paragraph("<a href = page.html#" + str(self.toc_anchor) + " color=" + color + "><b><u>" + title + "</u></b></a>",
-                      self.toc_style_right),
+            Paragraph("<a href=\"#" + str(self.toc_anchor) + "\" color=" + color + "><b><u>" + title +
+                      "</u></b></a>", self.toc_style_right),
             Paragraph(". . . . . . . . . .", self.toc_style_center),
             Paragraph(str(self.toc_page), self.toc_style_left)
         ]
         self.toc_metric_section_data.append(metric_section)
         self.toc_anchor += 1
 
-    def add_team_section(self, team_name):
+    def add_team_section(self, team_name, link_prefix="#"):
 
         team_section = [
-            Paragraph("<a href = page.html#" + str(self.toc_anchor) + " color=blue><b><u>" + team_name + "</u></b></a>",
-                      self.toc_style_right),
+            Paragraph("<a href=\"" + link_prefix + str(self.toc_anchor) + "\" color=blue><b><u>" + team_name +
+                      "</u></b></a>", self.toc_style_right),
             Paragraph(". . . . . . . . . .", self.toc_style_center),
             Paragraph(str(self.toc_page), self.toc_style_left)
         ]
@@ -874,7 +1154,13 @@ class TableOfContents(object):
     def get_current_anchor(self):
         return self.toc_anchor
 
-    def get_toc(self):
+    def get_toc(self, available_height=None):
+
+        toc_data = self.toc_metric_section_data + [["", "", ""]] + self.toc_team_section_data
+
+        # the page numbers assume the table of contents fits on the first page, so rows of long ones are shorter
+        row_height = 0.35 * inch
+        if available_height:
+            row_height = min(row_height, available_height / len(toc_data))
 
-        return Table(self.toc_metric_section_data + [["", "", ""]] + self.toc_team_section_data,
-                     colWidths=[3.25 * inch, 2 * inch,  2.50 * inch], rowHeights=0.35 * inch)
+        return Table(toc_data, colWidths=[3.25 * inch, 2 * inch,  2.50 * inch], rowHeights=row_height)
@@ -1,23 +1,33 @@
 from reportlab.lib.utils import ImageReader
 from reportlab.platypus import Image
 from reportlab.lib.pagesizes import inch
-import urllib.request
-import os
 
 
-def get_image(path, test_dir, week, width=1 * inch):
+def get_image(url, headshot_cache, width=1 * inch, document_images=None):
+    """ Get a headshot scaled to the given width, using a thumbnail pre-scaled to that width.
 
-    img_name = path.split("/")[-1]
-    local_img_path = test_dir + "/week_" + week + "/player_headshots/" + img_name
+    :param document_images: dict of the images already used in the document, so that the size of each distinct image
+        is only read once and every use of it refers to the same file (which reportlab embeds only once)
+    """
+    if document_images is None:
+        document_images = {}
 
-    if not os.path.exists(local_img_path):
-        urllib.request.urlretrieve(path, local_img_path)
+    image_key = (url, width)
+    if image_key not in document_images:
+        local_img_path = headshot_cache.get_thumbnail(url, width)
+        if local_img_path is None:
+            document_images[image_key] = None
+        else:
+            img = ImageReader(local_img_path)
+            iw, ih = img.getSize()
+            aspect = ih / float(iw)
+            document_images[image_key] = (local_img_path, width * aspect)
 
-    img = ImageReader(local_img_path)
-    iw, ih = img.getSize()
-    aspect = ih / float(iw)
+    # leave the table cell empty if the headshot could not be downloaded
+    if document_images[image_key] is None:
+        return ""
 
-    scaled_img = Image(local_img_path, width=width, height=(width * aspect))
+    local_img_path, height = document_images[image_key]
+    scaled_img = Image(local_img_path, width=width, height=height)
 
     return scaled_img
-
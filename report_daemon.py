@@ -0,0 +1,171 @@
+# keep one warm process running for a league that generates its report as soon as each week of the season is over
+
+import datetime
+import getopt
+import sys
+import time
+from configparser import ConfigParser
+
+from calculate.bad_boy_stats import BadBoyStats
+from generate_report import publish_report
+from report.fantasy_football_report_builder import FantasyFootballReport
+from utils.yql_query import YqlQuery
+
+# local config vars
+config = ConfigParser()
+config.read("config.ini")
+
+usage = ("\nYahoo Fantasy Football report daemon usage:\n"
+         "     python report_daemon.py [-l <yahoo_league_id>] [-w <first_week>] [-i <poll_interval_minutes>] "
+         "-q -b -t -d -s -o <pdf|html> -u\n\n"
+         "the report of each week is generated once all of its matchups are over, starting from the current week of the "
+         "league (or -w), and published to google drive and/or slack as set in config.ini with -u\n")
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "hl:w:i:qbtdso:u")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+
+    options_dict = {}
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt in ("-l", "--league-id"):
+            options_dict["league_id"] = arg
+        elif opt in ("-w", "--week"):
+            if int(arg) < 1 or int(arg) > 17:
+                print("\nPlease select a valid week number between 1 and 17.")
+                sys.exit(2)
+            options_dict["week"] = int(arg)
+        elif opt in ("-i", "--interval"):
+            options_dict["poll_interval_minutes"] = float(arg)
+        elif opt in ("-q", "--disqualify-ce"):
+            options_dict["dq_ce_bool"] = True
+        elif opt in ("-b", "--break-ties"):
+            options_dict["break_ties_bool"] = True
+        elif opt in ("-t", "--test"):
+            options_dict["test_bool"] = True
+        elif opt in ("-d", "--dev"):
+            options_dict["dev_bool"] = True
+        elif opt in ("-s", "--save"):
+            options_dict["save_bool"] = True
+        elif opt in ("-o", "--output-format"):
+            if arg not in ["pdf", "html"]:
+                print("\nPlease select an output format of either 'pdf' or 'html'.")
+                sys.exit(2)
+            options_dict["output_format"] = arg
+        elif opt in ("-u", "--publish"):
+            options_dict["publish_bool"] = True
+
+    return options_dict
+
+
+class ReportDaemon(object):
+    """ Generate the report of a league for each week of the season as soon as the week is over, from one
+    long-running process. The oauth session, game data and bad boy data are loaded once and shared by every report,
+    and the metrics of the weeks already reported are kept so that each report only calculates its new week.
+    """
+
+    def __init__(self, league_id, options):
+
+        self.league_id = league_id
+        self.options = options
+        self.dev_bool = options.get("dev_bool", False)
+        self.poll_interval_minutes = options.get("poll_interval_minutes") or config.getfloat(
+            "Fantasy_Football_Report_Settings", "daemon_poll_interval_minutes", fallback=15)
+
+        # metrics of every week reported so far, by week number, reused by the reports of the following weeks
+        self.weekly_metrics = {}
+
+        # only the scoreboard of the current week is queried while waiting for its matchups to end
+        self.yql_query = YqlQuery(config, self.league_id, False, self.dev_bool, "test/league_id-" + self.league_id)
+        if not self.dev_bool:
+            self.yql_query.share_session()
+            BadBoyStats.shared_bad_boy_data = BadBoyStats(config, False, False, "").bad_boy_data
+        self.yql_query.get_league_key()
+
+        if options.get("week"):
+            self.week = options.get("week")
+        else:
+            self.week = int(self.yql_query.get_league_standings_data().loc[0, "current_week"])
+
+    def week_complete(self, week):
+        """ Check whether every matchup of the week is over.
+        """
+        self.yql_query.refresh_token()
+        matchups = self.yql_query.get_matchups_data(week)
+        return all(matchup.get("status") == "postevent" for matchup in matchups)
+
+    def generate_report(self, week):
+
+        fantasy_football_report = FantasyFootballReport(user_input_league_id=self.league_id,
+                                                        user_input_chosen_week=str(week),
+                                                        dq_ce_bool=self.options.get("dq_ce_bool", False),
+                                                        break_ties_bool=self.options.get("break_ties_bool", False),
+                                                        test_bool=self.options.get("test_bool", False),
+                                                        dev_bool=self.dev_bool,
+                                                        save_bool=self.options.get("save_bool", False),
+                                                        week_complete_bool=True,
+                                                        weekly_metrics=self.weekly_metrics)
+        if self.options.get("output_format", "pdf") == "html":
+            generated_report = fantasy_football_report.create_html_report()
+        else:
+            generated_report = fantasy_football_report.create_pdf_report()
+
+        if self.options.get("publish_bool", False):
+            publish_report(generated_report, self.options.get("test_bool", False))
+
+        return generated_report
+
+    def run(self):
+
+        while self.week <= 17:
+            try:
+                week_complete_bool = self.week_complete(self.week)
+            except FileNotFoundError:
+                if self.dev_bool:
+                    print("No saved data for week {} of league {}, stopping.".format(self.week, self.league_id))
+                    return
+                raise
+            except Exception as e:
+                # the yahoo api is checked again at the next poll
+                print("Checking week {} failed ({}: {}).".format(self.week, type(e).__name__, e))
+                week_complete_bool = False
+
+            if week_complete_bool:
+                begin = time.time()
+                try:
+                    generated_report = self.generate_report(self.week)
+                except Exception as e:
+                    print("Week {} report FAILED ({}: {}), retrying at the next poll.".format(
+                        self.week, type(e).__name__, e))
+                else:
+                    print("Week {} report generated in {:.1f} s: {}\n".format(
+                        self.week, time.time() - begin, generated_report))
+                    self.week += 1
+
+                    # refresh the bad boy data while waiting for the next week
+                    if not self.dev_bool:
+                        BadBoyStats.shared_bad_boy_data = None
+                        BadBoyStats.shared_bad_boy_data = BadBoyStats(config, False, False, "").bad_boy_data
+                    continue
+
+            print("{:%b %d, %Y %H:%M} - waiting for the matchups of week {} to end...".format(
+                datetime.datetime.now(), self.week))
+            sys.stdout.flush()
+            time.sleep(self.poll_interval_minutes * 60)
+
+        print("The season of league {} is over.".format(self.league_id))
+
+
+# RUN FANTASY FOOTBALL REPORT DAEMON
+if __name__ == '__main__':
+
+    options = main(sys.argv[1:])
+
+    ReportDaemon(options.get("league_id") or config.get("Fantasy_Football_Report_Settings", "league_id"),
+                 options).run()
@@ -0,0 +1,272 @@
+# local http service that generates reports on request and keeps the finished reports for repeated requests
+#
+#     GET /report?league_id=<yahoo_league_id>&week=<chosen_week>&dq_ce=1&break_ties=1&format=<pdf|html|json>
+#
+# every parameter is optional (the defaults are those of config.ini, a pdf, and the last completed week). reports are
+# cached by a hash of their parameters and of the version of the league data they were generated from, and identical
+# requests that arrive while their report is being generated all wait for the same build (an html page and its json
+# document come from the same build)
+
+import collections
+import getopt
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from calculate.bad_boy_stats import BadBoyStats
+from report.fantasy_football_report_builder import FantasyFootballReport
+from utils.yql_query import YqlQuery
+
+# local config vars
+config = ConfigParser()
+config.read("config.ini")
+
+usage = ("\nYahoo Fantasy Football report server usage:\n"
+         "     python report_server.py [-p <port>] -d\n\n"
+         "reports are requested with GET /report?league_id=<yahoo_league_id>&week=<chosen_week>&dq_ce=1&break_ties=1"
+         "&format=<pdf|html|json>\n")
+
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "html": "text/html; charset=utf-8",
+    "json": "application/json"
+}
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "hp:d")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+
+    options_dict = {}
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt in ("-p", "--port"):
+            options_dict["port"] = int(arg)
+        elif opt in ("-d", "--dev"):
+            options_dict["dev_bool"] = True
+
+    return options_dict
+
+
+def get_cache_key(*values):
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ReportService(object):
+    """ Generate reports on request, one at a time, and keep the most recent finished reports and the weekly metrics
+    (season state) of each league, set of options and data version in memory.
+    """
+
+    def __init__(self, dev_bool=False):
+
+        self.dev_bool = dev_bool
+        self.cache_size = config.getint("Fantasy_Football_Report_Settings", "report_server_cache_size", fallback=32)
+        self.data_version_seconds = 60 * config.getfloat(
+            "Fantasy_Football_Report_Settings", "report_server_data_version_minutes", fallback=5)
+
+        # reentrant, since a build that is already done runs its done callback in the thread that adds it
+        self.lock = threading.RLock()
+        # finished reports (dict of (content type, content) by output format) by cache key, least recently requested
+        # first
+        self.reports = collections.OrderedDict()
+        # reports being generated, by cache key
+        self.builds = {}
+        # weekly metrics of each league, set of options and data version, reused by all of their reports, least
+        # recently used first
+        self.season_states = collections.OrderedDict()
+        # (time checked, current week, data version) of each league
+        self.data_versions = {}
+
+        # yahoo queries and reports run in one thread, since they share the oauth session
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        if not self.dev_bool:
+            YqlQuery(config, "", False, False, "").share_session()
+            BadBoyStats.shared_bad_boy_data = BadBoyStats(config, False, False, "").bad_boy_data
+
+    def check_data_version(self, league_id):
+        """ Get the current week of the league and a version of its data (the standings and the scoreboard of the last
+        completed week), which changes when games end or stats are corrected.
+        """
+        yql_query = YqlQuery(config, league_id, False, self.dev_bool, "test/league_id-" + league_id)
+        yql_query.refresh_token()
+        yql_query.get_league_key()
+        league_standings_data = yql_query.get_league_standings_data()
+        current_week = int(league_standings_data.loc[0, "current_week"])
+        matchups = yql_query.get_matchups_data(current_week - 1) if current_week > 1 else []
+        data_version = get_cache_key(league_standings_data.to_json(), matchups)
+        return current_week, data_version
+
+    def get_data_version(self, league_id):
+
+        with self.lock:
+            checked = self.data_versions.get(league_id)
+        if checked is None or time.time() - checked[0] > self.data_version_seconds:
+            current_week, data_version = self.executor.submit(self.check_data_version, league_id).result()
+            checked = (time.time(), current_week, data_version)
+            with self.lock:
+                self.data_versions[league_id] = checked
+        return checked[1], checked[2]
+
+    def get_weekly_metrics(self, league_id, dq_ce_bool, break_ties_bool, data_version):
+        """ Get the weekly metrics calculated for earlier reports of the same league data, which are calculated again
+        when the data version changes (after a stat correction).
+        """
+        season_key = get_cache_key(league_id, dq_ce_bool, break_ties_bool, data_version)
+        with self.lock:
+            weekly_metrics = self.season_states.setdefault(season_key, {})
+            self.season_states.move_to_end(season_key)
+            while len(self.season_states) > self.cache_size:
+                self.season_states.popitem(last=False)
+        return weekly_metrics
+
+    def build_report(self, league_id, week, dq_ce_bool, break_ties_bool, build_format, data_version):
+        """ Generate a pdf report, or an html report with its json document.
+
+        :return: dict of (content type, content) by output format
+        """
+        weekly_metrics = self.get_weekly_metrics(league_id, dq_ce_bool, break_ties_bool, data_version)
+        try:
+            fantasy_football_report = FantasyFootballReport(user_input_league_id=league_id,
+                                                            user_input_chosen_week=week,
+                                                            dq_ce_bool=dq_ce_bool,
+                                                            break_ties_bool=break_ties_bool,
+                                                            dev_bool=self.dev_bool,
+                                                            weekly_metrics=weekly_metrics)
+            if build_format == "pdf":
+                generated_report = fantasy_football_report.create_pdf_report()
+            else:
+                generated_report = fantasy_football_report.create_html_report()
+        except SystemExit as e:
+            raise RuntimeError("report generation exited with status {}".format(e.code))
+
+        # the json document of the report is written next to its html page
+        reports = {}
+        for output_format in (["pdf"] if build_format == "pdf" else ["html", "json"]):
+            with open(os.path.splitext(generated_report)[0] + "." + output_format, "rb") as report_file:
+                reports[output_format] = (CONTENT_TYPES[output_format], report_file.read())
+        return reports
+
+    def finish_build(self, cache_key, build):
+
+        with self.lock:
+            del self.builds[cache_key]
+            if build.exception() is None:
+                self.reports[cache_key] = build.result()
+                while len(self.reports) > self.cache_size:
+                    self.reports.popitem(last=False)
+
+    def get_report(self, league_id, week, dq_ce_bool, break_ties_bool, output_format):
+        """ Get a report from the cache, from the build of an identical request, or from a new build.
+
+        :return: tuple of (content type, content, cache status of "hit", "coalesced" or "miss")
+        """
+        if output_format not in CONTENT_TYPES:
+            raise ValueError("format must be one of: {}".format(", ".join(CONTENT_TYPES)))
+
+        current_week, data_version = self.get_data_version(league_id)
+        if week in [None, "default"]:
+            week = str(current_week - 1)
+        week = str(int(week))
+        if not 0 < int(week) < current_week:
+            raise ValueError("week {} of league {} is not complete".format(week, league_id))
+
+        build_format = "pdf" if output_format == "pdf" else "html"
+        cache_key = get_cache_key(league_id, week, dq_ce_bool, break_ties_bool, build_format, data_version)
+        with self.lock:
+            if cache_key in self.reports:
+                self.reports.move_to_end(cache_key)
+                content_type, content = self.reports[cache_key][output_format]
+                return content_type, content, "hit"
+
+            build = self.builds.get(cache_key)
+            cache_status = "coalesced"
+            if build is None:
+                build = self.executor.submit(
+                    self.build_report, league_id, week, dq_ce_bool, break_ties_bool, build_format, data_version)
+                self.builds[cache_key] = build
+                build.add_done_callback(lambda finished_build: self.finish_build(cache_key, finished_build))
+                cache_status = "miss"
+
+        content_type, content = build.result()[output_format]
+        return content_type, content, cache_status
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+
+    # set to the ReportService of the server
+    service = None
+
+    def send_text(self, status, text):
+        content = (text + "\n").encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+
+        url = urlparse(self.path)
+        if url.path != "/report":
+            self.send_text(404, "Reports are requested from /report.")
+            return
+
+        def get_bool(name):
+            return query.get(name, ["0"])[-1].lower() in ["1", "true", "yes", "y"]
+
+        query = parse_qs(url.query)
+        begin = time.time()
+        try:
+            content_type, content, cache_status = self.service.get_report(
+                query.get("league_id", [config.get("Fantasy_Football_Report_Settings", "league_id")])[-1],
+                query.get("week", [None])[-1],
+                get_bool("dq_ce"),
+                get_bool("break_ties"),
+                query.get("format", ["pdf"])[-1])
+        except ValueError as e:
+            self.send_text(400, str(e))
+            return
+        except FileNotFoundError as e:
+            self.send_text(404, "No data found for the report ({}).".format(e))
+            return
+        except Exception as e:
+            self.send_text(500, "Report generation FAILED ({}: {}).".format(type(e).__name__, e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("X-Report-Cache", cache_status)
+        self.send_header("X-Report-Seconds", "{:.3f}".format(time.time() - begin))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+# RUN FANTASY FOOTBALL REPORT SERVER
+if __name__ == '__main__':
+
+    options = main(sys.argv[1:])
+
+    ReportRequestHandler.service = ReportService(options.get("dev_bool", False))
+    server = ThreadingHTTPServer(
+        ("127.0.0.1",
+         options.get("port") or config.getint("Fantasy_Football_Report_Settings", "report_server_port", fallback=8080)),
+        ReportRequestHandler)
+    print("Serving fantasy football reports on http://{}:{}/report".format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
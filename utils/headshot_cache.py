@@ -0,0 +1,95 @@
+import hashlib
+import math
+import os
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+
+class HeadshotCache(object):
+    """ Player headshots shared by all weeks and leagues on this host, stored under a hash of their url and downloaded
+    concurrently in the background as soon as the players of a report are known.
+    """
+
+    def __init__(self, cache_dir, max_workers=8, thumbnail_dpi=150):
+
+        self.cache_dir = cache_dir
+        self.thumbnail_dir = os.path.join(self.cache_dir, "thumbnails")
+        if not os.path.exists(self.thumbnail_dir):
+            os.makedirs(self.thumbnail_dir, exist_ok=True)
+        self.thumbnail_dpi = thumbnail_dpi
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.downloads = {}
+        self.lock = threading.Lock()
+
+    def get_local_path(self, url):
+        extension = os.path.splitext(url.split("?")[0].split("/")[-1])[1] or ".png"
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + extension)
+
+    def download(self, url):
+        local_img_path = self.get_local_path(url)
+        if not os.path.exists(local_img_path):
+            # download to a temporary file first so that a partial download is never used
+            temp_img_path = "{}.{}.{}.tmp".format(local_img_path, os.getpid(), threading.get_ident())
+            try:
+                urllib.request.urlretrieve(url, temp_img_path)
+                os.replace(temp_img_path, local_img_path)
+            except (OSError, ValueError) as e:
+                print("Unable to download player headshot {} ({}).".format(url, e))
+                if os.path.exists(temp_img_path):
+                    os.remove(temp_img_path)
+                return None
+        return local_img_path
+
+    def prefetch(self, urls):
+        """ Start downloading every given headshot that is not already cached or downloading.
+        """
+        with self.lock:
+            for url in urls:
+                if url and url not in self.downloads and not os.path.exists(self.get_local_path(url)):
+                    self.downloads[url] = self.executor.submit(self.download, url)
+
+    def get(self, url):
+        """ Get the local path of a headshot, waiting only if it is still being downloaded.
+
+        :return: path to the cached headshot, or None if it could not be downloaded
+        """
+        with self.lock:
+            download = self.downloads.get(url)
+        if download is not None:
+            return download.result()
+        return self.download(url)
+
+    def get_thumbnail(self, url, width):
+        """ Get the local path of a headshot scaled down (once) to the number of pixels needed to render it at the
+        given width (in points) at the thumbnail dpi.
+
+        :return: path to the cached thumbnail, or None if the headshot could not be downloaded
+        """
+        local_img_path = self.get(url)
+        if local_img_path is None:
+            return None
+
+        width_px = int(math.ceil(width / 72.0 * self.thumbnail_dpi))
+        thumbnail_path = os.path.join(
+            self.thumbnail_dir, "{}_{}w.png".format(os.path.splitext(os.path.basename(local_img_path))[0], width_px))
+        if not os.path.exists(thumbnail_path):
+            try:
+                with Image.open(local_img_path) as img:
+                    # headshots that are already small enough are only re-encoded
+                    if img.width > width_px:
+                        img = img.resize((width_px, max(1, int(round(img.height * width_px / float(img.width))))),
+                                         Image.LANCZOS)
+                    temp_thumbnail_path = "{}.{}.{}.tmp".format(thumbnail_path, os.getpid(), threading.get_ident())
+                    img.save(temp_thumbnail_path, format="PNG", optimize=True)
+                os.replace(temp_thumbnail_path, thumbnail_path)
+            except OSError as e:
+                print("Unable to create thumbnail of player headshot {} ({}), using full size image.".format(url, e))
+                return local_img_path
+        return thumbnail_path
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
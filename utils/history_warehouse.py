@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    league_key TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    league_name TEXT,
+    previous_league_key TEXT,
+    num_weeks INTEGER NOT NULL,
+    PRIMARY KEY (league_key, season)
+);
+CREATE TABLE IF NOT EXISTS team_weeks (
+    league_key TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    team_id TEXT NOT NULL,
+    team_name TEXT NOT NULL,
+    manager TEXT NOT NULL,
+    score REAL NOT NULL,
+    bench_score REAL NOT NULL,
+    coaching_efficiency REAL,
+    luck REAL,
+    zscore REAL,
+    power_rank REAL,
+    bad_boy_points INTEGER NOT NULL,
+    PRIMARY KEY (league_key, season, week, team_id)
+);
+CREATE INDEX IF NOT EXISTS seasons_by_previous_league ON seasons (previous_league_key);
+CREATE INDEX IF NOT EXISTS team_weeks_by_team ON team_weeks (league_key, team_id, season, week);
+CREATE INDEX IF NOT EXISTS team_weeks_by_manager ON team_weeks (manager, league_key, season, week);
+CREATE INDEX IF NOT EXISTS team_weeks_by_score ON team_weeks (league_key, season, score DESC);
+CREATE INDEX IF NOT EXISTS team_weeks_by_coaching_efficiency
+    ON team_weeks (league_key, season, coaching_efficiency DESC);
+"""
+
+# every season of a league up to the given one, following the leagues it was renewed from (each yahoo season has its
+# own league key, and the numeric league ids of different seasons are reused by unrelated leagues)
+LEAGUE_HISTORY = """
+WITH RECURSIVE league_history (league_key, season, previous_league_key) AS (
+    SELECT league_key, season, previous_league_key FROM seasons
+    WHERE league_key = :league_key AND (:season IS NULL OR season = :season)
+    UNION
+    SELECT seasons.league_key, seasons.season, seasons.previous_league_key
+    FROM seasons JOIN league_history
+        ON seasons.league_key = league_history.previous_league_key AND seasons.season < league_history.season
+)
+"""
+
+TOP_WEEKS_QUERY = LEAGUE_HISTORY + """
+SELECT team_weeks.season, team_weeks.week, team_weeks.team_name, team_weeks.manager, team_weeks.{metric}
+FROM league_history JOIN team_weeks
+    ON team_weeks.league_key = league_history.league_key AND team_weeks.season = league_history.season
+WHERE team_weeks.{metric} > 0
+ORDER BY team_weeks.{metric} DESC, team_weeks.season, team_weeks.week
+LIMIT :limit
+"""
+
+CAREERS_QUERY = LEAGUE_HISTORY + """
+SELECT team_weeks.manager,
+       COUNT(DISTINCT team_weeks.season),
+       COUNT(*),
+       AVG(team_weeks.score),
+       AVG(NULLIF(team_weeks.coaching_efficiency, 0)),
+       AVG(team_weeks.luck)
+FROM league_history JOIN team_weeks
+    ON team_weeks.league_key = league_history.league_key AND team_weeks.season = league_history.season
+GROUP BY team_weeks.manager
+ORDER BY AVG(team_weeks.luck) DESC
+LIMIT :limit
+"""
+
+
+def get_full_league_key(league_key):
+    """ Get the yahoo league key ("<game_key>.l.<league_id>") of a league key, or of the league a league was renewed
+    from, which the standings give as "<game_key>_<league_id>".
+    """
+    league_key = str(league_key)
+    if ".l." not in league_key and "_" in league_key:
+        game_key, league_id = league_key.split("_", 1)
+        return game_key + ".l." + league_id
+    return league_key
+
+
+class HistoryWarehouse(object):
+    """ Local sqlite store of the weekly team metrics of every season reported for a league, indexed by league, season,
+    week, team and manager, so that all-time records are queried instead of calculated again from the saved seasons.
+    """
+
+    def __init__(self, db_path):
+
+        self.db_path = db_path
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        # reports of different leagues may write to the same database from different processes
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.connection.close()
+
+    def store_season(self, league_key, season, league_name, previous_league_key, weekly_team_info):
+        """ Store (or replace) the team metrics of the weeks of a season, given as the list of weekly team results
+        calculated for a report, starting with week 1.
+        """
+        team_weeks = []
+        for week, team_results in enumerate(weekly_team_info, start=1):
+            for team in team_results.values():
+                team_weeks.append((
+                    league_key, int(season), week, str(team["team_id"]), team["name"], team["manager"],
+                    float(team["score"]), float(team["bench_score"]),
+                    float(team["coaching_efficiency"]) if team.get("coaching_efficiency") is not None else None,
+                    float(team["luck"]) if team.get("luck") is not None else None,
+                    float(team["zscore"]) if team.get("zscore") is not None else None,
+                    float(team["power_rank"]) if team.get("power_rank") is not None else None,
+                    int(team["bad_boy_points"])))
+
+        with self.lock, self.connection:
+            num_weeks = self.connection.execute(
+                "SELECT num_weeks FROM seasons WHERE league_key = ? AND season = ?",
+                (league_key, int(season))).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO seasons VALUES (?, ?, ?, ?, ?)",
+                (league_key, int(season), league_name, previous_league_key,
+                 max(len(weekly_team_info), num_weeks[0] if num_weeks else 0)))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO team_weeks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", team_weeks)
+
+    @staticmethod
+    def get_history_params(league_key, season, **params):
+        params.update({"league_key": league_key, "season": int(season) if season is not None else None})
+        return params
+
+    def get_seasons(self, league_key, season=None):
+        with self.lock:
+            return [season for season, in self.connection.execute(
+                LEAGUE_HISTORY + "SELECT season FROM league_history ORDER BY season",
+                self.get_history_params(league_key, season))]
+
+    def get_top_weeks(self, league_key, metric, limit=10, season=None):
+        """ Get the best weeks of every season of a league (up to the given season) by score or coaching efficiency.
+
+        :return: list of [place, season, week, team, manager, value] rows
+        """
+        if metric not in ["score", "coaching_efficiency"]:
+            raise ValueError("Unsupported all-time metric: {}".format(metric))
+        with self.lock:
+            rows = self.connection.execute(TOP_WEEKS_QUERY.format(metric=metric),
+                                           self.get_history_params(league_key, season, limit=limit)).fetchall()
+        return [[place, season, week, team_name, manager, "%.2f" % value]
+                for place, (season, week, team_name, manager, value) in enumerate(rows, start=1)]
+
+    def get_manager_careers(self, league_key, limit=20, season=None):
+        """ Get the career averages of every manager of a league (up to the given season), luckiest first.
+
+        :return: list of [place, manager, seasons, weeks, avg. points, avg. coaching efficiency, avg. luck] rows
+        """
+        with self.lock:
+            rows = self.connection.execute(CAREERS_QUERY,
+                                           self.get_history_params(league_key, season, limit=limit)).fetchall()
+        return [[place, manager, num_seasons, num_weeks, "%.2f" % score,
+                 "%.2f" % coaching_efficiency if coaching_efficiency is not None else "N/A",
+                 "%.2f" % luck if luck is not None else "N/A"]
+                for place, (manager, num_seasons, num_weeks, score, coaching_efficiency, luck) in enumerate(rows,
+                                                                                                            start=1)]
+
+    def get_leaderboards(self, league_key, season=None, limit=10):
+        """ Get the all-time leaderboards of a league used by the report, from the given season and the seasons of the
+        leagues it was renewed from.
+        """
+        return {
+            "seasons": self.get_seasons(league_key, season),
+            "top_scores": self.get_top_weeks(league_key, "score", limit, season),
+            "top_coaching_efficiencies": self.get_top_weeks(league_key, "coaching_efficiency", limit, season),
+            "manager_careers": self.get_manager_careers(league_key, 2 * limit, season)
+        }
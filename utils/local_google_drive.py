@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import shutil
+import uuid
+
+QUERY_CLAUSES = [
+    ("title", re.compile(r"^title = '((?:[^'\\]|\\.)*)'$")),
+    ("parent", re.compile(r"^'([^']*)' in parents$")),
+    ("mimeType", re.compile(r"^mimeType = '([^']*)'$")),
+    ("trashed", re.compile(r"^trashed = (true|false)$"))
+]
+
+
+class LocalGoogleDrive(object):
+    """ Local stand-in for the part of the pydrive GoogleDrive api used by GoogleDriveUploader, which keeps the
+    uploaded files and their metadata in a local directory. Queries are limited to "and"-ed title, parent, mimeType and
+    trashed conditions. Every request to the stand-in is counted.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        self.metadata_file = os.path.join(self.directory, "files.json")
+        self.num_requests = 0
+
+    def load_files(self):
+        if os.path.isfile(self.metadata_file):
+            with open(self.metadata_file, "r") as metadata_in:
+                return json.load(metadata_in)
+        return {}
+
+    def save_files(self, files):
+        tmp_file = "{}.{}.tmp".format(self.metadata_file, os.getpid())
+        with open(tmp_file, "w") as metadata_out:
+            json.dump(files, metadata_out, indent=2)
+        os.replace(tmp_file, self.metadata_file)
+
+    def ListFile(self, param):
+        return LocalFileList(self, param.get("q", ""))
+
+    def CreateFile(self, metadata=None):
+        return LocalGoogleDriveFile(self, metadata)
+
+    @staticmethod
+    def parse_query(query):
+        conditions = {}
+        for clause in query.split(" and "):
+            clause = clause.strip()
+            for condition, pattern in QUERY_CLAUSES:
+                match = pattern.match(clause)
+                if match:
+                    conditions[condition] = re.sub(r"\\(.)", r"\1", match.group(1))
+                    break
+            else:
+                raise ValueError("Unsupported query clause for the local google drive: {}".format(clause))
+        return conditions
+
+    def list_files(self, query):
+        self.num_requests += 1
+        conditions = self.parse_query(query)
+        matching_files = []
+        for metadata in self.load_files().values():
+            if ("title" in conditions and metadata["title"] != conditions["title"]) or \
+                    ("parent" in conditions and conditions["parent"] not in metadata["parent_ids"]) or \
+                    ("mimeType" in conditions and metadata["mimeType"] != conditions["mimeType"]) or \
+                    metadata.get("trashed", False) != (conditions.get("trashed", "false") == "true"):
+                continue
+            matching_files.append(LocalGoogleDriveFile(self, metadata))
+        return matching_files
+
+
+class LocalFileList(object):
+
+    def __init__(self, drive, query):
+        self.drive = drive
+        self.query = query
+
+    def GetList(self):
+        return self.drive.list_files(self.query)
+
+
+class LocalGoogleDriveFile(dict):
+
+    def __init__(self, drive, metadata=None):
+        dict.__init__(self, metadata or {})
+        self.drive = drive
+        self.content_file = None
+
+    def SetContentFile(self, filename):
+        self.content_file = filename
+
+    def Upload(self):
+        self.drive.num_requests += 1
+        files = self.drive.load_files()
+        if "id" not in self:
+            self["id"] = uuid.uuid4().hex
+            self["parent_ids"] = ["root" if parent.get("isRoot") else parent.get("id")
+                                  for parent in self.get("parents", [{"isRoot": True}])]
+            for parent_id in self["parent_ids"]:
+                if parent_id != "root" and parent_id not in files:
+                    # like the google drive api, which responds with 404 to files created in missing folders
+                    raise FileNotFoundError("File not found: {}".format(parent_id))
+            self.setdefault("mimeType", "application/octet-stream")
+            self["permissions"] = []
+        if self.content_file is not None:
+            content_path = os.path.join(self.drive.directory, self["id"])
+            shutil.copyfile(self.content_file, content_path)
+            self["alternateLink"] = "file://" + os.path.abspath(content_path)
+            self.content_file = None
+        files[self["id"]] = dict(self)
+        self.drive.save_files(files)
+
+    def InsertPermission(self, new_permission):
+        self.drive.num_requests += 1
+        self["permissions"] = self.get("permissions", []) + [new_permission]
+        files = self.drive.load_files()
+        files[self["id"]] = dict(self)
+        self.drive.save_files(files)
+        return new_permission
+
+    def Delete(self):
+        self.drive.num_requests += 1
+        files = self.drive.load_files()
+        # the files in a deleted folder are deleted with it
+        deleted_ids = [self["id"]]
+        while deleted_ids:
+            file_id = deleted_ids.pop()
+            files.pop(file_id, None)
+            if os.path.isfile(os.path.join(self.drive.directory, file_id)):
+                os.remove(os.path.join(self.drive.directory, file_id))
+            deleted_ids.extend(child_id for child_id, metadata in files.items() if file_id in metadata["parent_ids"])
+        self.drive.save_files(files)
@@ -0,0 +1,124 @@
+import os
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, where only the traced python allocations are reported
+    resource = None
+
+
+class MemoryTracker(object):
+    """ Opt-in memory usage of a report run at its stage boundaries: the resident set size (and peak) of the process
+    and, when tracing allocations, the python memory allocated by each source line (tracemalloc). Does nothing unless
+    enabled.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """ Discard all checkpoints (and disable memory tracking).
+        """
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.enabled = False
+        self.trace_allocations_bool = False
+        self.checkpoints = []
+        # only the snapshots of the largest and of the last checkpoint are kept, since snapshots are large themselves
+        self.largest_snapshot = None
+        self.largest_snapshot_stage = None
+        self.largest_traced = 0
+        self.last_snapshot = None
+
+    def enable(self, trace_allocations_bool=True, num_frames=1):
+        self.enabled = True
+        self.trace_allocations_bool = trace_allocations_bool
+        if self.trace_allocations_bool:
+            tracemalloc.start(num_frames)
+
+    @staticmethod
+    def get_rss():
+        """ Get the current resident set size of the process in bytes (None where it is not available).
+        """
+        try:
+            with open("/proc/self/statm", "r") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError, AttributeError):
+            return None
+
+    @staticmethod
+    def get_peak_rss():
+        """ Get the peak resident set size of the process in bytes (None where it is not available).
+        """
+        if resource is None:
+            return None
+        # kilobytes on linux, but bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+    def checkpoint(self, stage_name):
+        """ Record the memory usage at the end of a stage of the report.
+        """
+        if not self.enabled:
+            return
+
+        checkpoint = {"stage": stage_name, "rss": self.get_rss(), "peak_rss": self.get_peak_rss(),
+                      "traced": None, "traced_peak": None}
+
+        if self.trace_allocations_bool:
+            # peak of the traced memory since the previous checkpoint
+            checkpoint["traced"], checkpoint["traced_peak"] = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+            ])
+            if self.largest_snapshot is None or checkpoint["traced"] >= self.largest_traced:
+                self.largest_snapshot = snapshot
+                self.largest_snapshot_stage = stage_name
+                self.largest_traced = checkpoint["traced"]
+            self.last_snapshot = snapshot
+
+        self.checkpoints.append(checkpoint)
+
+    def get_peak_rss_mb(self):
+        peak_rss = [checkpoint["peak_rss"] for checkpoint in self.checkpoints if checkpoint["peak_rss"] is not None]
+        return max(peak_rss) / 1048576.0 if peak_rss else None
+
+    @staticmethod
+    def get_top_allocation_sites(snapshot, num_sites=10):
+        """ Get the source lines that hold the most traced memory in a snapshot.
+
+        :return: list of (source line, MiB, number of allocations)
+        """
+        return [("{}:{}".format(statistic.traceback[0].filename, statistic.traceback[0].lineno),
+                 statistic.size / 1048576.0, statistic.count)
+                for statistic in snapshot.statistics("lineno")[:num_sites]]
+
+    def print_report(self, num_sites=10):
+
+        def to_mb(num_bytes):
+            return "{:10.1f}".format(num_bytes / 1048576.0) if num_bytes is not None else "{:>10}".format("n/a")
+
+        print("~~~~~ REPORT MEMORY USAGE (MiB) ~~~~~")
+        print("{:<28}{:>10}{:>10}{:>10}{:>10}".format("stage", "rss", "peak rss", "traced", "peak"))
+        for checkpoint in self.checkpoints:
+            print("{:<28}{}{}{}{}".format(checkpoint["stage"], to_mb(checkpoint["rss"]), to_mb(checkpoint["peak_rss"]),
+                                          to_mb(checkpoint["traced"]), to_mb(checkpoint["traced_peak"])))
+
+        for title, snapshot in [("at the largest checkpoint ({})".format(self.largest_snapshot_stage),
+                                 self.largest_snapshot),
+                                ("at the end of the report", self.last_snapshot)]:
+            # the last checkpoint is often also the largest one
+            if snapshot is not None and (snapshot is self.largest_snapshot or
+                                         self.last_snapshot is not self.largest_snapshot):
+                print("\nTop allocation sites {}:".format(title))
+                for source_line, size_mb, count in self.get_top_allocation_sites(snapshot, num_sites):
+                    print("{:10.2f} MiB {:>9,} blocks  {}".format(size_mb, count, source_line))
+        print("")
+
+
+# shared by every stage of a report run
+memory_tracker = MemoryTracker()
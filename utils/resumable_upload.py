@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+import requests
+
+# chunks of resumable uploads must be multiples of 256 KiB (except the last one)
+CHUNK_SIZE_MULTIPLE = 256 * 1024
+
+
+class ResumableUpload(object):
+    """ Upload of a file in chunks with the google drive resumable upload protocol, read from disk one chunk at a time.
+    The session url of an unfinished upload is saved in a json file, so that an interrupted upload continues from the
+    last byte received by the server, in the same run or the next one.
+    """
+
+    def __init__(self, upload_url, access_token, filename, metadata, file_id=None, mime_type="application/pdf",
+                 chunk_size_kb=1024, session_file=None, max_retries=5):
+
+        self.upload_url = upload_url
+        self.access_token = access_token
+        self.filename = filename
+        self.metadata = metadata
+        self.file_id = file_id
+        self.mime_type = mime_type
+        self.chunk_size = max(1, int(round(chunk_size_kb * 1024.0 / CHUNK_SIZE_MULTIPLE))) * CHUNK_SIZE_MULTIPLE
+        self.session_file = session_file
+        self.max_retries = max_retries
+
+        self.file_size = os.path.getsize(self.filename)
+        # an upload can only be resumed for the same destination and the same content
+        self.session_key = hashlib.sha1(json.dumps(
+            [self.upload_url, self.file_id, self.metadata, os.path.abspath(self.filename), self.file_size,
+             os.path.getmtime(self.filename)], sort_keys=True).encode("utf-8")).hexdigest()
+
+    def load_sessions(self):
+        if self.session_file and os.path.isfile(self.session_file):
+            try:
+                with open(self.session_file, "r") as sessions_in:
+                    return json.load(sessions_in)
+            except ValueError:
+                pass
+        return {}
+
+    def save_session(self, session_url):
+        if not self.session_file:
+            return
+        sessions = self.load_sessions()
+        if session_url:
+            sessions[self.session_key] = session_url
+        else:
+            sessions.pop(self.session_key, None)
+        session_dir = os.path.dirname(self.session_file)
+        if session_dir and not os.path.exists(session_dir):
+            os.makedirs(session_dir, exist_ok=True)
+        tmp_file = "{}.{}.tmp".format(self.session_file, os.getpid())
+        with open(tmp_file, "w") as sessions_out:
+            json.dump(sessions, sessions_out, indent=2)
+        os.replace(tmp_file, self.session_file)
+
+    def start_session(self):
+        """ Start a new upload session (updating the content of an existing file when it has a file id).
+
+        :return: session url of the upload
+        """
+        response = requests.request(
+            "PUT" if self.file_id else "POST",
+            self.upload_url + ("/" + self.file_id if self.file_id else ""),
+            params={"uploadType": "resumable"},
+            headers={"Authorization": "Bearer " + self.access_token,
+                     "Content-Type": "application/json; charset=UTF-8",
+                     "X-Upload-Content-Type": self.mime_type,
+                     "X-Upload-Content-Length": str(self.file_size)},
+            data=json.dumps(self.metadata))
+        response.raise_for_status()
+        return response.headers["Location"]
+
+    def get_progress(self, session_url):
+        """ Ask the server how much of the file it has received.
+
+        :return: tuple of (number of bytes received, or None when the session has expired, and the metadata of the
+                 uploaded file when the upload is complete)
+        """
+        response = requests.put(session_url, headers={"Content-Range": "bytes */{}".format(self.file_size)})
+        return self.get_upload_status(response)
+
+    @staticmethod
+    def get_upload_status(response):
+        if response.status_code in [200, 201]:
+            return None, response.json()
+        elif response.status_code == 308:
+            # the range header holds the bytes received so far, and is missing when none have been
+            received = re.match(r"bytes=0-(\d+)", response.headers.get("Range", ""))
+            return int(received.group(1)) + 1 if received else 0, None
+        elif response.status_code in [404, 410]:
+            return None, None
+        response.raise_for_status()
+        # other unexpected responses are retried
+        raise requests.HTTPError("Unexpected upload response status {}".format(response.status_code),
+                                 response=response)
+
+    def upload(self):
+        """ Upload the file, resuming its saved upload session if there is one.
+
+        :return: metadata of the uploaded file
+        """
+        session_url = self.load_sessions().get(self.session_key)
+        offset = 0
+        if session_url:
+            try:
+                offset, uploaded_file = self.get_progress(session_url)
+            except requests.RequestException:
+                offset, uploaded_file = None, None
+            if uploaded_file is not None:
+                self.save_session(None)
+                return uploaded_file
+            if offset is None:
+                session_url = None
+                offset = 0
+            else:
+                print("Resuming upload of {} from byte {:,} of {:,}.".format(self.filename, offset, self.file_size))
+
+        num_retries = 0
+        with open(self.filename, "rb") as upload_file:
+            while True:
+                try:
+                    if not session_url:
+                        session_url = self.start_session()
+                        self.save_session(session_url)
+                        offset = 0
+
+                    upload_file.seek(offset)
+                    chunk = upload_file.read(self.chunk_size)
+                    response = requests.put(session_url, data=chunk, headers={
+                        "Content-Range": "bytes {}-{}/{}".format(offset, offset + len(chunk) - 1, self.file_size)
+                        if chunk else "bytes */{}".format(self.file_size)})
+                    received, uploaded_file = self.get_upload_status(response)
+                except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                    response = getattr(e, "response", None)
+                    if response is not None and response.status_code < 500 and response.status_code != 429:
+                        raise
+                    num_retries += 1
+                    if num_retries > self.max_retries:
+                        # the saved session is resumed by the next upload of the same file
+                        raise
+                    time.sleep(min(2 ** num_retries, 30))
+                    try:
+                        received, uploaded_file = self.get_progress(session_url) if session_url else (None, None)
+                    except requests.RequestException:
+                        # try the same chunk again
+                        continue
+
+                if uploaded_file is not None:
+                    self.save_session(None)
+                    return uploaded_file
+                if received is None:
+                    # the session has expired, so the upload starts over
+                    session_url = None
+                    continue
+                if received > offset:
+                    num_retries = 0
+                else:
+                    num_retries += 1
+                    if num_retries > self.max_retries:
+                        raise IOError("Upload of {} stopped at byte {:,} of {:,}.".format(
+                            self.filename, offset, self.file_size))
+                offset = received
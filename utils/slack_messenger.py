@@ -1,18 +1,31 @@
 # written by Wren J.R.
 import datetime
+import json
+import os
+import re
+import time
 
+import requests
 from slackclient import SlackClient
 
 
 class SlackMessenger(object):
-    def __init__(self, config):
+    def __init__(self, config, token=None):
         self.config = config
-        with open("./authentication/yahoo/private.txt", "r") as auth_file:
-            auth_data = auth_file.read().split("\n")
+        if token is None:
+            with open("./authentication/yahoo/private.txt", "r") as auth_file:
+                auth_data = auth_file.read().split("\n")
 
-            slack_api_token = auth_data[2]
-            token = slack_api_token  # found at https://api.slack.com/web#authentication
-            self.sc = SlackClient(token)
+                slack_api_token = auth_data[2]
+                token = slack_api_token  # found at https://api.slack.com/web#authentication
+        self.sc = SlackClient(token)
+        self.token = token
+
+        self.api_url = self.config.get("Slack_Settings", "slack_api_url", fallback="https://slack.com/api/")
+        if not self.api_url.endswith("/"):
+            self.api_url += "/"
+        # ids of the channels the reports are posted to, by channel name
+        self.channel_ids = None
 
     def api_test(self):
         return self.sc.api_call("api.test")
@@ -51,25 +64,126 @@ class SlackMessenger(object):
             text="<!here|here>\n" + message, username="fantasy_football_report_bot", icon_emoji=":football:"
         )
 
-    def upload_file_to_selected_slack_channel(self, upload_file):
+    def call_api(self, method, max_retries=3, **kwargs):
+        """ Call a method of the slack web api, retrying when rate limited or when slack is unavailable.
+        """
+        num_retries = 0
+        while True:
+            try:
+                response = requests.post(self.api_url + method, headers={"Authorization": "Bearer " + self.token},
+                                         data=kwargs)
+                if response.status_code != 429 and response.status_code < 500:
+                    return self.get_api_response(method, response)
+                retry_seconds = int(response.headers.get("Retry-After", 2 ** num_retries))
+            except (requests.ConnectionError, requests.Timeout):
+                retry_seconds = 2 ** num_retries
+            num_retries += 1
+            if num_retries > max_retries:
+                return {"ok": False, "error": "{} failed after {} retries".format(method, max_retries)}
+            time.sleep(retry_seconds)
+
+    @staticmethod
+    def get_api_response(method, response):
+        """ Get the json response of a slack api method, or a slack style error when slack (or a proxy in front of it)
+        responded with something else, such as an html error page.
+        """
+        content_type = response.headers.get("Content-Type", "")
+        if response.ok and content_type.startswith("application/json"):
+            try:
+                return response.json()
+            except ValueError:
+                pass
+        return {"ok": False, "error": "{} responded with status {} and content type {}".format(
+            method, response.status_code, content_type or "unknown")}
+
+    def get_channel_id(self, channel):
+        """ Get the id of a channel from its name (channels can also be given by id).
+        """
+        channel = channel.lstrip("#")
+        if re.match(r"^[CGD][A-Z0-9]{6,}$", channel):
+            return channel
+
+        if self.channel_ids is None:
+            channel_ids = {}
+            cursor = ""
+            while True:
+                response = self.call_api("conversations.list", types="public_channel,private_channel",
+                                         exclude_archived="true", limit=1000, cursor=cursor)
+                if not response.get("ok"):
+                    raise ValueError("Slack channels could not be listed: {}".format(response.get("error")))
+                for slack_channel in response.get("channels", []):
+                    channel_ids[slack_channel["name"]] = slack_channel["id"]
+                cursor = response.get("response_metadata", {}).get("next_cursor")
+                if not cursor:
+                    break
+            self.channel_ids = channel_ids
+
+        if channel not in self.channel_ids:
+            raise ValueError("Slack channel #{} not found.".format(channel))
+        return self.channel_ids[channel]
+
+    def upload_file_to_slack_channels(self, upload_file, channel_ids, message, max_retries=3):
+        """ Upload a file once, streamed from disk instead of read into memory, and share it to all the given slack
+        channels.
+        """
+        file_name = upload_file.split("/")[-1]
+
+        upload = self.call_api("files.getUploadURLExternal", filename=file_name,
+                               length=os.path.getsize(upload_file))
+        if not upload.get("ok"):
+            return upload
+
+        num_retries = 0
+        while True:
+            try:
+                with open(upload_file, "rb") as uf:
+                    # requests sends an open file in blocks as it is read
+                    upload_response = requests.post(upload["upload_url"], data=uf)
+                if upload_response.status_code == 200:
+                    break
+                error = "file upload responded with status {}".format(upload_response.status_code)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = "file upload failed ({})".format(e)
+            # slack does not resume uploads, so the whole file is sent again
+            num_retries += 1
+            if num_retries > max_retries:
+                return {"ok": False, "error": error}
+            time.sleep(2 ** num_retries)
+
+        return self.call_api("files.completeUploadExternal",
+                             files=json.dumps([{"id": upload["file_id"], "title": file_name}]),
+                             channels=",".join(channel_ids),
+                             initial_comment=message)
+
+    def upload_file_to_selected_slack_channel(self, upload_file, channels=None):
+        """ Upload a file to the selected slack channels (the file is uploaded once and shared to all of them).
+        """
+        if channels is None:
+            channels = [channel.strip() for channel in
+                        (self.config.get("Slack_Settings", "slack_channels", fallback="") or
+                         self.config.get("Slack_Settings", "slack_channel")).split(",") if channel.strip()]
+
         file_name = upload_file.split("/")[-1]
-        file_type = file_name.split(".")[-1]
         league_name = file_name.split(".")[-2].split("_")[0]
         message = "\nFantasy Football Report for %s\nGenerated %s\n" % (league_name,
                                                                         "{:%Y-%b-%d %H:%M:%S}".format(
                                                                             datetime.datetime.now()))
-        with open(upload_file, "rb") as uf:
-            file_to_upload = uf.read()
-            response = self.sc.api_call(
-                "files.upload",
-                channels="#" + self.config.get("Slack_Settings", "slack_channel"),
-                filename=file_name,
-                filetype=file_type,
-                file=file_to_upload,
-                title=file_name,
-                initial_comment=message
-            )
-        if "ok" not in response or not response["ok"]:
+
+        channel_ids = []
+        for channel in channels:
+            try:
+                channel_id = self.get_channel_id(channel)
+            except ValueError as e:
+                # error
+                print("fileUpload to #%s failed %s" % (channel.lstrip("#"), e))
+                continue
+            if channel_id not in channel_ids:
+                channel_ids.append(channel_id)
+        if not channel_ids:
+            return {"ok": False, "error": "no slack channel found"}
+
+        response = self.upload_file_to_slack_channels(upload_file, channel_ids, message)
+        if not response.get("ok"):
             # error
-            print("fileUpload failed %s", response["error"])
+            print("fileUpload failed %s" % response.get("error"))
         return response
@@ -0,0 +1,144 @@
+import contextlib
+import cProfile
+import json
+import os
+import re
+import time
+
+
+class StageProfiler(object):
+    """ Opt-in timing of the stages of a report run. Stages nest, and repeated stages with the same name under the
+    same parent stage are added together. Does nothing unless enabled.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """ Discard all recorded stages (and disable profiling).
+        """
+        self.enabled = False
+        self.cprofile_bool = False
+        self.root = self.new_node("report")
+        self.stack = [self.root]
+        self.root_start = None
+        # cProfile profiles of the outermost profiled stages, by stage path
+        self.profiles = {}
+        self.active_profile = None
+
+    @staticmethod
+    def new_node(name):
+        return {"name": name, "seconds": 0.0, "calls": 0, "children": []}
+
+    def enable(self, cprofile_bool=False):
+        self.enabled = True
+        self.cprofile_bool = cprofile_bool
+        self.root_start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        parent = self.stack[-1]
+        node = next((child for child in parent["children"] if child["name"] == name), None)
+        if node is None:
+            node = self.new_node(name)
+            parent["children"].append(node)
+        self.stack.append(node)
+
+        # only one cProfile profile can be active at a time, so nested stages are part of their outermost stage's
+        profile = None
+        if self.cprofile_bool and self.active_profile is None:
+            path = ";".join(stage["name"] for stage in self.stack[1:])
+            profile = self.profiles.setdefault(path, cProfile.Profile())
+            self.active_profile = profile
+            profile.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            node["seconds"] += time.perf_counter() - start
+            node["calls"] += 1
+            if profile is not None:
+                profile.disable()
+                self.active_profile = None
+            self.stack.pop()
+
+    def update_root(self):
+        # the whole run is the time since profiling was enabled
+        self.root["seconds"] = time.perf_counter() - self.root_start
+        self.root["calls"] = 1
+
+    def get_stage_totals(self):
+        """ Get the total seconds of each stage name wherever it ran (e.g. the breakdown stage of every week).
+        """
+        stage_totals = {}
+
+        def add_node(node):
+            for child in node["children"]:
+                stage_totals[child["name"]] = stage_totals.get(child["name"], 0.0) + child["seconds"]
+                add_node(child)
+
+        add_node(self.root)
+        return stage_totals
+
+    def get_collapsed_stacks(self):
+        """ Get the stage tree as collapsed stacks ("report;stage;sub_stage <self time in microseconds>"), the input
+        format of flamegraph tools.
+        """
+        collapsed_stacks = []
+
+        def add_node(node, path):
+            path = path + [node["name"].replace(";", ",").replace(" ", "_")]
+            self_seconds = node["seconds"] - sum(child["seconds"] for child in node["children"])
+            if self_seconds > 0:
+                collapsed_stacks.append("{} {}".format(";".join(path), int(round(self_seconds * 1e6))))
+            for child in node["children"]:
+                add_node(child, path)
+
+        add_node(self.root, [])
+        return collapsed_stacks
+
+    def write(self, profile_dir):
+        """ Write the timing tree (json), the collapsed stacks, and the cProfile stats of each profiled stage.
+
+        :return: path of the timing tree file
+        """
+        if not os.path.exists(profile_dir):
+            os.makedirs(profile_dir)
+
+        self.update_root()
+
+        timing_file = os.path.join(profile_dir, "timing.json")
+        with open(timing_file, "w") as timing_out:
+            json.dump(self.root, timing_out, indent=2)
+
+        with open(os.path.join(profile_dir, "collapsed_stacks.txt"), "w") as stacks_out:
+            stacks_out.write("\n".join(self.get_collapsed_stacks()) + "\n")
+
+        for path, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(profile_dir, re.sub(r"[^\w.-]+", "_", path) + ".prof"))
+
+        return timing_file
+
+    def print_summary(self, max_depth=2):
+        self.update_root()
+
+        def print_node(node, depth):
+            print("{}{:<{}} {:9.3f} s{}".format(
+                "  " * depth, node["name"], 40 - 2 * depth, node["seconds"],
+                " ({} calls)".format(node["calls"]) if node["calls"] > 1 else ""))
+            if depth < max_depth:
+                for child in sorted(node["children"], key=lambda x: x["seconds"], reverse=True):
+                    print_node(child, depth + 1)
+
+        print("~~~~~ REPORT STAGE TIMING ~~~~~")
+        print_node(self.root, 0)
+        print("")
+
+
+# shared by every stage of a report run
+profiler = StageProfiler()
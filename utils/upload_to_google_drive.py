@@ -2,122 +2,187 @@
 # code snippets taken from: http://stackoverflow.com/questions/24419188/automating-pydrive-verification-process
 
 import datetime
+import json
+import mimetypes
+import os
 from configparser import ConfigParser
 
 from pydrive.auth import GoogleAuth
 from pydrive.drive import GoogleDrive
 
+from utils.local_google_drive import LocalGoogleDrive
+from utils.resumable_upload import ResumableUpload
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
 
 class GoogleDriveUploader(object):
-    def __init__(self, filename):
+    def __init__(self, filename, drive=None):
         # local config vars
         self.config = ConfigParser()
         self.config.read("config.ini")
 
         self.filename = filename
-
-        self.gauth = GoogleAuth()
-
-        auth_token = self.config.get("Google_Drive_Settings", "google_auth_token")
-
-        # Try to load saved client credentials
-        self.gauth.LoadCredentialsFile(auth_token)
-        if self.gauth.credentials is None:
-            # Authenticate if they're not there
-            self.gauth.LocalWebserverAuth()
-        elif self.gauth.access_token_expired:
-            # Refresh them if expired
-            self.gauth.Refresh()
+        # the report is published as a pdf or, with -o html, as an html page
+        self.mime_type = mimetypes.guess_type(self.filename)[0] or "application/octet-stream"
+
+        # ids of the folders already found or created in google drive, by folder path
+        self.folder_id_cache_file = self.config.get("Google_Drive_Settings", "google_drive_folder_id_cache",
+                                                    fallback="./cache/google_drive_folder_ids.json")
+
+        local_drive_dir = self.config.get("Google_Drive_Settings", "google_drive_local_directory", fallback="")
+        if drive is not None:
+            self.drive = drive
+        elif local_drive_dir:
+            # local stand-in for google drive, to try out uploads without a google account
+            self.drive = LocalGoogleDrive(local_drive_dir)
+            self.folder_id_cache_file = os.path.join(local_drive_dir, "folder_ids.json")
         else:
-            # Initialize the saved creds
-            self.gauth.Authorize()
-        # Save the current credentials to a file
-        self.gauth.SaveCredentialsFile(auth_token)
+            self.gauth = GoogleAuth()
+
+            auth_token = self.config.get("Google_Drive_Settings", "google_auth_token")
+
+            # Try to load saved client credentials
+            self.gauth.LoadCredentialsFile(auth_token)
+            if self.gauth.credentials is None:
+                # Authenticate if they're not there
+                self.gauth.LocalWebserverAuth()
+            elif self.gauth.access_token_expired:
+                # Refresh them if expired
+                self.gauth.Refresh()
+            else:
+                # Initialize the saved creds
+                self.gauth.Authorize()
+            # Save the current credentials to a file
+            self.gauth.SaveCredentialsFile(auth_token)
+
+            # Create GoogleDrive instance with authenticated GoogleAuth instance.
+            self.drive = GoogleDrive(self.gauth)
+
+        self.folder_ids = self.load_folder_ids()
+
+    def load_folder_ids(self):
+        if os.path.isfile(self.folder_id_cache_file):
+            try:
+                with open(self.folder_id_cache_file, "r") as folder_ids_in:
+                    return json.load(folder_ids_in)
+            except ValueError:
+                pass
+        return {}
+
+    def save_folder_ids(self):
+        folder_id_cache_dir = os.path.dirname(self.folder_id_cache_file)
+        if folder_id_cache_dir and not os.path.exists(folder_id_cache_dir):
+            os.makedirs(folder_id_cache_dir, exist_ok=True)
+        tmp_file = "{}.{}.tmp".format(self.folder_id_cache_file, os.getpid())
+        with open(tmp_file, "w") as folder_ids_out:
+            json.dump(self.folder_ids, folder_ids_out, indent=2)
+        os.replace(tmp_file, self.folder_id_cache_file)
 
     def upload_file(self, test_bool=False):
 
-        # Create GoogleDrive instance with authenticated GoogleAuth instance.
-        drive = GoogleDrive(self.gauth)
+        cached_folder_ids_bool = bool(self.folder_ids)
+        try:
+            return self.upload_file_to_folder(test_bool)
+        except Exception:
+            if not cached_folder_ids_bool:
+                raise
+            # a cached folder may have been deleted from google drive, so find the folders again
+            self.folder_ids = {}
+            self.save_folder_ids()
+            return self.upload_file_to_folder(test_bool)
 
-        # Get lists of folders
-        root_folders = drive.ListFile(
-            {"q": "'root' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"}).GetList()
-        all_folders = drive.ListFile({"q": "mimeType='application/vnd.google-apps.folder' and trashed=false"}).GetList()
-        all_pdfs = drive.ListFile({"q": "mimeType='application/pdf' and trashed=false"}).GetList()
-
-        # Check for "Fantasy_Football" root folder and create it if it does not exist
-        root_folder_name = self.config.get("Google_Drive_Settings", "root_folder_name")
-        root_folder_id = self.make_root_folder(drive, self.check_file_existence(root_folder_name, root_folders),
-                                               root_folder_name)
+    def upload_file_to_folder(self, test_bool):
 
         if not test_bool:
-            # Check for parent folder for league and create it if it does not exist
+            # Check for "Fantasy_Football" root folder and league folder, and create them if they do not exist
+            root_folder_name = self.config.get("Google_Drive_Settings", "root_folder_name")
+            root_folder_id = self.get_folder_id(root_folder_name, "root", root_folder_name)
+
             league_folder_name = self.filename.split("/")[2].replace("-", "_")
-            league_folder_id = self.make_parent_folder(drive,
-                                                       self.check_file_existence(league_folder_name, all_folders),
-                                                       league_folder_name, root_folder_id)
+            league_folder_id = self.get_folder_id(league_folder_name, root_folder_id,
+                                                  root_folder_name + "/" + league_folder_name)
 
-            # Check for league report and create if if it does not exist
             report_file_name = self.filename.split("/")[-1]
-            report_file = self.check_file_existence(report_file_name, all_pdfs)
         else:
             report_file_name = self.filename
-            report_file = self.check_file_existence(report_file_name, all_pdfs)
             league_folder_id = "root"
 
-        if report_file:
-            report_file.Delete()
-        upload_file = drive.CreateFile({'title': report_file_name, 'mimeType': 'application/pdf',
-                                        "parents": [{"kind": "drive#fileLink", "id": league_folder_id}]})
-        upload_file.SetContentFile(self.filename)
+        # Check for league report in the league folder, and replace its content if it exists
+        report_file = self.find_file(report_file_name, league_folder_id, self.mime_type)
 
         # Upload the file.
-        upload_file.Upload()
-
-        upload_file.InsertPermission(
-            {
-                'type': 'anyone',
-                'role': 'reader',
-                'withLink': True
-            }
-        )
+        upload_file = self.upload_content(report_file, {
+            'title': report_file_name, 'mimeType': self.mime_type,
+            "parents": [{"kind": "drive#fileLink", "id": league_folder_id}]})
+
+        if not report_file:
+            upload_file.InsertPermission(
+                {
+                    'type': 'anyone',
+                    'role': 'reader',
+                    'withLink': True
+                }
+            )
 
         return "\nFantasy Football Report\nGenerated %s\n*%s*\n\n_Google Drive Link:_\n%s" % (
             "{:%Y-%b-%d %H:%M:%S}".format(datetime.datetime.now()), upload_file['title'], upload_file["alternateLink"])
 
-    @staticmethod
-    def check_file_existence(file_name, file_list):
-        drive_file_name = file_name
-        google_drive_file = None
-
-        for drive_file in file_list:
-            if drive_file["title"] == drive_file_name:
-                google_drive_file = drive_file
-
-        return google_drive_file
-
-    @staticmethod
-    def make_root_folder(drive, folder, folder_name):
-        if not folder:
-            new_root_folder = drive.CreateFile(
-                {"title": folder_name, "parents": [{"kind": "drive#fileLink", "isRoot": True}],
-                 "mimeType": "application/vnd.google-apps.folder"})
-            new_root_folder.Upload()
-            root_folder_id = new_root_folder["id"]
-        else:
-            root_folder_id = folder["id"]
-
-        return root_folder_id
+    def upload_content(self, report_file, metadata):
+        """ Upload the report as a new file with the given metadata, or as the new content of an existing report file,
+        in chunks that can be resumed if the upload is interrupted.
+
+        :return: uploaded google drive file
+        """
+        if isinstance(self.drive, LocalGoogleDrive):
+            upload_file = report_file or self.drive.CreateFile(metadata)
+            upload_file.SetContentFile(self.filename)
+            upload_file.Upload()
+            return upload_file
+
+        # the authenticated GoogleAuth instance of the drive
+        gauth = self.drive.auth
+        if gauth.access_token_expired:
+            gauth.Refresh()
+        uploaded_file_metadata = ResumableUpload(
+            self.config.get("Google_Drive_Settings", "google_drive_upload_url",
+                            fallback="https://www.googleapis.com/upload/drive/v2/files"),
+            gauth.credentials.access_token,
+            self.filename,
+            {} if report_file else metadata,
+            file_id=report_file["id"] if report_file else None,
+            mime_type=self.mime_type,
+            chunk_size_kb=self.config.getint("Google_Drive_Settings", "google_drive_upload_chunk_size_kb",
+                                             fallback=1024),
+            session_file=self.config.get("Google_Drive_Settings", "google_drive_upload_sessions",
+                                         fallback="./cache/google_drive_upload_sessions.json")
+        ).upload()
+        return self.drive.CreateFile(uploaded_file_metadata)
 
     @staticmethod
-    def make_parent_folder(drive, folder, folder_name, root_folder_id):
-        if not folder:
-            new_parent_folder = drive.CreateFile(
-                {"title": folder_name, "parents": [{"kind": "drive#fileLink", "id": root_folder_id}],
-                 "mimeType": "application/vnd.google-apps.folder"})
-            new_parent_folder.Upload()
-            parent_folder_id = new_parent_folder["id"]
-        else:
-            parent_folder_id = folder["id"]
-
-        return parent_folder_id
+    def get_query(title, parent_id, mime_type):
+        return "title = '{}' and '{}' in parents and mimeType = '{}' and trashed = false".format(
+            title.replace("\\", "\\\\").replace("'", "\\'"), parent_id, mime_type)
+
+    def find_file(self, title, parent_id, mime_type):
+        """ Find a file by its title in a folder (only the matching files are listed).
+        """
+        drive_files = self.drive.ListFile({"q": self.get_query(title, parent_id, mime_type)}).GetList()
+        return drive_files[0] if drive_files else None
+
+    def get_folder_id(self, folder_name, parent_id, folder_path):
+        """ Get the id of a folder from the folder id cache, from google drive, or by creating the folder.
+        """
+        if folder_path not in self.folder_ids:
+            folder = self.find_file(folder_name, parent_id, FOLDER_MIME_TYPE)
+            if not folder:
+                folder = self.drive.CreateFile(
+                    {"title": folder_name,
+                     "parents": [{"kind": "drive#fileLink", "isRoot": True} if parent_id == "root" else
+                                 {"kind": "drive#fileLink", "id": parent_id}],
+                     "mimeType": FOLDER_MIME_TYPE})
+                folder.Upload()
+            self.folder_ids[folder_path] = folder["id"]
+            self.save_folder_ids()
+
+        return self.folder_ids[folder_path]
@@ -11,6 +11,10 @@ from resources.local_dependencies.yql3.storage import FileTokenStore
 # noinspection SqlNoDataSourceInspection,SqlDialectInspection
 class YqlQuery(object):
 
+    # oauth session (ThreeLegged, token) and yahoo fantasy football game data shared by the reports of several leagues
+    shared_session = None
+    shared_game_data = None
+
     def __init__(self, config, league_id, save_bool, dev_bool, league_test_dir, base_dir=""):
 
         self.config = config
@@ -20,46 +24,80 @@ class YqlQuery(object):
         self.league_test_dir = league_test_dir
         self.league_key = None
         self.league_name = None
+        self.season = None
+        self.previous_league_key = None
         self.playoff_slots = None
+        self.playoff_reseeding_bool = False
         self.num_regular_season_weeks = None
 
         command_line_only = config.getboolean("OAuth_Settings", "command_line_only")
 
         if not self.dev_bool:
-            # yahoo oauth api (consumer) key and secret
-            with open(base_dir + "./authentication/yahoo/private.txt", "r") as auth_file:
-                auth_data = auth_file.read().split("\n")
-            consumer_key = auth_data[0]
-            consumer_secret = auth_data[1]
-
-            # yahoo oauth process
-            self.y3 = ThreeLegged(consumer_key, consumer_secret)
-            _cache_dir = config.get("OAuth_Settings", "yql_cache_dir")
-            if not os.access(base_dir + _cache_dir, os.R_OK):
-                os.mkdir(base_dir + _cache_dir)
-
-            token_store = FileTokenStore(base_dir + _cache_dir, secret="sasfasdfdasfdaf")
-            stored_token = token_store.get("foo")
-
-            if not stored_token:
-                request_token, auth_url = self.y3.get_token_and_auth_url()
-
-                if command_line_only:
-                    print("Visit url %s and get a verifier string" % auth_url)
-                else:
-                    webbrowser.open(auth_url.decode('utf-8'))
-
-                verifier = input("Enter the code: ")
-                self.token = self.y3.get_access_token(request_token, verifier)
-                token_store.set("foo", self.token)
+            if YqlQuery.shared_session is not None:
+                self.y3, self.token = YqlQuery.shared_session
+            else:
+                self.authenticate(base_dir, command_line_only)
+
+    def authenticate(self, base_dir, command_line_only):
+        # yahoo oauth api (consumer) key and secret
+        with open(base_dir + "./authentication/yahoo/private.txt", "r") as auth_file:
+            auth_data = auth_file.read().split("\n")
+        consumer_key = auth_data[0]
+        consumer_secret = auth_data[1]
+
+        # yahoo oauth process
+        self.y3 = ThreeLegged(consumer_key, consumer_secret)
+        _cache_dir = self.config.get("OAuth_Settings", "yql_cache_dir")
+        if not os.access(base_dir + _cache_dir, os.R_OK):
+            os.mkdir(base_dir + _cache_dir)
+
+        token_store = FileTokenStore(base_dir + _cache_dir, secret="sasfasdfdasfdaf")
+        stored_token = token_store.get("foo")
 
+        if not stored_token:
+            request_token, auth_url = self.y3.get_token_and_auth_url()
+
+            if command_line_only:
+                print("Visit url %s and get a verifier string" % auth_url)
             else:
-                print("Verifying token...")
-                self.token = self.y3.check_token(stored_token)
-                if self.token != stored_token:
-                    print("Setting stored token!")
-                    token_store.set("foo", self.token)
-                print("...token verified.")
+                webbrowser.open(auth_url.decode('utf-8'))
+
+            verifier = input("Enter the code: ")
+            self.token = self.y3.get_access_token(request_token, verifier)
+            token_store.set("foo", self.token)
+
+        else:
+            print("Verifying token...")
+            self.token = self.y3.check_token(stored_token)
+            if self.token != stored_token:
+                print("Setting stored token!")
+                token_store.set("foo", self.token)
+            print("...token verified.")
+
+    def refresh_token(self):
+        """ Refresh the oauth token of a long-running process once it has expired (yahoo tokens last for one hour),
+        storing the refreshed token and sharing it when the session is shared.
+        """
+        if self.dev_bool:
+            return
+
+        token = self.y3.check_token(self.token)
+        if token != self.token:
+            self.token = token
+            FileTokenStore(self.config.get("OAuth_Settings", "yql_cache_dir"), secret="sasfasdfdasfdaf").set(
+                "foo", self.token)
+            if YqlQuery.shared_session is not None:
+                YqlQuery.shared_session = (self.y3, self.token)
+
+    def share_session(self):
+        """ Share the oauth session and the game data of this query object with every YqlQuery created afterwards in
+        this process (or in processes forked from it).
+        """
+        YqlQuery.shared_session = (self.y3, self.token)
+        YqlQuery.shared_game_data = self.get_game_data()
+
+    def get_game_data(self):
+        return self.yql_query("select * from fantasysports.games where game_key='nfl'")
 
     def yql_query(self, query):
         # print("Executing query: %s\n" % query)
@@ -69,7 +107,7 @@ class YqlQuery(object):
 
         if not self.dev_bool:
             # get fantasy football game info
-            game_data = self.yql_query("select * from fantasysports.games where game_key='nfl'")
+            game_data = YqlQuery.shared_game_data or self.get_game_data()
         else:
             with open(self.league_test_dir +
                       "/" +
@@ -83,8 +121,13 @@ class YqlQuery(object):
                 json.dump(game_data, gd_file)
 
         df = pd.DataFrame(game_data)
-        # unique league key composed of this year's yahoo fantasy football game id and the unique league id
-        self.league_key = df.loc[0, "game_key"] + ".l." + self.league_id
+        self.season = df.loc[0, "season"] if "season" in df.columns else None
+        if ".l." in self.league_id:
+            # league of a past season, given by its full league key ("<game_key>.l.<league_id>")
+            self.league_key = self.league_id
+        else:
+            # unique league key composed of this year's yahoo fantasy football game id and the unique league id
+            self.league_key = df.loc[0, "game_key"] + ".l." + self.league_id
 
         return self.league_key
 
@@ -110,6 +153,11 @@ class YqlQuery(object):
 
         df = pd.DataFrame(league_standings_data)
         self.league_name = df.loc[0, "name"]
+        if "season" in df.columns:
+            self.season = df.loc[0, "season"]
+        # league of the previous season that this league was renewed from ("<game_key>_<league_id>")
+        if "renew" in df.columns and isinstance(df.loc[0, "renew"], str) and df.loc[0, "renew"]:
+            self.previous_league_key = df.loc[0, "renew"]
 
         # return league_standings_data
         return df
@@ -134,6 +182,8 @@ class YqlQuery(object):
 
         playoff_slots = roster_data[0].get("settings").get("num_playoff_teams")
         playoff_start_week = roster_data[0].get("settings").get("playoff_start_week")
+        # whether the best remaining seed plays the worst remaining seed in every round of the playoffs
+        self.playoff_reseeding_bool = str(roster_data[0].get("settings").get("uses_playoff_reseeding", "0")) == "1"
 
         if playoff_slots:
             self.playoff_slots = int(playoff_slots)